@@ -1,3 +1,7 @@
+# Profilage des imports (doit précéder tous les autres imports)
+from modules.startup_profiler import start_import_profiling, report_import_profile
+start_import_profiling()
+
 import base64
 import copy
 import datetime
@@ -13,17 +17,11 @@ from typing import Any, Dict
 from urllib.parse import quote
 import html
 
-import matplotlib.pyplot as plt
-import numpy as np
+# pulp, scipy, matplotlib et plotly sont importés au premier usage
+# (optimisation, graphiques) : la Vue d'ensemble n'en a pas besoin.
 import pandas as pd
-import plotly.express as px
-import pulp
 import streamlit as st
 import streamlit.components.v1 as components
-from scipy.optimize import linprog
-
-# Configuration
-from config import TVA_MP, TVA_VENTE
 
 # Modules métier
 from modules.business import calculate_margin_rate, calculer_cout, get_dough_cost
@@ -80,6 +78,9 @@ except Exception as e:
     traceback.print_exc()
 
 
+report_import_profile()
+
+
 # Injection des styles CSS globaux
 inject_all_styles()
 
@@ -420,37 +421,7 @@ print(f"[PERF] 🎨 Temps rendu vue: {_render_time:.2f}s")
 print(f"[PERF] ✅ TOTAL: {_total_time:.2f}s")
 print(f"[PERF] {'='*60}")
 
-# Préparation des données pour le chatbot avec calculs de marges
-df_plats_chatbot = recettes.copy()
-if not df_plats_chatbot.empty and "plat" in df_plats_chatbot.columns:
-    # Calculer les coûts et marges pour chaque plat
-    for idx, row in df_plats_chatbot.iterrows():
-        plat_name = row["plat"]
-        # Récupérer les ingrédients du plat
-        plat_ingredients = ingredients[ingredients["plat"] == plat_name]
-        
-        if not plat_ingredients.empty:
-            # Calculer coût matière avec TVA
-            cout_total = 0
-            for _, ing_row in plat_ingredients.iterrows():
-                quantite_kg = ing_row["quantite_g"] / 1000
-                prix_kg_ht = ing_row.get("prix_kg", 0)
-                prix_kg_ttc = prix_kg_ht * (1 + TVA_MP)
-                cout_total += quantite_kg * prix_kg_ttc
-            
-            # Récupérer prix de vente
-            prix_ttc = PRIX_VENTE_DICT.get(plat_name, 0)
-            prix_ht = prix_ttc / (1 + TVA_VENTE)
-            
-            # Calculer marge
-            marge_pct = ((prix_ht - cout_total) / prix_ht * 100) if prix_ht > 0 else 0
-            
-            # Mettre à jour le DataFrame
-            df_plats_chatbot.at[idx, "cout_matiere"] = cout_total
-            df_plats_chatbot.at[idx, "prix_ttc"] = prix_ttc
-            df_plats_chatbot.at[idx, "prix_ht"] = prix_ht
-            df_plats_chatbot.at[idx, "marge_pct"] = marge_pct
-            df_plats_chatbot.at[idx, "nom"] = plat_name
-
 # Affichage du chatbot flottant sur toutes les pages
-# render_floating_chatbot(df_plats_chatbot, ingredients, objectif_marge_actuel)  # TODO: Ajouter dossier chatbot/ au repo
+# Les données du chatbot (plats + coûts et marges HT) ne sont calculées qu'à la
+# demande, une fois par version des données, via load_chatbot_dishes.
+# render_floating_chatbot(load_chatbot_dishes(recettes, ingredients), ingredients, objectif_marge_actuel)  # TODO: Ajouter dossier chatbot/ au repo
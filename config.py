@@ -11,6 +11,20 @@ DATA_DIR = BASE_DIR / "data"
 RECIPES_PATH = DATA_DIR / "recettes_complet_MAJ2.xlsx"
 INGREDIENTS_PATH = DATA_DIR / "ingredients_nettoyes_et_standardises.xlsx"
 DRAFTS_PATH = DATA_DIR / "brouillons.json"
+SALES_DB_PATH = DATA_DIR / "kezia_sales.db"
+
+# Snapshot binaire des sources Excel normalisées (évite de re-parser les .xlsx)
+CACHE_DIR = DATA_DIR / "cache"
+EXCEL_SNAPSHOT_PATH = CACHE_DIR / "excel_sources.pkl"
+
+# Miniatures WebP des images de plats (nommées par hash de la source)
+THUMBNAIL_DIR = CACHE_DIR / "thumbnails"
+
+# Images servies en fichiers statiques (server.enableStaticServing) : le
+# dossier static/ doit être à côté d'app.py, servi sous l'URL app/static/
+STATIC_DIR = BASE_DIR / "static"
+STATIC_IMAGES_DIR = STATIC_DIR / "plats"
+STATIC_URL_PREFIX = "app/static"
 
 # Kezia API credentials
 # For Streamlit Cloud: set in Secrets (https://share.streamlit.io → Manage app → Secrets)
@@ -33,3 +47,12 @@ TVA_VENTE = 0.10  # TVA appliquée sur les ventes restauration
 
 # Streamlit cache durations (seconds)
 CACHE_TTL_SECONDS = 600
+
+# Cache des résultats d'optimisation des grammages
+OPTIMIZER_CACHE_MAX_ENTRIES = 256
+OPTIMIZER_CACHE_TTL_SECONDS = CACHE_TTL_SECONDS
+
+# Cache mémoire + disque de StreamlitOptimizer (compress_cache / load_compressed_cache)
+STREAMLIT_CACHE_DIR = DATA_DIR / "streamlit_cache"
+DISK_CACHE_TTL_SECONDS = 24 * 3600
+DISK_CACHE_MAX_BYTES = 256 * 1024 * 1024
@@ -7,10 +7,16 @@ from .cost_calculator import (
     calculer_cout,
     get_dough_cost,
 )
+from .menu_costing import (
+    compute_ingredient_costs,
+    compute_menu_costs,
+)
 
 __all__ = [
     'calculate_margin_rate',
     'calculer_cout',
     'get_dough_cost',
+    'compute_ingredient_costs',
+    'compute_menu_costs',
 ]
 
@@ -5,11 +5,13 @@ Ce module fournit des fonctions pour préparer les données nécessaires
 aux recommandations du chatbot décisionnel.
 """
 
-from typing import Any, Dict
+from typing import Any, Dict, Optional
 import pandas as pd
 
 from config import TVA_VENTE
 from modules.business.cost_calculator import calculer_cout
+from modules.utils.data_manager import load_ingredient_index
+from modules.utils.ingredient_index import IngredientIndex
 
 
 def build_decision_playbook(
@@ -17,6 +19,7 @@ def build_decision_playbook(
     objectif_marge: float,
     ingredients_df: pd.DataFrame,
     objectif_financier: float = 2000.0,
+    ingredient_index: Optional[IngredientIndex] = None,
 ) -> Dict[str, Any]:
     """
     Prépare les chiffres clés pour répondre aux questions du coach décisionnel.
@@ -35,6 +38,9 @@ def build_decision_playbook(
         ingredients_df: DataFrame des ingrédients avec colonnes 'plat', 'ingredient', 
                         'quantite_g', 'prix_kg'
         objectif_financier: Objectif mensuel de marge en euros (défaut: 2000.0)
+        ingredient_index: Index plat → lignes de ingredients_df (voir
+                          load_ingredient_index) ; index mis en cache de
+                          load_ingredient_index si absent
     
     Returns:
         Dict contenant les métriques clés :
@@ -112,9 +118,9 @@ def build_decision_playbook(
     # Identification de l'ingrédient le plus coûteux
     top_ingredient = None
     if not ingredients_df.empty:
-        plat_ingredients = ingredients_df[
-            ingredients_df["plat"].str.lower() == row["nom"].lower()
-        ].copy()
+        if ingredient_index is None:
+            ingredient_index = load_ingredient_index(ingredients_df)
+        plat_ingredients = ingredient_index.select(ingredients_df, row["nom"]).copy()
         if not plat_ingredients.empty:
             plat_ingredients = calculer_cout(plat_ingredients)
             plat_ingredients = plat_ingredients.sort_values("Coût (€)", ascending=False)
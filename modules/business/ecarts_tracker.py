@@ -2,11 +2,144 @@
 Système de détection des écarts entre données Kezia et réalité terrain
 """
 import pandas as pd
+import numpy as np
+import warnings
+from functools import lru_cache
 from pathlib import Path
 from datetime import datetime, timedelta
 from kezia_db_manager import get_db_manager
 
 
+CSV_MOYENS_PAIEMENT = Path("data/kezia_moyens_paiement.csv")
+CSV_CATEGORIES = Path("data/kezia_categories_enriched.csv")
+
+ECARTS_PERIODE_COLUMNS = [
+    'date',
+    'ca_scrape',
+    'ca_moyens_paiement',
+    'ca_categories',
+    'tickets_moyens',
+    'tickets_categories',
+    'pertes_identifiees',
+    'nb_pertes',
+    'nb_alertes',
+]
+
+ANOMALIES_COLUMNS = [
+    'date',
+    'jour_semaine',
+    'indicateur',
+    'valeur',
+    'mediane',
+    'mad',
+    'score_robuste',
+    'zscore',
+    'detail',
+]
+
+JOURS_SEMAINE = ['Lundi', 'Mardi', 'Mercredi', 'Jeudi', 'Vendredi', 'Samedi', 'Dimanche']
+
+# Indicateurs surveillés : colonne -> libellé
+INDICATEURS_ANOMALIES = {
+    'ecart_ca_pct': "écart CA moyens de paiement / catégories (%)",
+    'ratio_articles_ticket': "ratio articles par ticket",
+}
+
+
+@lru_cache(maxsize=8)
+def _read_csv_version(path, mtime_ns, size):
+    """Lecture d'un export CSV Kezia, mémorisée pour une version du fichier"""
+    return pd.read_csv(path, encoding='utf-8-sig')
+
+
+def read_kezia_csv(path):
+    """
+    Lit un export CSV Kezia, relu seulement quand le fichier change (mtime, taille)
+    
+    Le DataFrame retourné est partagé entre les appels : ne pas le modifier.
+    
+    Returns:
+        DataFrame, ou None si le fichier n'existe pas
+    """
+    path = Path(path)
+    try:
+        stat = path.stat()
+    except FileNotFoundError:
+        return None
+    return _read_csv_version(str(path), stat.st_mtime_ns, stat.st_size)
+
+
+def _baselines_par_jour_semaine(valeurs, jours_semaine, fenetre):
+    """
+    Référence de chaque jour : les `fenetre` jours précédents du même jour de semaine
+    
+    Calcul en une passe NumPy pour toute la période et tous les indicateurs :
+    les valeurs sont triées par (jour de semaine, date), puis une fenêtre
+    glissante des observations précédentes est extraite pour chaque ligne,
+    masquée quand elle déborde sur un autre jour de semaine. Les NaN (jours
+    sans données) sont ignorés.
+    
+    Args:
+        valeurs: Tableau (n_jours, n_indicateurs), jours dans l'ordre chronologique
+        jours_semaine: Jour de semaine (0-6) de chaque ligne
+        fenetre: Nombre d'observations précédentes retenues
+    
+    Returns:
+        (médiane, MAD, moyenne, écart-type, nombre d'observations), chacun de
+        forme (n_jours, n_indicateurs)
+    """
+    n = len(valeurs)
+    ordre = np.lexsort((np.arange(n), jours_semaine))
+    tries = valeurs[ordre]
+    groupes = jours_semaine[ordre]
+    
+    # Début du groupe (jour de semaine) de chaque ligne triée
+    debut = np.flatnonzero(np.r_[True, groupes[1:] != groupes[:-1]])
+    debut_ligne = debut[np.cumsum(np.r_[True, groupes[1:] != groupes[:-1]]) - 1]
+    
+    positions = np.arange(n)[:, None] - np.arange(fenetre, 0, -1)[None, :]
+    valides = positions >= debut_ligne[:, None]
+    fenetres = np.where(valides[:, :, None], tries[positions.clip(0)], np.nan)
+    
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)  # fenêtres vides
+        mediane = np.nanmedian(fenetres, axis=1)
+        mad = np.nanmedian(np.abs(fenetres - mediane[:, None, :]), axis=1)
+        moyenne = np.nanmean(fenetres, axis=1)
+        ecart_type = np.nanstd(fenetres, axis=1)
+        nb_obs = np.sum(~np.isnan(fenetres), axis=1)
+    
+    # Retour à l'ordre chronologique
+    inverse = np.empty(n, dtype=np.intp)
+    inverse[ordre] = np.arange(n)
+    return mediane[inverse], mad[inverse], moyenne[inverse], ecart_type[inverse], nb_obs[inverse]
+
+
+def _lignes_du_jour(df, date):
+    """Lignes d'un export pour une date (l'export entier s'il n'a pas de colonne date)"""
+    if df is None or 'date' not in df.columns:
+        return df
+    return df[df['date'].astype(str).str[:10] == date]
+
+
+def _totaux_par_jour(df, colonnes, jours):
+    """
+    Sommes par jour des colonnes d'un export, alignées sur les jours demandés
+    
+    Sans colonne date, l'export couvre la journée en cours d'analyse : ses
+    totaux s'appliquent à chaque jour, comme dans get_ecarts_journee.
+    """
+    if df is None:
+        return pd.DataFrame(0.0, index=jours, columns=colonnes)
+    if 'date' not in df.columns:
+        totaux = df[colonnes].sum()
+        return pd.DataFrame([totaux.to_numpy()] * len(jours), index=jours, columns=colonnes)
+    return (
+        df.groupby(df['date'].astype(str).str[:10])[colonnes].sum()
+        .reindex(jours, fill_value=0)
+    )
+
+
 class EcartsTracker:
     """Détecte et analyse les écarts dans les données de ventes"""
     
@@ -30,9 +163,9 @@ class EcartsTracker:
             temporality='hour'
         )
         
-        # Charger les CSV si disponibles
-        csv_moyens = Path("data/kezia_moyens_paiement.csv")
-        csv_categories = Path("data/kezia_categories_enriched.csv")
+        # Charger les CSV si disponibles (lus une fois par version du fichier)
+        df_moyens = _lignes_du_jour(read_kezia_csv(CSV_MOYENS_PAIEMENT), date)
+        df_categories = _lignes_du_jour(read_kezia_csv(CSV_CATEGORIES), date)
         
         ecarts = {
             'date': date,
@@ -51,8 +184,7 @@ class EcartsTracker:
             ecarts['ca_scrape'] = df_ventes['ca_ttc'].sum()
         
         # CA depuis moyens de paiement
-        if csv_moyens.exists():
-            df_moyens = pd.read_csv(csv_moyens, encoding='utf-8-sig')
+        if df_moyens is not None:
             ecarts['ca_moyens_paiement'] = df_moyens['paymentAmount'].sum()
             ecarts['tickets_moyens'] = int(df_moyens['paymentCount'].sum())
             
@@ -60,16 +192,13 @@ class EcartsTracker:
             pertes = df_moyens[df_moyens['paymentAmount'] < 0]
             if not pertes.empty:
                 ecarts['pertes_identifiees'] = abs(pertes['paymentAmount'].sum())
-                for _, p in pertes.iterrows():
-                    ecarts['alertes'].append({
-                        'type': 'perte',
-                        'montant': p['paymentAmount'],
-                        'detail': p['paymentName']
-                    })
+                ecarts['alertes'].extend(
+                    {'type': 'perte', 'montant': montant, 'detail': nom}
+                    for montant, nom in zip(pertes['paymentAmount'].tolist(), pertes['paymentName'].tolist())
+                )
         
         # CA depuis catégories
-        if csv_categories.exists():
-            df_categories = pd.read_csv(csv_categories, encoding='utf-8-sig')
+        if df_categories is not None:
             ecarts['ca_categories'] = df_categories['turnover'].sum()
             ecarts['tickets_categories'] = int(df_categories['ticketCount'].sum())
         
@@ -202,6 +331,165 @@ class EcartsTracker:
         
         return comparison
     
+    def get_ecarts_periode(self, date_debut, date_fin):
+        """
+        Indicateurs d'écarts jour par jour sur une période, en une passe
+        
+        Une seule requête de ventes pour toute la période, chaque CSV lu une
+        fois ; les indicateurs et le nombre d'alertes de get_ecarts_journee
+        sont calculés pour tous les jours à la fois.
+        
+        Args:
+            date_debut: Premier jour (YYYY-MM-DD)
+            date_fin: Dernier jour inclus (YYYY-MM-DD)
+        
+        Returns:
+            DataFrame avec une ligne par jour et les colonnes de ECARTS_PERIODE_COLUMNS
+        """
+        jours = pd.Index(
+            pd.date_range(date_debut, date_fin, freq='D').strftime("%Y-%m-%d"), name='date'
+        )
+        
+        # 1. Ventes Kezia scrapées : une requête pour toute la période
+        df_ventes = self.db.query_ventes(
+            date_debut=date_debut,
+            date_fin=date_fin,
+            temporality='hour'
+        )
+        if df_ventes.empty:
+            ca_scrape = pd.Series(0.0, index=jours)
+        else:
+            ca_scrape = (
+                df_ventes.groupby(df_ventes['date'].astype(str).str[:10])['ca_ttc'].sum()
+                .reindex(jours, fill_value=0)
+            )
+        
+        # 2. Exports CSV
+        df_moyens = read_kezia_csv(CSV_MOYENS_PAIEMENT)
+        df_categories = read_kezia_csv(CSV_CATEGORIES)
+        
+        moyens = _totaux_par_jour(df_moyens, ['paymentAmount', 'paymentCount'], jours)
+        categories = _totaux_par_jour(df_categories, ['turnover', 'ticketCount'], jours)
+        if df_moyens is not None:
+            negatifs = df_moyens[df_moyens['paymentAmount'] < 0].assign(nb=1)
+            pertes = _totaux_par_jour(negatifs, ['paymentAmount', 'nb'], jours)
+        else:
+            pertes = pd.DataFrame(0.0, index=jours, columns=['paymentAmount', 'nb'])
+        
+        df = pd.DataFrame({
+            'ca_scrape': ca_scrape.to_numpy(dtype=float),
+            'ca_moyens_paiement': moyens['paymentAmount'].to_numpy(dtype=float),
+            'ca_categories': categories['turnover'].to_numpy(dtype=float),
+            'tickets_moyens': moyens['paymentCount'].to_numpy().astype(int),
+            'tickets_categories': categories['ticketCount'].to_numpy().astype(int),
+            'pertes_identifiees': np.abs(pertes['paymentAmount'].to_numpy(dtype=float)),
+            'nb_pertes': pertes['nb'].to_numpy().astype(int),
+        }, index=jours)
+        
+        # 3. Alertes (mêmes seuils que get_ecarts_journee)
+        ca_moy = df['ca_moyens_paiement'].to_numpy()
+        ca_cat = df['ca_categories'].to_numpy()
+        avec_ca = (ca_moy > 0) & (ca_cat > 0)
+        ecart_pct = np.divide(
+            np.abs(ca_moy - ca_cat) * 100, ca_moy, out=np.zeros_like(ca_moy), where=avec_ca
+        )
+        alerte_ca = avec_ca & (ecart_pct > 1)
+        
+        t_moy = df['tickets_moyens'].to_numpy()
+        t_cat = df['tickets_categories'].to_numpy()
+        avec_tickets = (t_moy > 0) & (t_cat > 0)
+        ratio = np.divide(t_cat, t_moy, out=np.zeros(len(df)), where=avec_tickets)
+        alerte_ratio = avec_tickets & ((ratio < 1.5) | (ratio > 5))
+        
+        df['nb_alertes'] = df['nb_pertes'] + alerte_ca.astype(int) + alerte_ratio.astype(int)
+        
+        return df.reset_index()[ECARTS_PERIODE_COLUMNS]
+    
+    def detecter_anomalies(self, date_debut, date_fin, fenetre=8, seuil=3.5, min_obs=3):
+        """
+        Détecte les journées anormales sur une période, par jour de semaine
+        
+        Pour l'écart CA (moyens de paiement vs catégories) et le ratio
+        articles/ticket, chaque jour est comparé aux `fenetre` mêmes jours de
+        semaine précédents : score robuste 0.6745·(x − médiane)/MAD et z-score
+        glissant (x − moyenne)/écart-type. Un jour est signalé si les deux
+        scores dépassent `seuil` (ou s'il s'écarte d'un historique constant).
+        
+        Complète les seuils fixes de get_ecarts_journee (1 %, 5 %, ratio
+        1.5-5) : un samedi n'a pas le même profil qu'un mardi.
+        
+        Args:
+            date_debut: Premier jour analysé (YYYY-MM-DD), historique compris
+            date_fin: Dernier jour inclus (YYYY-MM-DD)
+            fenetre: Nombre de semaines de référence
+            seuil: Score au-delà duquel un jour est signalé
+            min_obs: Nombre minimal de jours de référence pour juger un jour
+        
+        Returns:
+            DataFrame des anomalies (colonnes de ANOMALIES_COLUMNS), triées par date
+        
+        Example:
+            >>> tracker.detecter_anomalies("2026-01-01", "2026-06-30")
+        """
+        periode = self.get_ecarts_periode(date_debut, date_fin)
+        if periode.empty:
+            return pd.DataFrame(columns=ANOMALIES_COLUMNS)
+        
+        ca_moy = periode['ca_moyens_paiement'].to_numpy(dtype=float)
+        ca_cat = periode['ca_categories'].to_numpy(dtype=float)
+        t_moy = periode['tickets_moyens'].to_numpy(dtype=float)
+        t_cat = periode['tickets_categories'].to_numpy(dtype=float)
+        
+        # Indicateurs (NaN quand une source manque ce jour-là)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            valeurs = np.column_stack([
+                np.where((ca_moy > 0) & (ca_cat > 0), (ca_moy - ca_cat) / ca_moy * 100, np.nan),
+                np.where((t_moy > 0) & (t_cat > 0), t_cat / t_moy, np.nan),
+            ])
+        
+        jours_semaine = pd.to_datetime(periode['date']).dt.dayofweek.to_numpy()
+        mediane, mad, moyenne, ecart_type, nb_obs = _baselines_par_jour_semaine(
+            valeurs, jours_semaine, fenetre
+        )
+        
+        with np.errstate(divide='ignore', invalid='ignore'):
+            ecart = valeurs - mediane
+            score_robuste = np.where(mad > 0, 0.6745 * ecart / mad, np.nan)
+            zscore = np.where(ecart_type > 0, (valeurs - moyenne) / ecart_type, np.nan)
+        # Les deux scores doivent concorder (peu de semaines de référence :
+        # la MAD seule est trop sensible). Historique constant : tout écart
+        # à la référence est une anomalie.
+        constant = (mad == 0) & (ecart_type == 0) & (ecart != 0)
+        anormal = (
+            ((np.abs(score_robuste) > seuil) & (np.abs(zscore) > seuil)) | constant
+        ) & (nb_obs >= min_obs) & ~np.isnan(valeurs)
+        
+        lignes, colonnes = np.nonzero(anormal)
+        if not len(lignes):
+            return pd.DataFrame(columns=ANOMALIES_COLUMNS)
+        
+        noms = np.array(list(INDICATEURS_ANOMALIES))[colonnes]
+        anomalies = pd.DataFrame({
+            'date': periode['date'].to_numpy()[lignes],
+            'jour_semaine': np.array(JOURS_SEMAINE)[jours_semaine[lignes]],
+            'indicateur': noms,
+            'valeur': valeurs[lignes, colonnes],
+            'mediane': mediane[lignes, colonnes],
+            'mad': mad[lignes, colonnes],
+            'score_robuste': score_robuste[lignes, colonnes],
+            'zscore': zscore[lignes, colonnes],
+        })
+        anomalies['detail'] = [
+            f"{INDICATEURS_ANOMALIES[nom]} inhabituel pour un {jour.lower()} : "
+            f"{valeur:.2f} (référence {ref:.2f})"
+            for nom, jour, valeur, ref in zip(
+                anomalies['indicateur'], anomalies['jour_semaine'],
+                anomalies['valeur'], anomalies['mediane']
+            )
+        ]
+        
+        return anomalies.sort_values(['date', 'indicateur'], ignore_index=True)[ANOMALIES_COLUMNS]
+    
     def tendance_ecarts(self, nb_jours=7):
         """
         Analyse la tendance des écarts sur plusieurs jours
@@ -212,35 +500,29 @@ class EcartsTracker:
         date_fin = datetime.now()
         date_debut = date_fin - timedelta(days=nb_jours)
         
-        ecarts_history = []
+        periode = self.get_ecarts_periode(
+            date_debut.strftime("%Y-%m-%d"),
+            (date_debut + timedelta(days=nb_jours - 1)).strftime("%Y-%m-%d"),
+        )
         
-        for i in range(nb_jours):
-            date = (date_debut + timedelta(days=i)).strftime("%Y-%m-%d")
-            ecarts = self.get_ecarts_journee(date)
-            
-            if ecarts['ca_moyens_paiement'] > 0:  # Seulement si on a des données
-                ecarts_history.append({
-                    'date': date,
-                    'ca': ecarts['ca_moyens_paiement'],
-                    'pertes': ecarts['pertes_identifiees'],
-                    'nb_alertes': len(ecarts['alertes'])
-                })
+        # Seulement les jours avec des données
+        df = periode[periode['ca_moyens_paiement'] > 0].rename(
+            columns={'ca_moyens_paiement': 'ca', 'pertes_identifiees': 'pertes'}
+        )[['date', 'ca', 'pertes', 'nb_alertes']]
         
-        if not ecarts_history:
+        if df.empty:
             return {
                 'message': f"Pas de données sur les {nb_jours} derniers jours"
             }
         
-        df = pd.DataFrame(ecarts_history)
-        
         return {
-            'nb_jours': len(ecarts_history),
+            'nb_jours': len(df),
             'ca_total': df['ca'].sum(),
             'ca_moyen': df['ca'].mean(),
             'pertes_totales': df['pertes'].sum(),
             'pertes_moyennes': df['pertes'].mean(),
             'jours_avec_alertes': (df['nb_alertes'] > 0).sum(),
-            'detail_par_jour': ecarts_history
+            'detail_par_jour': df.to_dict('records')
         }
     
     def rapport_ecarts(self, date=None):
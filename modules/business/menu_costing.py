@@ -0,0 +1,115 @@
+"""
+Moteur de calcul des coûts et marges de toute la carte en une seule passe
+"""
+
+import numpy as np
+import pandas as pd
+
+from config import TVA_VENTE
+from modules.data import PRIX_VENTE_DICT, SALADES_AVEC_PAIN, COUT_PAIN_SALADE
+from modules.business.cost_calculator import calculer_cout, get_dough_cost
+from modules.utils.text_helpers import normalize_label
+
+
+MENU_COSTS_COLUMNS = [
+    "nom",
+    "categorie",
+    "cout_ingredients",
+    "cout_pate",
+    "cout_pain",
+    "cout_matiere",
+    "prix_ttc",
+    "prix_ht",
+    "marge_euros",
+    "marge_pct",
+]
+
+
+# ============================================================================
+# COÛTS PAR LIGNE D'INGRÉDIENT
+# ============================================================================
+
+def compute_ingredient_costs(ingredients_df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Calcule le coût HT de toutes les lignes d'ingrédients en un seul appel.
+
+    Args:
+        ingredients_df: DataFrame des ingrédients (colonnes plat, ingredient,
+                        quantite_g, prix_kg)
+
+    Returns:
+        DataFrame avec la colonne "Coût (€)" et une colonne "plat_key"
+        (nom du plat normalisé via normalize_label) servant de clé de regroupement
+    """
+    lignes = calculer_cout(ingredients_df)
+    if lignes is ingredients_df:
+        lignes = ingredients_df.copy()
+    if "Coût (€)" not in lignes.columns:
+        lignes["Coût (€)"] = 0.0
+    lignes["plat_key"] = lignes["plat"].map(normalize_label)
+    return lignes
+
+
+# ============================================================================
+# COÛTS ET MARGES DE LA CARTE
+# ============================================================================
+
+def compute_menu_costs(
+    recettes: pd.DataFrame,
+    ingredients_df: pd.DataFrame,
+    prix_vente: dict = None,
+    lignes: pd.DataFrame = None,
+) -> pd.DataFrame:
+    """
+    Calcule coût matière et marge de chaque plat de la carte en une passe vectorisée.
+
+    Les coûts des ingrédients sont calculés une seule fois pour toute la table,
+    puis agrégés par plat. S'y ajoutent la pâte (règles de get_dough_cost) et
+    le pain servi avec certaines salades.
+
+    Args:
+        recettes: DataFrame des recettes (colonnes plat, categorie)
+        ingredients_df: DataFrame des ingrédients
+        prix_vente: Dictionnaire des prix TTC (défaut: PRIX_VENTE_DICT)
+        lignes: Coûts par ligne déjà calculés par compute_ingredient_costs (optionnel)
+
+    Returns:
+        DataFrame avec une ligne par plat et les colonnes de MENU_COSTS_COLUMNS
+
+    Example:
+        >>> menu = compute_menu_costs(recettes, ingredients)
+        >>> menu.nsmallest(5, "marge_pct")[["nom", "marge_pct"]]
+    """
+    if prix_vente is None:
+        prix_vente = PRIX_VENTE_DICT
+    if lignes is None:
+        lignes = compute_ingredient_costs(ingredients_df)
+
+    menu = (
+        recettes.drop_duplicates("plat")[["plat", "categorie"]]
+        .rename(columns={"plat": "nom"})
+        .reset_index(drop=True)
+    )
+    if menu.empty:
+        return pd.DataFrame(columns=MENU_COSTS_COLUMNS)
+
+    cle = menu["nom"].map(normalize_label)
+    cout_par_plat = lignes.groupby("plat_key")["Coût (€)"].sum()
+
+    menu["cout_ingredients"] = cle.map(cout_par_plat).fillna(0.0).astype(float)
+    menu["cout_pate"] = menu["nom"].map(get_dough_cost).astype(float)
+    avec_pain = menu["nom"].str.lower().isin(SALADES_AVEC_PAIN)
+    menu["cout_pain"] = np.where(avec_pain, COUT_PAIN_SALADE, 0.0)
+    menu["cout_matiere"] = menu["cout_ingredients"] + menu["cout_pate"] + menu["cout_pain"]
+
+    # Tous les calculs de marge se font en HT
+    menu["prix_ttc"] = menu["nom"].map(prix_vente).fillna(0).astype(float)
+    menu["prix_ht"] = menu["prix_ttc"] / (1 + TVA_VENTE)
+    menu["marge_euros"] = menu["prix_ht"] - menu["cout_matiere"]
+    prix_ht = menu["prix_ht"].to_numpy()
+    marge = menu["marge_euros"].to_numpy()
+    menu["marge_pct"] = np.divide(
+        marge * 100, prix_ht, out=np.zeros_like(marge), where=prix_ht > 0
+    )
+
+    return menu[MENU_COSTS_COLUMNS]
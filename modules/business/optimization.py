@@ -5,14 +5,45 @@ Ce module fournit plusieurs algorithmes d'optimisation pour ajuster les quantit
 d'ingrédients dans les recettes tout en respectant des contraintes de coût et de marge.
 """
 
+import multiprocessing
+import os
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
 import numpy as np
 import pandas as pd
-import pulp
-from scipy.optimize import linprog
 
-from modules.business.cost_calculator import calculer_cout
+from config import OPTIMIZER_CACHE_MAX_ENTRIES, OPTIMIZER_CACHE_TTL_SECONDS
+from modules.business.menu_costing import compute_ingredient_costs, compute_menu_costs
+from modules.business.optimization_cache import OptimizerResultCache
+from modules.utils.text_helpers import normalize_label
+
 
+# Résultats mémorisés des optimiseurs publics, par empreinte de la recette
+_RESULT_CACHE = OptimizerResultCache(
+    max_entries=OPTIMIZER_CACHE_MAX_ENTRIES,
+    ttl=OPTIMIZER_CACHE_TTL_SECONDS,
+)
 
+
+def get_optimizer_cache_stats():
+    """
+    Retourne les compteurs du cache des résultats d'optimisation.
+    
+    Returns:
+        dict: hits, misses, évictions, expirations, taille, octets, hit_rate (voir MemoCache.stats)
+    """
+    return _RESULT_CACHE.stats()
+
+
+def clear_optimizer_cache():
+    """Vide le cache des résultats d'optimisation (ex: après modification des prix)."""
+    _RESULT_CACHE.clear()
+
+
+@_RESULT_CACHE.memoize
 def optimize_grammages_linprog(df_ing, prix_affiche, marge_cible, q_min=5):
     """
     Optimise les grammages en utilisant la programmation linéaire (linprog).
@@ -31,13 +62,18 @@ def optimize_grammages_linprog(df_ing, prix_affiche, marge_cible, q_min=5):
     Returns:
         pd.DataFrame: DataFrame avec colonnes 'new_qty' et 'new_cout' ajoutées
     """
-    all_ing = df_ing["ingredient"].tolist()
-    # on ne touche pas aux pâtes
-    fixed = [i for i in all_ing if "pâte à pizza" in i.lower() or "pâte à panini" in i.lower()]
-    opt_ing = [i for i in all_ing if i not in fixed]
-    n = len(opt_ing)
-    prix_kg = dict(zip(all_ing, df_ing["prix_kg"]))
-    q0      = dict(zip(all_ing, df_ing["quantite_g"]))
+    # Imports différés : SciPy n'est chargé qu'à la première optimisation
+    from scipy import sparse
+    from scipy.optimize import linprog
+
+    # on ne touche pas aux pâtes (masque positionnel : les doublons restent distincts)
+    noms = df_ing["ingredient"].astype(str).str.lower()
+    fixed = (noms.str.contains("pâte à pizza", regex=False)
+             | noms.str.contains("pâte à panini", regex=False)).to_numpy()
+    opt_pos = np.flatnonzero(~fixed)
+    n = len(opt_pos)
+    prix_kg = df_ing["prix_kg"].to_numpy(dtype=float)[opt_pos]
+    q0      = df_ing["quantite_g"].to_numpy(dtype=float)
     budget  = prix_affiche * (1 - marge_cible/100)
 
     # variables x = [q_0…q_{n-1}, d_0…d_{n-1}]
@@ -45,28 +81,17 @@ def optimize_grammages_linprog(df_ing, prix_affiche, marge_cible, q_min=5):
     # bornes
     bounds = [(q_min, None)]*n + [(0, None)]*n
 
-    # A_ub x ≤ b_ub
-    rows = []
-    rhs  = []
-
+    # A_ub x ≤ b_ub, assemblée en une fois au format creux :
     # 1) coût total ≤ budget
-    a = np.zeros(2*n)
-    for j, ing in enumerate(opt_ing):
-        a[j] = prix_kg[ing] / 1000
-    rows.append(a)
-    rhs.append(budget)
-
-    # 2) linéarisation |q–q0|
-    for j, ing in enumerate(opt_ing):
-        # q_j - d_j ≤ q0_j
-        r = np.zeros(2*n); r[j] = 1; r[n+j] = -1
-        rows.append(r); rhs.append(q0[ing])
-        # -q_j - d_j ≤ -q0_j
-        r = np.zeros(2*n); r[j] = -1; r[n+j] = -1
-        rows.append(r); rhs.append(-q0[ing])
-
-    A_ub = np.vstack(rows)
-    b_ub = np.array(rhs)
+    # 2) linéarisation |q–q0| : q - d ≤ q0 et -q - d ≤ -q0
+    identite = sparse.identity(n, format="csr")
+    A_ub = sparse.vstack([
+        sparse.hstack([sparse.csr_matrix(prix_kg[np.newaxis, :] / 1000),
+                       sparse.csr_matrix((1, n))]),
+        sparse.hstack([identite, -identite]),
+        sparse.hstack([-identite, -identite]),
+    ], format="csr")
+    b_ub = np.concatenate([[budget], q0[opt_pos], -q0[opt_pos]])
 
     sol = linprog(c, A_ub=A_ub, b_ub=b_ub, bounds=bounds, method="highs")
     if not sol.success:
@@ -76,53 +101,171 @@ def optimize_grammages_linprog(df_ing, prix_affiche, marge_cible, q_min=5):
         df2["new_cout"] = df2["Coût (€)"]
         return df2
 
-    q_opt = sol.x[:n]
+    # Correspondance positionnelle : ligne opt_pos[j] ↔ variable q_j
+    new_qty = q0.copy()
+    new_qty[opt_pos] = np.maximum(q_min, sol.x[:n])
     df2 = df_ing.copy()
-    def get_new(ing):
-        if ing in opt_ing:
-            idx = opt_ing.index(ing)
-            if 0 <= idx < len(q_opt):
-                return max(q_min, float(q_opt[idx]))
-            return q0[ing]
-        return q0[ing]
-    df2["new_qty"]  = df2["ingredient"].apply(get_new)
+    df2["new_qty"]  = new_qty
     df2["new_cout"] = df2["new_qty"] * df2["prix_kg"] / 1000
     return df2
 
 
-def optimize_grammages_balanced(df_ing, prix_affiche, marge_cible, q_min=5):
+def _water_filling_model(q0, prix_kg, q_min):
     """
-    Optimise les grammages en répartissant équitablement les réductions.
+    Prépare le modèle minimax de optimize_grammages_balanced (indépendant du budget).
     
-    Utilise l'approche minimax (Chebyshev) pour minimiser l'écart maximum
-    en pourcentage sur l'ensemble des ingrédients. Cette méthode garantit
-    que tous les ingrédients sont réduits de manière proportionnelle.
+    Pour une réduction commune t, le coût minimal est obtenu avec
+    qᵢ = max(q_min, q0ᵢ·(1-t)) : le coût est linéaire par morceaux et décroissant
+    en t, avec une cassure quand un ingrédient atteint le plancher q_min
+    (remplissage « water-filling »). Les points de cassure ne dépendent pas du
+    budget : le modèle est calculé une fois puis résolu pour autant de budgets
+    que nécessaire (voir _water_filling_reductions).
     
     Args:
-        df_ing (pd.DataFrame): DataFrame des ingrédients avec colonnes 'ingredient', 
-                               'quantite_g', 'prix_kg', 'Coût (€)'
-        prix_affiche (float): Prix de vente affiché du plat
-        marge_cible (float): Marge cible en pourcentage (ex: 70 pour 70%)
-        q_min (int): Quantité minimale en grammes pour chaque ingrédient (défaut: 5)
+        q0 (np.ndarray): Quantités initiales (g) des ingrédients optimisables
+        prix_kg (np.ndarray): Prix au kg, pondérés par le nombre d'occurrences
+        q_min (float): Quantité minimale en grammes
     
     Returns:
-        pd.DataFrame: DataFrame avec colonnes 'new_qty' et 'new_cout' ajoutées
+        dict: Données du modèle (quantités, coûts aux points de cassure...)
+    
+    Raises:
+        ValueError: Si les données contiennent des valeurs non finies
     """
-    # Séparation des ingrédients fixes (pâtes) et variables
-    all_ing = df_ing["ingredient"].tolist()
-    fixed = [i for i in all_ing if "pâte" in i.lower()]
-    opt_ing = [i for i in all_ing if i not in fixed]
+    q0 = np.asarray(q0, dtype=float)
+    prix = np.asarray(prix_kg, dtype=float) / 1000
+    if not (np.all(np.isfinite(q0)) and np.all(np.isfinite(prix))):
+        raise ValueError("Données non finies")
+
+    # Ingrédients sans quantité initiale : aucune contrainte minimax, coût minimal à q_min
+    libres = q0 <= 0
+    reductibles = ~libres
+    qa, pa = q0[reductibles], prix[reductibles]
+    cout_libres = prix[libres].sum() * q_min
+
+    # Points de cassure : réduction à partir de laquelle chaque ingrédient est au plancher
+    t_bloc = 1 - q_min / qa
+    ordre = np.argsort(t_bloc, kind="stable")
+    t_tries, p_tries, q_tries = t_bloc[ordre], pa[ordre], qa[ordre]
+    cum_p = np.cumsum(p_tries)
+    cum_pq = np.cumsum(p_tries * q_tries)
+    total_pq = cum_pq[-1] if len(cum_pq) else 0.0
+
+    return {
+        "q0": q0,
+        "q_min": float(q_min),
+        "reductibles": reductibles,
+        "faisable": not np.any(qa < q_min),  # q_min ≤ q ≤ q0 possible
+        "cout_libres": cout_libres,
+        "cout_initial": cout_libres + pa @ qa,
+        "cout_plancher": cout_libres + pa.sum() * q_min,
+        "t_tries": t_tries,
+        "cum_p": cum_p,
+        "cum_pq": cum_pq,
+        "total_pq": total_pq,
+        # Coût aux points de cassure (décroissant)
+        "cout_cassures": cout_libres + q_min * cum_p + (1 - t_tries) * (total_pq - cum_pq),
+    }
+
+
+def _water_filling_reductions(model, budgets):
+    """
+    Calcule la réduction commune t minimale pour chaque budget, en une passe.
     
-    # Extraction des données
-    prix_kg = dict(zip(all_ing, df_ing["prix_kg"]))
-    q0 = dict(zip(all_ing, df_ing["quantite_g"]))
-    budget = prix_affiche * (1 - marge_cible/100)
+    Args:
+        model (dict): Modèle construit par _water_filling_model
+        budgets (array-like): Budgets disponibles pour les ingrédients optimisables
     
-    # Coût fixe des pâtes
-    fixed_cost = sum(q0[i] * prix_kg[i] / 1000 for i in fixed)
+    Returns:
+        np.ndarray: Réduction t ∈ [0, 1] par budget (NaN si infaisable)
     
-    # Budget disponible pour les ingrédients variables
-    remaining_budget = budget - fixed_cost
+    Raises:
+        ValueError: Si un budget n'est pas fini
+    """
+    budgets = np.atleast_1d(np.asarray(budgets, dtype=float))
+    if not np.all(np.isfinite(budgets)):
+        raise ValueError("Données non finies")
+
+    t = np.full(len(budgets), np.nan)
+    if not model["faisable"]:
+        return t
+
+    seuils = budgets + 1e-9 * np.maximum(1.0, np.abs(budgets))
+
+    # Objectif déjà atteint sans réduction
+    deja_atteint = model["cout_initial"] <= seuils
+    t[deja_atteint] = 0.0
+
+    # Même avec tous les ingrédients au plancher, certains budgets sont dépassés
+    a_resoudre = ~deja_atteint & (model["cout_plancher"] <= seuils)
+    if not a_resoudre.any():
+        return t
+
+    # Premier segment sous le budget, pour tous les budgets à la fois
+    b = budgets[a_resoudre]
+    k = np.argmax(model["cout_cassures"][np.newaxis, :] <= seuils[a_resoudre][:, np.newaxis], axis=1)
+    cum_p, cum_pq = model["cum_p"], model["cum_pq"]
+    p_bloques = np.where(k > 0, cum_p[k - 1], 0.0)
+    pq_actifs = model["total_pq"] - np.where(k > 0, cum_pq[k - 1], 0.0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        t_k = np.where(
+            pq_actifs > 0,
+            1 - (b - model["cout_libres"] - model["q_min"] * p_bloques) / pq_actifs,
+            model["t_tries"][k],
+        )
+    t[a_resoudre] = np.clip(t_k, 0.0, 1.0)
+    return t
+
+
+def _water_filling_quantities(model, t):
+    """
+    Nouvelles quantités pour chaque réduction t (une ligne par réduction).
+    
+    Returns:
+        np.ndarray: Matrice (len(t), n_ingrédients)
+    """
+    t = np.atleast_1d(np.asarray(t, dtype=float))
+    q0, q_min, reductibles = model["q0"], model["q_min"], model["reductibles"]
+    q_new = np.tile(np.where(reductibles, q0, q_min), (len(t), 1))
+    qa = q0[reductibles]
+    q_new[:, reductibles] = np.clip(qa[np.newaxis, :] * (1 - t[:, np.newaxis]), q_min, qa)
+    return q_new
+
+
+def _solve_balanced_water_filling(q0, prix_kg, budget, q_min):
+    """
+    Résout le problème minimax de optimize_grammages_balanced sans solveur LP.
+    
+    On cherche le plus petit t tel que coût(t) ≤ budget (voir _water_filling_model).
+    
+    Args:
+        q0 (np.ndarray): Quantités initiales (g) des ingrédients optimisables
+        prix_kg (np.ndarray): Prix au kg, pondérés par le nombre d'occurrences
+        budget (float): Budget disponible pour ces ingrédients
+        q_min (float): Quantité minimale en grammes
+    
+    Returns:
+        np.ndarray | None: Nouvelles quantités, ou None si le problème est infaisable
+    
+    Raises:
+        ValueError: Si les données contiennent des valeurs non finies
+    """
+    model = _water_filling_model(q0, prix_kg, q_min)
+    t = _water_filling_reductions(model, [budget])
+    if np.isnan(t[0]):
+        return None
+    return _water_filling_quantities(model, t)[0]
+
+
+def _solve_balanced_cbc(opt_ing, prix_kg, q0, remaining_budget, q_min):
+    """
+    Résout le problème minimax de optimize_grammages_balanced avec PuLP/CBC.
+    
+    Returns:
+        dict | None: {ingrédient: nouvelle quantité (None si indéterminée)},
+                     ou None si aucune solution optimale n'est trouvée
+    """
+    import pulp  # import différé (solveur de secours uniquement)
     
     # Création du problème d'optimisation
     prob = pulp.LpProblem("OptimisationEquilibree", pulp.LpMinimize)
@@ -151,27 +294,194 @@ def optimize_grammages_balanced(df_ing, prix_affiche, marge_cible, q_min=5):
     
     # Vérification du statut de résolution
     if prob.status != pulp.LpStatusOptimal:
+        return None
+    
+    return {ing: q[ing].value() for ing in q}
+
+
+def _solve_balanced_integer(noms, occurrences, q0, prix_kg, remaining_budget, q_min,
+                            time_limit=10, exact=False, pas=5):
+    """
+    Résout le problème minimax en nombres entiers : qᵢ = pas·kᵢ, kᵢ entier.
+    
+    - Mode équilibré : minimiser la réduction maximale en %, puis utiliser au
+      mieux le budget. Les quantités ne dépassent pas leur valeur arrondie.
+    - Mode exact : coût le plus proche possible du budget (par défaut), puis
+      écart maximal en % (hausse ou baisse) le plus faible.
+    
+    Le résultat est déjà arrondi et respecte le budget : aucun arrondi a
+    posteriori ne peut faire manquer la marge cible.
+    
+    Args:
+        noms (list): Ingrédients optimisables (sans doublon)
+        occurrences (Counter): Nombre de lignes par ingrédient
+        q0 (dict): Quantités initiales (g)
+        prix_kg (dict): Prix au kg
+        remaining_budget (float): Budget disponible pour ces ingrédients
+        q_min (float): Quantité minimale en grammes
+        time_limit (float): Temps de résolution maximal en secondes
+        exact (bool): Viser le budget au plus près plutôt que l'équilibre
+        pas (int): Pas des grammages en grammes (défaut: 5)
+    
+    Returns:
+        dict | None: {ingrédient: nouvelle quantité}, meilleure solution trouvée
+                     dans le temps imparti, ou None si aucune solution
+    """
+    import pulp  # import différé (mode entier uniquement)
+    
+    if remaining_budget <= 0:
+        return None
+    
+    prob = pulp.LpProblem("OptimisationEntiere", pulp.LpMinimize)
+    k_min = int(np.ceil(q_min / pas))
+    
+    k = {}
+    for i, ing in enumerate(noms):
+        if q0[ing] <= 0:
+            # Ingrédients sans quantité initiale : fixés au plancher
+            k_max = k_min
+        elif exact:
+            # Hausse possible, bornée par l'écart maximal (≤ 100 %)
+            k_max = max(k_min, int(np.floor(2 * q0[ing] / pas)))
+        else:
+            k_max = max(k_min, int(round(q0[ing] / pas)))
+        k[ing] = pulp.LpVariable(f"k_{i}", lowBound=k_min, upBound=k_max, cat="Integer")
+    
+    # Écart maximal en pourcentage (réduction, et hausse en mode exact)
+    max_pct = pulp.LpVariable("max_pct", lowBound=0, upBound=1)
+    cout = pulp.lpSum(k[ing] * pas * prix_kg[ing] * occurrences[ing] / 1000 for ing in noms)
+    budget_inutilise = (remaining_budget - cout) / remaining_budget
+    
+    prob += cout <= remaining_budget
+    for ing in noms:
+        if q0[ing] > 0:
+            prob += (q0[ing] - pas * k[ing]) / q0[ing] <= max_pct
+            if exact:
+                prob += (pas * k[ing] - q0[ing]) / q0[ing] <= max_pct
+    
+    # Objectif lexicographique (critère secondaire de poids négligeable)
+    if exact:
+        prob += budget_inutilise + 1e-3 * max_pct
+    else:
+        prob += max_pct + 1e-4 * budget_inutilise
+    
+    prob.solve(pulp.PULP_CBC_CMD(msg=False, timeLimit=time_limit))
+    
+    # Temps écoulé : la meilleure solution entière trouvée est conservée
+    if prob.sol_status not in (pulp.LpSolutionOptimal, pulp.LpSolutionIntegerFeasible):
+        return None
+    
+    valeurs = {ing: k[ing].value() for ing in noms}
+    if any(v is None for v in valeurs.values()):
+        return None
+    return {ing: pas * int(round(v)) for ing, v in valeurs.items()}
+
+
+@_RESULT_CACHE.memoize
+def optimize_grammages_balanced(df_ing, prix_affiche, marge_cible, q_min=5, solver="auto",
+                                integer=False, time_limit=10):
+    """
+    Optimise les grammages en répartissant équitablement les réductions.
+    
+    Utilise l'approche minimax (Chebyshev) pour minimiser l'écart maximum
+    en pourcentage sur l'ensemble des ingrédients. Cette méthode garantit
+    que tous les ingrédients sont réduits de manière proportionnelle.
+    
+    Le problème n'ayant qu'une contrainte de budget, il est résolu directement
+    (recherche de la réduction commune par water-filling NumPy). CBC n'est
+    utilisé qu'en secours, si la résolution directe échoue.
+    
+    En mode entier (integer=True), les grammages sont des multiples de 5 g dans
+    le modèle lui-même (CBC, limité à time_limit secondes) : la marge cible est
+    respectée après arrondi et le coût est le plus proche possible de la cible.
+    
+    Args:
+        df_ing (pd.DataFrame): DataFrame des ingrédients avec colonnes 'ingredient', 
+                               'quantite_g', 'prix_kg', 'Coût (€)'
+        prix_affiche (float): Prix de vente affiché du plat
+        marge_cible (float): Marge cible en pourcentage (ex: 70 pour 70%)
+        q_min (int): Quantité minimale en grammes pour chaque ingrédient (défaut: 5)
+        solver (str): "auto" (résolution directe, CBC en secours) ou "cbc"
+        integer (bool): Grammages entiers par pas de 5 g dans le modèle (défaut: False)
+        time_limit (float): Temps maximal du mode entier en secondes (défaut: 10)
+    
+    Returns:
+        pd.DataFrame: DataFrame avec colonnes 'new_qty' et 'new_cout' ajoutées
+    """
+    return _optimize_balanced(df_ing, prix_affiche, marge_cible, q_min, solver, integer, time_limit)
+
+
+def _optimize_balanced(df_ing, prix_affiche, marge_cible, q_min=5, solver="auto",
+                       integer=False, time_limit=10, exact=False):
+    """
+    Implémentation de optimize_grammages_balanced (non mémorisée).
+    
+    Le paramètre exact n'a d'effet qu'en mode entier : il sélectionne l'objectif
+    « coût au plus près du budget » utilisé par optimize_grammages_exact.
+    """
+    # Séparation des ingrédients fixes (pâtes) et variables
+    all_ing = df_ing["ingredient"].tolist()
+    fixed = [i for i in all_ing if "pâte" in i.lower()]
+    opt_ing = [i for i in all_ing if i not in fixed]
+    
+    # Extraction des données
+    prix_kg = dict(zip(all_ing, df_ing["prix_kg"]))
+    q0 = dict(zip(all_ing, df_ing["quantite_g"]))
+    budget = prix_affiche * (1 - marge_cible/100)
+    
+    # Coût fixe des pâtes
+    fixed_cost = sum(q0[i] * prix_kg[i] / 1000 for i in fixed)
+    
+    # Budget disponible pour les ingrédients variables
+    remaining_budget = budget - fixed_cost
+    
+    new_values = None
+    solved = False
+    if integer:
+        noms = list(dict.fromkeys(opt_ing))
+        new_values = _solve_balanced_integer(
+            noms, Counter(opt_ing), q0, prix_kg, remaining_budget, q_min, time_limit, exact
+        )
+        solved = True
+    elif solver != "cbc":
+        # Une variable par ingrédient ; un doublon compte plusieurs fois dans le budget
+        noms = list(dict.fromkeys(opt_ing))
+        occurrences = Counter(opt_ing)
+        try:
+            q_new = _solve_balanced_water_filling(
+                [q0[ing] for ing in noms],
+                [prix_kg[ing] * occurrences[ing] for ing in noms],
+                remaining_budget,
+                q_min,
+            )
+            new_values = dict(zip(noms, q_new.tolist())) if q_new is not None else None
+            solved = True
+        except (ValueError, FloatingPointError):
+            solved = False
+    
+    if not solved:
+        new_values = _solve_balanced_cbc(opt_ing, prix_kg, q0, remaining_budget, q_min)
+    
+    if new_values is None:
         # Si l'optimisation échoue, retourner les valeurs originales
         df_result = df_ing.copy()
         df_result["new_qty"] = df_result["quantite_g"]
         df_result["new_cout"] = df_result["Coût (€)"]
         return df_result
     
-    # Construction du résultat
-    df_result = df_ing.copy()
-    
-    # Appliquer les nouvelles quantités
+    # Nouvelles quantités, arrondies au multiple de 5 le plus proche (déjà entières
+    # en mode entier) ; pâtes et valeurs indéterminées : quantité originale
+    new_qty = {}
     for ing in all_ing:
-        if ing in opt_ing:
-            new_val = q[ing].value()
-            if new_val is not None:
-                # Arrondir au multiple de 5 le plus proche
-                df_result.loc[df_result["ingredient"] == ing, "new_qty"] = max(q_min, round(new_val/5)*5)
-            else:
-                # Si la valeur est None, garder la quantité originale
-                df_result.loc[df_result["ingredient"] == ing, "new_qty"] = q0[ing]
+        new_val = new_values.get(ing)
+        if ing in new_values and new_val is not None:
+            new_qty[ing] = new_val if integer else max(q_min, round(new_val/5)*5)
         else:
-            df_result.loc[df_result["ingredient"] == ing, "new_qty"] = q0[ing]
+            new_qty[ing] = q0[ing]
+    
+    # Construction du résultat
+    df_result = df_ing.copy()
+    df_result["new_qty"] = df_result["ingredient"].map(new_qty)
     
     # Calculer les nouveaux coûts
     df_result["new_cout"] = df_result["new_qty"] * df_result["prix_kg"] / 1000
@@ -179,23 +489,36 @@ def optimize_grammages_balanced(df_ing, prix_affiche, marge_cible, q_min=5):
     return df_result
 
 
-def optimize_grammages_exact(df_ing, prix_affiche, marge_cible, q_min=5):
+@_RESULT_CACHE.memoize
+def optimize_grammages_exact(df_ing, prix_affiche, marge_cible, q_min=5, integer=False, time_limit=10):
     """
     Optimisation en deux phases pour atteindre exactement la marge cible.
     
     Phase 1: Minimiser les changements avec contrainte de marge minimale
     Phase 2: Ajuster proportionnellement pour atteindre exactement la marge cible
     
+    En mode entier (integer=True), une seule résolution suffit : le modèle en
+    multiples de 5 g vise directement le coût le plus proche de la cible (hausse
+    ou baisse des grammages), sans mise à l'échelle suivie d'un nouvel arrondi.
+    
     Args:
         df_ing (pd.DataFrame): DataFrame des ingrédients avec colonnes 'ingredient', 
                                'quantite_g', 'prix_kg', 'Coût (€)'
         prix_affiche (float): Prix de vente affiché du plat
         marge_cible (float): Marge cible en pourcentage (ex: 70 pour 70%)
         q_min (int): Quantité minimale en grammes pour chaque ingrédient (défaut: 5)
+        integer (bool): Grammages entiers par pas de 5 g dans le modèle (défaut: False)
+        time_limit (float): Temps maximal du mode entier en secondes (défaut: 10)
     
     Returns:
         pd.DataFrame: DataFrame avec colonnes 'new_qty' et 'new_cout' ajoutées
     """
+    if integer:
+        return _optimize_balanced(
+            df_ing, prix_affiche, marge_cible, q_min,
+            integer=True, time_limit=time_limit, exact=True,
+        )
+    
     # Phase 1: Optimisation standard (comme avant)
     df_opt = optimize_grammages_balanced(df_ing, prix_affiche, marge_cible, q_min)
     
@@ -215,6 +538,7 @@ def optimize_grammages_exact(df_ing, prix_affiche, marge_cible, q_min=5):
             facteur = (cout_cible - df_opt.loc[~ajustables, "new_cout"].sum()) / cout_ajustable
             
             # Appliquer l'ajustement sur les quantités et coûts
+            df_opt["new_qty"] = df_opt["new_qty"].astype(float)
             df_opt.loc[ajustables, "new_qty"] *= facteur
             df_opt.loc[ajustables, "new_cout"] *= facteur
             
@@ -225,6 +549,7 @@ def optimize_grammages_exact(df_ing, prix_affiche, marge_cible, q_min=5):
     return df_opt
 
 
+@_RESULT_CACHE.memoize
 def optimize_top2_ingredients(df_ing, prix_affiche, marge_cible, q_min=5):
     """
     Optimise uniquement les 2 ingrédients les plus coûteux pour atteindre la marge cible.
@@ -241,10 +566,12 @@ def optimize_top2_ingredients(df_ing, prix_affiche, marge_cible, q_min=5):
     
     Returns:
         pd.DataFrame: DataFrame avec colonnes 'new_qty' et 'new_cout' ajoutées
+    
+    Note:
+        Comme les autres optimiseurs, travaille sur 'Coût (€)' et 'prix_kg' tels
+        quels : ils doivent être exprimés dans la même base (HT)
     """
-    # Récupération des ingrédients et de leurs coûts
     ingr_courant = df_ing.copy()
-    ingr_courant = calculer_cout(ingr_courant)
     
     # Exclure les pâtes de l'optimisation
     mask_pate = ingr_courant["ingredient"].str.lower().str.contains("pâte")
@@ -298,3 +625,286 @@ def optimize_top2_ingredients(df_ing, prix_affiche, marge_cible, q_min=5):
     df_result.loc[mask_autres, "new_cout"] = df_result.loc[mask_autres, "Coût (€)"]
     
     return df_result
+
+
+# ============================================================================
+# FRONTIÈRE MARGE / GRAMMAGES
+# ============================================================================
+
+MARGIN_SWEEP_COLUMNS = [
+    "marge_cible", "faisable", "reduction_max_pct", "ecart_grammes",
+    "ecart_pct", "cout_matiere", "marge_atteinte",
+]
+
+
+def sweep_margin_targets(df_ing, prix_affiche, marges=None, q_min=5):
+    """
+    Calcule la frontière « variation des grammages / marge atteinte » d'un plat.
+    
+    Toutes les marges cibles sont résolues en une seule passe avec l'approche
+    équilibrée (minimax) de optimize_grammages_balanced : le modèle
+    water-filling est construit une fois, puis résolu pour tous les budgets.
+    Les quantités sont arrondies au multiple de 5 le plus proche, comme dans
+    optimize_grammages_balanced, et la marge atteinte tient compte de l'arrondi ;
+    une cible déjà atteinte ne modifie pas la composition.
+    
+    Les pâtes et les coûts forfaitaires (lignes sans grammage, ex: pain) restent
+    fixes. Les coûts unitaires sont tirés de la colonne 'Coût (€)' (HT) afin que
+    la marge atteinte corresponde à celle affichée pour le plat.
+    
+    Args:
+        df_ing (pd.DataFrame): DataFrame des ingrédients avec colonnes 'ingredient', 
+                               'quantite_g', 'prix_kg', 'Coût (€)'
+        prix_affiche (float): Prix de vente HT du plat
+        marges (array-like): Marges cibles en pourcentage (défaut: 55 à 80 par pas de 1)
+        q_min (int): Quantité minimale en grammes pour chaque ingrédient (défaut: 5)
+    
+    Returns:
+        pd.DataFrame: Une ligne par marge cible (colonnes de MARGIN_SWEEP_COLUMNS) ;
+                      une cible infaisable garde la composition initiale
+    
+    Example:
+        >>> frontiere = sweep_margin_targets(ingr_plat, prix_ht)
+        >>> px.line(frontiere, x="ecart_pct", y="marge_atteinte", markers=True)
+    """
+    marges = np.arange(55, 81, 1.0) if marges is None else np.asarray(marges, dtype=float)
+    if len(marges) == 0 or not prix_affiche or prix_affiche <= 0:
+        return pd.DataFrame(columns=MARGIN_SWEEP_COLUMNS)
+
+    q0 = df_ing["quantite_g"].to_numpy(dtype=float)
+    couts = df_ing["Coût (€)"].to_numpy(dtype=float)
+    noms = df_ing["ingredient"].astype(str).str.lower()
+    fixe = (noms.str.contains("pâte", regex=False).to_numpy()
+            | ((q0 <= 0) & (couts > 0)))
+    variables = ~fixe
+
+    # Coût HT au kg de chaque ligne optimisable
+    prix_kg = df_ing["prix_kg"].to_numpy(dtype=float)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        prix_kg_ht = np.where(q0 > 0, couts / q0 * 1000, prix_kg)
+    q0_var, prix_var = q0[variables], prix_kg_ht[variables]
+    cout_fixe = couts[fixe].sum()
+
+    # Un seul modèle pour toutes les cibles
+    model = _water_filling_model(q0_var, prix_var, q_min)
+    budgets = prix_affiche * (1 - marges / 100) - cout_fixe
+    t = _water_filling_reductions(model, budgets)
+    faisable = ~np.isnan(t)
+
+    q_new = _water_filling_quantities(model, np.where(faisable, t, 0.0))
+    q_new = np.maximum(q_min, np.round(q_new / 5) * 5)
+    # Cible infaisable ou déjà atteinte : composition initiale
+    q_new[~faisable | (t == 0)] = q0_var
+
+    cout = cout_fixe + q_new @ prix_var / 1000
+    ecart = np.abs(q_new - q0_var).sum(axis=1)
+    total_q0 = q0_var.sum()
+
+    return pd.DataFrame({
+        "marge_cible": marges,
+        "faisable": faisable,
+        "reduction_max_pct": np.where(faisable, t, 0.0) * 100,
+        "ecart_grammes": ecart,
+        "ecart_pct": ecart / total_q0 * 100 if total_q0 > 0 else np.zeros(len(marges)),
+        "cout_matiere": cout,
+        "marge_atteinte": (prix_affiche - cout) / prix_affiche * 100,
+    }, columns=MARGIN_SWEEP_COLUMNS)
+
+
+# ============================================================================
+# OPTIMISATION DE TOUTE LA CARTE
+# ============================================================================
+
+OPTIMIZERS = {
+    "balanced": optimize_grammages_balanced,
+    "exact": optimize_grammages_exact,
+    "linprog": optimize_grammages_linprog,
+    "top2": optimize_top2_ingredients,
+}
+
+MENU_OPTIMIZATION_COLUMNS = [
+    "plat", "ingredient", "quantite_g", "prix_kg", "Coût (€)", "new_qty", "new_cout",
+]
+
+MENU_TIMINGS_COLUMNS = [
+    "plat", "methode", "n_ingredients", "cout_initial", "cout_optimise",
+    "marge_initiale", "marge_optimisee", "duree_ms", "statut",
+]
+
+
+def _optimize_dish_task(task):
+    """
+    Optimise un plat (exécuté dans un processus du pool).
+    
+    Chaque processus importe son propre solveur (NumPy/CBC/HiGHS) : aucun
+    état n'est partagé entre les plats.
+    
+    Args:
+        task (tuple): (plat, df_ing, prix_optimisable, methode, marge_cible, q_min)
+    
+    Returns:
+        tuple: (plat, DataFrame résultat ou None, durée en ms, statut)
+    """
+    plat, df_ing, prix, methode, marge_cible, q_min = task
+    debut = time.perf_counter()
+    try:
+        df_opt = OPTIMIZERS[methode](df_ing.copy(), prix, marge_cible, q_min)
+        statut = "ok"
+    except Exception as e:
+        df_opt = None
+        statut = f"erreur: {e}"
+    duree_ms = (time.perf_counter() - debut) * 1000
+    return plat, df_opt, duree_ms, statut
+
+
+def _result_status(df_opt, prix_ht, cout_fixe, marge_cible):
+    """
+    Contrôle d'un résultat : cohérence des coûts et marge cible atteinte.
+
+    La marge est tolérée sous la cible de l'effet de l'arrondi au pas de 5 g
+    (au plus 2,5 g par ingrédient modifié).
+
+    Returns:
+        str: "ok", "coûts incohérents" (quantité inchangée mais coût modifié :
+             prix_kg et 'Coût (€)' pas dans la même base) ou "cible non atteinte"
+    """
+    inchangees = np.isclose(df_opt["new_qty"], df_opt["quantite_g"])
+    if (inchangees & ~np.isclose(df_opt["new_cout"], df_opt["Coût (€)"])).any():
+        return "coûts incohérents"
+
+    cout = df_opt["new_cout"].sum() + cout_fixe
+    marge = (prix_ht - cout) / prix_ht * 100
+    arrondi = (2.5 * df_opt.loc[~inchangees, "prix_kg"] / 1000).sum() / prix_ht * 100
+    if marge < marge_cible - arrondi - 1e-9:
+        return "cible non atteinte"
+    return "ok"
+
+
+def _run_tasks(tasks, max_workers):
+    """Exécute les tâches dans un pool de processus, en séquentiel si impossible."""
+    if max_workers is None:
+        max_workers = min(len(tasks), os.cpu_count() or 1)
+    if max_workers <= 1 or len(tasks) < 2:
+        return [_optimize_dish_task(t) for t in tasks]
+
+    # "spawn" : pas de fork d'un processus Streamlit multi-threadé
+    contexte = multiprocessing.get_context("spawn")
+    chunksize = max(1, len(tasks) // (max_workers * 4))
+    try:
+        with ProcessPoolExecutor(max_workers=max_workers, mp_context=contexte) as pool:
+            return list(pool.map(_optimize_dish_task, tasks, chunksize=chunksize))
+    except (OSError, BrokenProcessPool) as e:
+        print(f"[WARN] Pool d'optimisation indisponible ({e}), exécution séquentielle")
+        return [_optimize_dish_task(t) for t in tasks]
+
+
+def optimize_menu_grammages(
+    recettes,
+    ingredients_df,
+    marge_cible=70,
+    methode="balanced",
+    q_min=5,
+    prix_vente=None,
+    plats=None,
+    max_workers=None,
+):
+    """
+    Optimise les grammages de toute la carte pour une même marge cible.
+    
+    Les plats sont répartis sur un pool de processus, chacun résolvant ses
+    plats avec son propre solveur. Les coûts fixes (pâte, pain des salades)
+    ne sont pas optimisés : ils sont déduits du budget de chaque plat.
+    
+    Chaque processus paie l'import de pandas/SciPy/PuLP au démarrage : pour
+    la méthode "balanced" (résolution directe), max_workers=1 est souvent
+    le plus rapide.
+    
+    Args:
+        recettes (pd.DataFrame): DataFrame des recettes (colonnes plat, categorie)
+        ingredients_df (pd.DataFrame): DataFrame des ingrédients
+        marge_cible (float): Marge cible HT en pourcentage (ex: 70 pour 70%)
+        methode (str): "balanced", "exact", "linprog" ou "top2"
+        q_min (int): Quantité minimale en grammes pour chaque ingrédient (défaut: 5)
+        prix_vente (dict): Prix TTC par plat (défaut: PRIX_VENTE_DICT)
+        plats (list): Plats à optimiser (défaut: toute la carte)
+        max_workers (int): Nombre de processus (1 = séquentiel, défaut: nombre de CPU)
+    
+    Returns:
+        tuple: (DataFrame détaillé par plat et ingrédient avec 'new_qty' et 'new_cout',
+                DataFrame par plat avec coûts, marges, durée de résolution et
+                statut : "ok", "cible non atteinte", "coûts incohérents" ou
+                "erreur: ..." (voir _result_status)).
+               Dans le détail, 'prix_kg' est le prix HT au kg.
+    
+    Raises:
+        ValueError: Si la méthode est inconnue
+    
+    Example:
+        >>> details, resume = optimize_menu_grammages(recettes, ingredients, 70)
+        >>> resume.sort_values("duree_ms", ascending=False).head()
+    """
+    if methode not in OPTIMIZERS:
+        raise ValueError(f"Méthode inconnue : {methode} (attendu : {', '.join(OPTIMIZERS)})")
+
+    lignes = compute_ingredient_costs(ingredients_df)
+    menu = compute_menu_costs(recettes, ingredients_df, prix_vente, lignes=lignes)
+    if plats is not None:
+        menu = menu[menu["nom"].isin(plats)]
+    menu = menu[menu["prix_ht"] > 0]
+
+    groupes = lignes.groupby("plat_key", sort=False)
+    tasks = []
+    for row in menu.itertuples(index=False):
+        cle = normalize_label(row.nom)
+        if cle not in groupes.groups:
+            continue
+        # Les solveurs recalculent new_cout = new_qty × prix_kg / 1000 : prix_kg
+        # doit être HT, comme "Coût (€)" et le budget (voir sweep_margin_targets)
+        df_ing = groupes.get_group(cle)[["ingredient", "quantite_g", "prix_kg_ht", "Coût (€)"]]
+        df_ing = (
+            df_ing.rename(columns={"prix_kg_ht": "prix_kg"})
+            .reset_index(drop=True)
+            .astype({"quantite_g": float, "prix_kg": float})
+        )
+        # Coûts fixes déduits du budget : prix' tel que prix'·(1-m) = prix·(1-m) - fixe
+        cout_fixe = row.cout_pate + row.cout_pain
+        facteur = 1 - marge_cible / 100
+        prix = row.prix_ht - cout_fixe / facteur if facteur > 0 else row.prix_ht
+        tasks.append((row.nom, df_ing, prix, methode, marge_cible, q_min))
+
+    resultats = _run_tasks(tasks, max_workers)
+
+    details = []
+    resume = []
+    menu_par_nom = menu.set_index("nom")
+    for plat, df_opt, duree_ms, statut in resultats:
+        info = menu_par_nom.loc[plat]
+        cout_fixe = info["cout_pate"] + info["cout_pain"]
+        if df_opt is not None:
+            df_opt = df_opt[[c for c in MENU_OPTIMIZATION_COLUMNS if c != "plat"]].copy()
+            df_opt.insert(0, "plat", plat)
+            details.append(df_opt)
+            cout_optimise = df_opt["new_cout"].sum() + cout_fixe
+            if statut == "ok":
+                statut = _result_status(df_opt, info["prix_ht"], cout_fixe, marge_cible)
+        else:
+            cout_optimise = info["cout_matiere"]
+        prix_ht = info["prix_ht"]
+        resume.append({
+            "plat": plat,
+            "methode": methode,
+            "n_ingredients": len(df_opt) if df_opt is not None else 0,
+            "cout_initial": info["cout_matiere"],
+            "cout_optimise": cout_optimise,
+            "marge_initiale": info["marge_pct"],
+            "marge_optimisee": (prix_ht - cout_optimise) / prix_ht * 100,
+            "duree_ms": duree_ms,
+            "statut": statut,
+        })
+
+    details = (
+        pd.concat(details, ignore_index=True)
+        if details else pd.DataFrame(columns=MENU_OPTIMIZATION_COLUMNS)
+    )
+    resume = pd.DataFrame(resume, columns=MENU_TIMINGS_COLUMNS)
+    return details, resume
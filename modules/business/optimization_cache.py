@@ -0,0 +1,97 @@
+"""
+Cache des résultats d'optimisation des grammages
+
+Un clic sur "Optimiser" avec la même composition et la même marge cible
+relance le solveur. Les résultats sont donc mémorisés (LRU borné + TTL),
+indexés par une empreinte stable de la recette et des paramètres.
+
+Éviction et empreinte sont celles de modules.utils.memo_cache (MemoCache,
+structural_key) ; ce module n'ajoute que la copie des DataFrames.
+"""
+
+import inspect
+from functools import wraps
+from typing import Callable, Optional
+
+import pandas as pd
+
+from modules.utils.memo_cache import MemoCache, structural_key
+
+
+_MISSING = object()
+
+
+def recipe_fingerprint(df_ing: pd.DataFrame, *params) -> str:
+    """
+    Calcule l'empreinte d'une composition et des paramètres d'optimisation.
+
+    L'empreinte couvre les colonnes, l'index et toutes les valeurs du
+    DataFrame (ingrédients, quantités, prix...), ainsi que les paramètres
+    (prix de vente, marge cible, q_min...).
+
+    Args:
+        df_ing: DataFrame des ingrédients du plat
+        *params: Paramètres scalaires de l'optimisation
+
+    Returns:
+        Empreinte hexadécimale (BLAKE2b, 128 bits, voir structural_key)
+    """
+    return structural_key(df_ing, *params)
+
+
+class OptimizerResultCache(MemoCache):
+    """
+    Cache LRU borné avec expiration (TTL) des résultats d'optimisation.
+
+    MemoCache dont les résultats (DataFrames) sont copiés à l'écriture et à
+    la lecture : l'appelant peut modifier le résultat sans altérer le cache.
+
+    Example:
+        >>> cache = OptimizerResultCache(max_entries=128, ttl=600)
+        >>> @cache.memoize
+        ... def optimize(df_ing, prix_affiche, marge_cible, q_min=5): ...
+        >>> cache.stats()["hits"]
+    """
+
+    def __init__(self, max_entries: int = 256, ttl: Optional[float] = 600,
+                 max_bytes: Optional[int] = None):
+        super().__init__(max_entries=max_entries, ttl=ttl, max_bytes=max_bytes)
+
+    def get(self, key: str, default=None) -> Optional[pd.DataFrame]:
+        """Retourne une copie du résultat mémorisé, ou default (absent ou expiré)."""
+        result = super().get(key, _MISSING)
+        return default if result is _MISSING else result.copy()
+
+    def put(self, key: str, result: pd.DataFrame) -> bool:
+        """Mémorise une copie du résultat, en évinçant les entrées les plus anciennes si besoin."""
+        return super().put(key, result.copy())
+
+    def memoize(self, func: Callable) -> Callable:
+        """
+        Décore une fonction optimize_*(df_ing, prix_affiche, marge_cible, ...).
+
+        Le DataFrame n'est jamais partagé : l'appelant reçoit toujours une copie,
+        et la fonction d'origine travaille sur une copie de l'entrée.
+        """
+        signature = inspect.signature(func)
+
+        @wraps(func)
+        def wrapper(df_ing, *args, **kwargs):
+            bound = signature.bind(df_ing, *args, **kwargs)
+            bound.apply_defaults()
+            params = tuple(
+                (name, value) for name, value in bound.arguments.items()
+                if name != "df_ing"
+            )
+            key = recipe_fingerprint(df_ing, func.__qualname__, params)
+
+            result = self.get(key)
+            if result is not None:
+                return result
+
+            result = func(df_ing.copy(), *args, **kwargs)
+            self.put(key, result)
+            return result
+
+        wrapper.cache = self
+        return wrapper
@@ -1,26 +1,41 @@
 """
 Gestionnaire de pertes et ajustements non enregistrés dans Kezia
 """
-import sqlite3
 import pandas as pd
 from datetime import datetime
 from pathlib import Path
 
+from modules.data.db_migrations import migrate
+from modules.data.db_pool import get_pool
+
 
 class PerteManager:
     """Gère les pertes, remboursements et ajustements non enregistrés dans Kezia"""
     
+    _INSERT_PERTE = """
+        INSERT INTO pertes (date, heure, type, montant, produit, client, raison, 
+                           commentaire, mode_paiement, responsable, statut)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, 'confirmee')
+    """
+    
     def __init__(self, db_path="data/pertes.db"):
         self.db_path = db_path
+        Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
+        # Connexion réutilisée par thread, partagée entre les instances
+        self._pool = get_pool(self.db_path)
         self.init_db()
     
     def init_db(self):
         """Initialise la base de données des pertes"""
-        Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
-        
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        with self._pool.transaction() as conn:
+            self._create_tables(conn.cursor())
         
+        # Index et version de schéma
+        migrate(self._pool.connection(), "pertes")
+    
+    @staticmethod
+    def _create_tables(cursor):
+        """Crée les tables si elles n'existent pas"""
         # Table des pertes/ajustements
         cursor.execute("""
             CREATE TABLE IF NOT EXISTS pertes (
@@ -57,9 +72,6 @@ class PerteManager:
                 valide_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
             )
         """)
-        
-        conn.commit()
-        conn.close()
     
     def ajouter_perte(self, montant, type_perte, raison, produit=None, client=None, 
                       commentaire=None, mode_paiement=None, responsable=None, date=None, heure=None):
@@ -81,60 +93,126 @@ class PerteManager:
         Returns:
             int: ID de la perte créée
         """
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
         if date is None:
             date = datetime.now().strftime("%Y-%m-%d")
         if heure is None:
             heure = datetime.now().strftime("%H:%M:%S")
         
-        cursor.execute("""
-            INSERT INTO pertes (date, heure, type, montant, produit, client, raison, 
-                               commentaire, mode_paiement, responsable, statut)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, 'confirmee')
-        """, (date, heure, type_perte, abs(montant), produit, client, raison, 
-              commentaire, mode_paiement, responsable))
-        
-        perte_id = cursor.lastrowid
-        conn.commit()
-        conn.close()
+        with self._pool.transaction() as conn:
+            cursor = conn.execute(self._INSERT_PERTE, (
+                date, heure, type_perte, abs(montant), produit, client, raison,
+                commentaire, mode_paiement, responsable
+            ))
+            perte_id = cursor.lastrowid
         
         print(f"✅ Perte enregistrée (ID: {perte_id}) - {montant:.2f}€ - {raison}")
         
         return perte_id
     
+    def ajouter_pertes(self, pertes):
+        """
+        Enregistre plusieurs pertes en une seule transaction (import d'une journée)
+        
+        Args:
+            pertes: Itérable de dicts avec les arguments de ajouter_perte
+                    (montant, type_perte, raison obligatoires ; date/heure auto si absentes)
+        
+        Returns:
+            int: Nombre de pertes enregistrées (aucune si une ligne est invalide)
+        
+        Example:
+            >>> manager.ajouter_pertes([
+            ...     {"montant": 4.5, "type_perte": "casse", "raison": "Pizza tombée"},
+            ...     {"montant": 12, "type_perte": "remboursement", "raison": "Retard", "heure": "20:15:00"},
+            ... ])
+        """
+        maintenant = datetime.now()
+        date_defaut = maintenant.strftime("%Y-%m-%d")
+        heure_defaut = maintenant.strftime("%H:%M:%S")
+        
+        lignes = [
+            (
+                p.get("date") or date_defaut,
+                p.get("heure") or heure_defaut,
+                p["type_perte"],
+                abs(p["montant"]),
+                p.get("produit"),
+                p.get("client"),
+                p["raison"],
+                p.get("commentaire"),
+                p.get("mode_paiement"),
+                p.get("responsable"),
+            )
+            for p in pertes
+        ]
+        if not lignes:
+            return 0
+        
+        with self._pool.transaction() as conn:
+            conn.executemany(self._INSERT_PERTE, lignes)
+        
+        total = sum(ligne[3] for ligne in lignes)
+        print(f"✅ {len(lignes)} pertes enregistrées - {total:.2f}€")
+        
+        return len(lignes)
+    
     def get_pertes_jour(self, date=None):
         """Récupère toutes les pertes d'une journée"""
         if date is None:
             date = datetime.now().strftime("%Y-%m-%d")
         
-        conn = sqlite3.connect(self.db_path)
-        df = pd.read_sql_query(
+        return pd.read_sql_query(
             "SELECT * FROM pertes WHERE date = ? ORDER BY heure DESC",
-            conn,
+            self._pool.connection(),
             params=(date,)
         )
-        conn.close()
-        
-        return df
     
     def get_pertes_periode(self, date_debut, date_fin):
         """Récupère les pertes sur une période"""
-        conn = sqlite3.connect(self.db_path)
-        df = pd.read_sql_query(
+        return pd.read_sql_query(
             "SELECT * FROM pertes WHERE date BETWEEN ? AND ? ORDER BY date DESC, heure DESC",
-            conn,
+            self._pool.connection(),
             params=(date_debut, date_fin)
         )
-        conn.close()
-        
-        return df
     
     def total_pertes_jour(self, date=None):
-        """Calcule le total des pertes du jour"""
-        df = self.get_pertes_jour(date)
-        return df['montant'].sum() if not df.empty else 0.0
+        """Calcule le total des pertes du jour (résumé journalier)"""
+        if date is None:
+            date = datetime.now().strftime("%Y-%m-%d")
+        
+        return self._pool.connection().execute(
+            "SELECT TOTAL(total) FROM pertes_resume_jour WHERE date = ?", (date,)
+        ).fetchone()[0]
+    
+    def agregats_periode(self, date_debut, date_fin):
+        """
+        Agrégats des pertes sur une période, calculés par SQLite
+        
+        Une seule requête sur le résumé journalier (pertes_resume_jour), à la
+        manière de GROUPING SETS : une ligne par date, par type et par raison.
+        
+        Returns:
+            dict {'date': {...}, 'type': {...}, 'raison': {...}} où chaque
+            valeur est un dict {clé: (total €, nombre d'incidents)}
+        """
+        rows = self._pool.connection().execute("""
+            WITH periode AS (
+                SELECT date, type, raison, total, nb
+                FROM pertes_resume_jour
+                WHERE date BETWEEN ? AND ?
+            )
+            SELECT 'date', date, SUM(total), SUM(nb) FROM periode GROUP BY date
+            UNION ALL
+            SELECT 'type', type, SUM(total), SUM(nb) FROM periode GROUP BY type
+            UNION ALL
+            SELECT 'raison', raison, SUM(total), SUM(nb) FROM periode GROUP BY raison
+            ORDER BY 1, 2
+        """, (date_debut, date_fin)).fetchall()
+        
+        agregats = {'date': {}, 'type': {}, 'raison': {}}
+        for niveau, cle, total, nb in rows:
+            agregats[niveau][cle] = (total, nb)
+        return agregats
     
     def valider_journee(self, date, ca_kezia, ca_reel_compte, nb_tickets_kezia=None, 
                        nb_tickets_reel=None, commentaire=None, valide_par=None):
@@ -153,28 +231,24 @@ class PerteManager:
         Returns:
             dict avec analyse complète
         """
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        # Récupérer les pertes déclarées
-        pertes_df = self.get_pertes_jour(date)
-        pertes_declarees = pertes_df['montant'].sum() if not pertes_df.empty else 0.0
-        
-        # Calculer les écarts
-        ecart_total = ca_reel_compte - ca_kezia
-        ecart_inexplique = ecart_total + pertes_declarees  # Si pertes déclarées, elles expliquent une partie de l'écart
-        
-        # Enregistrer la validation
-        cursor.execute("""
-            INSERT OR REPLACE INTO validation_journee 
-            (date, ca_kezia, ca_reel_compte, ecart_total, pertes_declarees, 
-             ecart_inexplique, nb_tickets_kezia, nb_tickets_reel, commentaire, valide_par)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """, (date, ca_kezia, ca_reel_compte, ecart_total, pertes_declarees,
-              ecart_inexplique, nb_tickets_kezia, nb_tickets_reel, commentaire, valide_par))
-        
-        conn.commit()
-        conn.close()
+        with self._pool.transaction() as conn:
+            # Récupérer les pertes déclarées (même connexion, même transaction)
+            pertes_declarees = conn.execute(
+                "SELECT TOTAL(montant) FROM pertes WHERE date = ?", (date,)
+            ).fetchone()[0]
+            
+            # Calculer les écarts
+            ecart_total = ca_reel_compte - ca_kezia
+            ecart_inexplique = ecart_total + pertes_declarees  # Si pertes déclarées, elles expliquent une partie de l'écart
+            
+            # Enregistrer la validation
+            conn.execute("""
+                INSERT OR REPLACE INTO validation_journee 
+                (date, ca_kezia, ca_reel_compte, ecart_total, pertes_declarees, 
+                 ecart_inexplique, nb_tickets_kezia, nb_tickets_reel, commentaire, valide_par)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, (date, ca_kezia, ca_reel_compte, ecart_total, pertes_declarees,
+                  ecart_inexplique, nb_tickets_kezia, nb_tickets_reel, commentaire, valide_par))
         
         result = {
             'date': date,
@@ -205,27 +279,26 @@ class PerteManager:
         if date is None:
             date = datetime.now().strftime("%Y-%m-%d")
         
-        df = self.get_pertes_jour(date)
+        par_type = self.agregats_periode(date, date)['type']
         
         print("=" * 70)
         print(f"📊 RAPPORT DES PERTES - {date}")
         print("=" * 70)
         
-        if df.empty:
+        if not par_type:
             print("\n✅ Aucune perte enregistrée")
         else:
-            print(f"\n💸 Total pertes: {df['montant'].sum():.2f}€")
-            print(f"📝 Nombre d'incidents: {len(df)}")
+            print(f"\n💸 Total pertes: {sum(total for total, _ in par_type.values()):.2f}€")
+            print(f"📝 Nombre d'incidents: {sum(nb for _, nb in par_type.values())}")
             
             # Par type
             print("\n📋 Par type:")
-            par_type = df.groupby('type')['montant'].agg(['sum', 'count'])
-            for type_perte, row in par_type.iterrows():
-                print(f"   {type_perte}: {row['sum']:.2f}€ ({int(row['count'])} incidents)")
+            for type_perte, (total, nb) in par_type.items():
+                print(f"   {type_perte}: {total:.2f}€ ({nb} incidents)")
             
             # Détail
             print("\n📄 Détail des pertes:")
-            for _, row in df.iterrows():
+            for _, row in self.get_pertes_jour(date).iterrows():
                 print(f"\n   [{row['heure']}] {row['type'].upper()} - {row['montant']:.2f}€")
                 print(f"   Raison: {row['raison']}")
                 if row['produit']:
@@ -242,22 +315,26 @@ class PerteManager:
         date_fin = datetime.now().strftime("%Y-%m-%d")
         date_debut = (datetime.now() - timedelta(days=jours)).strftime("%Y-%m-%d")
         
-        df = self.get_pertes_periode(date_debut, date_fin)
+        agregats = self.agregats_periode(date_debut, date_fin)
+        par_date = agregats['date']
         
-        if df.empty:
+        if not par_date:
             return {
                 'message': f"Aucune perte sur les {jours} derniers jours"
             }
         
+        total_pertes = sum(total for total, _ in par_date.values())
+        top_raisons = sorted(agregats['raison'].items(), key=lambda item: item[1][0], reverse=True)[:5]
+        
         stats = {
             'periode': f"{date_debut} → {date_fin}",
             'nb_jours': jours,
-            'total_pertes': df['montant'].sum(),
-            'moyenne_jour': df.groupby('date')['montant'].sum().mean(),
-            'nb_incidents': len(df),
-            'par_type': df.groupby('type')['montant'].sum().to_dict(),
-            'jours_avec_pertes': df['date'].nunique(),
-            'top_raisons': df.groupby('raison')['montant'].sum().sort_values(ascending=False).head(5).to_dict()
+            'total_pertes': total_pertes,
+            'moyenne_jour': total_pertes / len(par_date),
+            'nb_incidents': sum(nb for _, nb in par_date.values()),
+            'par_type': {type_perte: total for type_perte, (total, _) in agregats['type'].items()},
+            'jours_avec_pertes': len(par_date),
+            'top_raisons': {raison: total for raison, (total, _) in top_raisons}
         }
         
         return stats
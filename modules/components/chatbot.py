@@ -10,6 +10,8 @@ import streamlit.components.v1 as components
 from chatbot.chatbot_router import HybridRouter
 from modules.data import sales_data
 from modules.business.cost_calculator import calculer_cout
+from modules.utils.data_manager import load_ingredient_index
+from modules.utils.ingredient_index import IngredientIndex
 
 
 def _pick_focus_plat(df_plats: pd.DataFrame, objectif_marge: float):
@@ -37,7 +39,12 @@ def _calculate_price_target(plat_row, objectif_marge: float):
     return PriceTarget(prix_ttc_cible, delta_ttc)
 
 
-def _calculate_negotiation_gap(plat_row, objectif_marge: float, ingredients_df):
+def _calculate_negotiation_gap(
+    plat_row,
+    objectif_marge: float,
+    ingredients_df,
+    ingredient_index: Optional[IngredientIndex] = None,
+):
     """Calcule l'écart à combler par négociation sur l'ingrédient principal."""
     marge_actuelle = plat_row["marge_pct"]
     ecart_marge = objectif_marge - marge_actuelle
@@ -60,7 +67,9 @@ def _calculate_negotiation_gap(plat_row, objectif_marge: float, ingredients_df):
         # Le plat peut être dans 'nom' (df_plats) mais ingredients_df utilise 'plat'
         plat_nom = plat_row.get("nom", plat_row.get("plat", ""))
         print(f"[DEBUG _calculate_negotiation_gap] Recherche pour plat: '{plat_nom}'")
-        ing_plat = ingredients_df[ingredients_df["plat"].str.lower() == str(plat_nom).lower()]
+        if ingredient_index is None:
+            ingredient_index = load_ingredient_index(ingredients_df)
+        ing_plat = ingredient_index.select(ingredients_df, str(plat_nom))
         print(f"[DEBUG] Ingrédients trouvés: {len(ing_plat)}")
         if not ing_plat.empty and "Coût (€)" in ing_plat.columns:
             focus_ingredient = ing_plat.nlargest(1, "Coût (€)").iloc[0]["ingredient"]
@@ -100,9 +109,14 @@ def _build_guided_data(
     # IMPORTANT: Calculer les coûts pour TOUS les ingrédients au début
     # Car _calculate_negotiation_gap a besoin de la colonne "Coût (€)"
     if isinstance(ingredients_df, pd.DataFrame) and not ingredients_df.empty:
+        # Index plat → lignes de la table chargée (mis en cache), valable pour
+        # la copie enrichie par calculer_cout (mêmes lignes, même ordre)
+        ingredient_index = load_ingredient_index(ingredients_df)
         print(f"[DEBUG] Calcul des coûts pour tous les ingrédients...")
         ingredients_df = calculer_cout(ingredients_df.copy())
         print(f"[DEBUG] Colonnes après calculer_cout: {list(ingredients_df.columns)}")
+    else:
+        ingredient_index = None
     
     # Charger les données de ventes depuis SQLite (30 derniers jours)
     try:
@@ -127,7 +141,7 @@ def _build_guided_data(
         
         # Calculs métier
         price_target = _calculate_price_target(plat_row, objectif_marge)
-        nego = _calculate_negotiation_gap(plat_row, objectif_marge, ingredients_df)
+        nego = _calculate_negotiation_gap(plat_row, objectif_marge, ingredients_df, ingredient_index)
         
         # Calculer les détails de l'ingrédient focus
         focus_cost = 0.0
@@ -137,7 +151,7 @@ def _build_guided_data(
         if nego.focus_ingredient and isinstance(ingredients_df, pd.DataFrame) and not ingredients_df.empty:
             try:
                 # Filtrer les ingrédients pour ce plat (les coûts sont déjà calculés)
-                ing_plat = ingredients_df[ingredients_df["plat"].str.lower() == plat_nom.lower()].copy()
+                ing_plat = ingredient_index.select(ingredients_df, plat_nom).copy()
                 print(f"[DEBUG] Ingrédients filtrés pour '{plat_nom}': {len(ing_plat)} lignes")
                 
                 if not ing_plat.empty:
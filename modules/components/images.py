@@ -2,8 +2,11 @@
 Composant pour l'affichage des images de plats.
 """
 
+import html
+
 import streamlit as st
 from modules.utils import get_plat_image_path
+from modules.utils.image_thumbnails import get_thumbnail_url, static_serving_enabled, thumbnail_path
 
 
 def afficher_image_plat(plat: str, images_dict: dict):
@@ -15,5 +18,17 @@ def afficher_image_plat(plat: str, images_dict: dict):
         images_dict: Dictionnaire des images (non utilisé, conservé pour compatibilité)
     """
     image_path = get_plat_image_path(plat)
+    if static_serving_enabled():
+        # Référencée par URL : mise en cache par le navigateur entre les reruns
+        image_url = get_thumbnail_url(image_path, "hero")
+        if image_url:
+            st.markdown(
+                f'<img src="{image_url}" alt="{html.escape(plat)}" '
+                'style="width: 100%; height: auto; display: block;" />',
+                unsafe_allow_html=True,
+            )
+        return
+
+    image_path = thumbnail_path(image_path, "hero")
     if image_path:
         st.image(image_path, use_container_width=True)
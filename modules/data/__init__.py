@@ -6,6 +6,8 @@ from .constants import (
     PRIX_VENTE_DICT,
     IMAGES_PLATS,
     COUT_PATE,
+    SALADES_AVEC_PAIN,
+    COUT_PAIN_SALADE,
     CATEGORIES,
     TAILLES,
     IMAGE_FALLBACK,
@@ -17,6 +19,8 @@ __all__ = [
     'PRIX_VENTE_DICT',
     'IMAGES_PLATS',
     'COUT_PATE',
+    'SALADES_AVEC_PAIN',
+    'COUT_PAIN_SALADE',
     'CATEGORIES',
     'TAILLES',
     'IMAGE_FALLBACK',
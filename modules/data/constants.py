@@ -228,6 +228,17 @@ COUT_PATE = {
 }
 
 
+# Salades servies avec un pain aux herbes (supplément fixe en euros)
+SALADES_AVEC_PAIN = (
+    "salade burrata di parma",
+    "salade burrata di salmone",
+    "salade césar",
+    "salade chèvre",
+    "salade végétarienne",
+)
+COUT_PAIN_SALADE = 0.21
+
+
 # ============================================================================
 # CATÉGORIES DE PLATS
 # ============================================================================
@@ -0,0 +1,253 @@
+"""
+🗄️ DB MIGRATIONS - Index, réglages SQLite et version de schéma des bases du projet
+✅ Journal WAL + synchronous=NORMAL (lectures sans blocage pendant les écritures)
+✅ Migrations numérotées par schéma, appliquées une seule fois
+✅ Version de schéma enregistrée dans la table schema_version
+
+Schémas gérés :
+- pertes : data/pertes.db (PerteManager)
+- ventes : data/kezia_sales.db (table ventes alimentée par la synchronisation Kezia)
+"""
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+
+# Réglages appliqués à chaque connexion (journal_mode=WAL est persistant dans le fichier)
+PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+)
+
+# schéma -> (table requise, [(version, description, sql), ...])
+# Une migration n'est jamais modifiée une fois publiée : en ajouter une nouvelle.
+MIGRATIONS: Dict[str, Tuple[str, List[Tuple[int, str, str]]]] = {
+    "pertes": ("pertes", [
+        (1, "index pertes (date, heure)", """
+            CREATE INDEX IF NOT EXISTS idx_pertes_date_heure ON pertes (date, heure);
+        """),
+        (2, "résumé journalier des pertes (pertes_resume_jour) tenu par triggers", """
+            CREATE TABLE IF NOT EXISTS pertes_resume_jour (
+                date TEXT NOT NULL,
+                type TEXT NOT NULL,
+                raison TEXT NOT NULL,
+                total REAL NOT NULL,
+                nb INTEGER NOT NULL,
+                PRIMARY KEY (date, type, raison)
+            ) WITHOUT ROWID;
+
+            INSERT OR REPLACE INTO pertes_resume_jour (date, type, raison, total, nb)
+            SELECT date, type, raison, TOTAL(montant), COUNT(*)
+            FROM pertes
+            GROUP BY date, type, raison;
+
+            CREATE TRIGGER IF NOT EXISTS trg_pertes_resume_insert
+            AFTER INSERT ON pertes
+            BEGIN
+                INSERT INTO pertes_resume_jour (date, type, raison, total, nb)
+                VALUES (NEW.date, NEW.type, NEW.raison, NEW.montant, 1)
+                ON CONFLICT (date, type, raison)
+                DO UPDATE SET total = total + excluded.total, nb = nb + 1;
+            END;
+
+            -- Suppression / modification : le groupe concerné est recalculé
+            CREATE TRIGGER IF NOT EXISTS trg_pertes_resume_delete
+            AFTER DELETE ON pertes
+            BEGIN
+                UPDATE pertes_resume_jour
+                SET total = (SELECT TOTAL(montant) FROM pertes
+                             WHERE date = OLD.date AND type = OLD.type AND raison = OLD.raison),
+                    nb = nb - 1
+                WHERE date = OLD.date AND type = OLD.type AND raison = OLD.raison;
+                DELETE FROM pertes_resume_jour WHERE nb <= 0 AND date = OLD.date;
+            END;
+
+            CREATE TRIGGER IF NOT EXISTS trg_pertes_resume_update
+            AFTER UPDATE OF date, type, raison, montant ON pertes
+            BEGIN
+                UPDATE pertes_resume_jour
+                SET total = (SELECT TOTAL(montant) FROM pertes
+                             WHERE date = OLD.date AND type = OLD.type AND raison = OLD.raison),
+                    nb = nb - 1
+                WHERE date = OLD.date AND type = OLD.type AND raison = OLD.raison;
+                DELETE FROM pertes_resume_jour WHERE nb <= 0 AND date = OLD.date;
+                INSERT INTO pertes_resume_jour (date, type, raison, total, nb)
+                VALUES (NEW.date, NEW.type, NEW.raison, NEW.montant, 1)
+                ON CONFLICT (date, type, raison)
+                DO UPDATE SET total = (SELECT TOTAL(montant) FROM pertes
+                                       WHERE date = NEW.date AND type = NEW.type AND raison = NEW.raison),
+                              nb = nb + 1;
+            END;
+        """),
+    ]),
+    "ventes": ("ventes", [
+        (1, "index ventes (produit, date) et (date)", """
+            CREATE INDEX IF NOT EXISTS idx_ventes_produit_date ON ventes (produit, date);
+            CREATE INDEX IF NOT EXISTS idx_ventes_date ON ventes (date);
+        """),
+        (2, "tables d'agrégats journaliers (voir sales_rollups)", """
+            CREATE TABLE IF NOT EXISTS ventes_jour (
+                jour TEXT PRIMARY KEY,
+                quantite REAL NOT NULL,
+                ca_ttc REAL NOT NULL,
+                nb_lignes INTEGER NOT NULL
+            );
+
+            CREATE TABLE IF NOT EXISTS ventes_produit_jour (
+                jour TEXT NOT NULL,
+                produit TEXT NOT NULL,
+                quantite REAL NOT NULL,
+                ca_ttc REAL NOT NULL,
+                nb_lignes INTEGER NOT NULL,
+                somme_prix_moyen REAL NOT NULL,
+                PRIMARY KEY (jour, produit)
+            ) WITHOUT ROWID;
+
+            CREATE INDEX IF NOT EXISTS idx_ventes_produit_jour_produit
+                ON ventes_produit_jour (produit, jour);
+
+            CREATE TABLE IF NOT EXISTS rollup_state (
+                nom TEXT PRIMARY KEY,
+                valeur INTEGER NOT NULL
+            );
+        """),
+        (3, "index des noms de produits (voir product_name_index)", """
+            CREATE TABLE IF NOT EXISTS produits_kezia (
+                produit TEXT PRIMARY KEY,
+                nom_normalise TEXT NOT NULL
+            );
+
+            CREATE TABLE IF NOT EXISTS produits_trigrammes (
+                trigramme TEXT NOT NULL,
+                produit TEXT NOT NULL,
+                PRIMARY KEY (trigramme, produit)
+            ) WITHOUT ROWID;
+
+            CREATE TABLE IF NOT EXISTS correspondances_produits (
+                recherche TEXT PRIMARY KEY,
+                produit TEXT,
+                score REAL NOT NULL
+            );
+        """),
+    ]),
+}
+
+_SCHEMA_VERSION_TABLE = """
+    CREATE TABLE IF NOT EXISTS schema_version (
+        schema TEXT PRIMARY KEY,
+        version INTEGER NOT NULL,
+        description TEXT,
+        applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+"""
+
+# (chemin résolu, schéma) déjà migrés dans ce processus
+_migrated = set()
+_lock = threading.Lock()
+
+
+def apply_pragmas(conn: sqlite3.Connection) -> None:
+    """Applique les réglages de performance à une connexion."""
+    for pragma in PRAGMAS:
+        conn.execute(pragma)
+
+
+def schema_version(conn: sqlite3.Connection, schema: str) -> int:
+    """Version appliquée d'un schéma (0 si aucune migration)."""
+    try:
+        row = conn.execute(
+            "SELECT version FROM schema_version WHERE schema = ?", (schema,)
+        ).fetchone()
+    except sqlite3.OperationalError:
+        return 0
+    return row[0] if row else 0
+
+
+def migrate(conn: sqlite3.Connection, schema: str) -> int:
+    """
+    Applique les migrations en attente d'un schéma.
+
+    Rien n'est fait si la table principale du schéma n'existe pas encore
+    (ex: base Kezia pas encore synchronisée) : la migration sera retentée
+    à la prochaine connexion.
+
+    Args:
+        conn: Connexion à la base
+        schema: Nom du schéma (clé de MIGRATIONS)
+
+    Returns:
+        Version du schéma après migration
+
+    Raises:
+        KeyError: Si le schéma est inconnu
+    """
+    table, steps = MIGRATIONS[schema]
+    exists = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (table,)
+    ).fetchone()
+    if not exists:
+        return 0
+
+    conn.execute(_SCHEMA_VERSION_TABLE)
+    current = schema_version(conn, schema)
+    for version, description, sql in steps:
+        if version <= current:
+            continue
+        # executescript valide la transaction en cours : la version est
+        # enregistrée juste après, les CREATE ... IF NOT EXISTS sont rejouables
+        conn.executescript(sql)
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO schema_version (schema, version, description) VALUES (?, ?, ?)",
+                (schema, version, description),
+            )
+        print(f"[DB] Migration {schema} v{version}: {description}")
+        current = version
+    return current
+
+
+def ensure_migrated(conn: sqlite3.Connection, schema: str) -> int:
+    """
+    Migre une connexion déjà ouverte si des migrations sont en attente.
+
+    Cas d'une table principale créée après l'ouverture (ex: première
+    synchronisation Kezia) ; ne lit que schema_version si tout est appliqué.
+    """
+    if schema_version(conn, schema) < MIGRATIONS[schema][1][-1][0]:
+        return migrate(conn, schema)
+    return schema_version(conn, schema)
+
+
+def connect_db(db_path, schema: Optional[str] = None, **kwargs) -> sqlite3.Connection:
+    """
+    Ouvre une connexion réglée (WAL, synchronous=NORMAL) et migre le schéma.
+
+    Les migrations ne sont vérifiées qu'à la première connexion du processus
+    pour chaque base.
+
+    Args:
+        db_path: Chemin de la base SQLite
+        schema: Schéma à migrer (clé de MIGRATIONS), ou None
+        **kwargs: Arguments transmis à sqlite3.connect
+
+    Returns:
+        Connexion SQLite (à fermer par l'appelant)
+
+    Example:
+        >>> conn = connect_db("data/pertes.db", schema="pertes")
+    """
+    conn = sqlite3.connect(db_path, **kwargs)
+    try:
+        apply_pragmas(conn)
+        if schema is not None:
+            key = (str(Path(db_path).resolve()), schema)
+            if key not in _migrated:
+                with _lock:
+                    if key not in _migrated and migrate(conn, schema):
+                        _migrated.add(key)
+    except sqlite3.Error:
+        conn.close()
+        raise
+    return conn
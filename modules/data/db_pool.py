@@ -0,0 +1,118 @@
+"""
+🔌 DB POOL - Connexions SQLite réutilisées (une par thread et par base)
+✅ Connexion ouverte une seule fois par thread (réglages et migrations compris)
+✅ Transactions en contexte : commit si tout se passe bien, rollback sinon
+
+Streamlit exécute chaque run de script (chaque rerun) dans un nouveau
+thread : les connexions appartiennent aux threads, pas aux sessions. Une
+connexion n'est jamais utilisée hors de son thread ; celles des threads
+terminés sont fermées à l'ouverture d'une nouvelle connexion.
+"""
+import sqlite3
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, Optional, Tuple
+
+from modules.data.db_migrations import connect_db
+
+
+class ConnectionPool:
+    """
+    Connexions thread-local vers une base SQLite.
+
+    Example:
+        >>> pool = get_pool("data/pertes.db")
+        >>> pool.connection().execute("SELECT COUNT(*) FROM pertes").fetchone()
+        >>> with pool.transaction() as conn:
+        ...     conn.execute("INSERT INTO pertes ...")
+    """
+
+    def __init__(self, db_path, schema: Optional[str] = None):
+        self.db_path = str(db_path)
+        self.schema = schema
+        self._local = threading.local()
+        self._connections: Dict[threading.Thread, sqlite3.Connection] = {}
+        self._lock = threading.Lock()
+
+    def connection(self) -> sqlite3.Connection:
+        """Connexion du thread courant (ouverte au premier appel)."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            self._close_finished()
+            # Fermée par un autre thread si son thread se termine (_close_finished)
+            conn = connect_db(self.db_path, schema=self.schema, check_same_thread=False)
+            self._local.conn = conn
+            with self._lock:
+                self._connections[threading.current_thread()] = conn
+        return conn
+
+    def _close_finished(self) -> int:
+        """Ferme les connexions des threads terminés ; retourne leur nombre."""
+        with self._lock:
+            finished = [thread for thread in self._connections if not thread.is_alive()]
+            conns = [self._connections.pop(thread) for thread in finished]
+        for conn in conns:
+            conn.close()
+        return len(conns)
+
+    def size(self) -> int:
+        """Nombre de connexions ouvertes (threads vivants ou pas encore nettoyés)."""
+        with self._lock:
+            return len(self._connections)
+
+    @contextmanager
+    def transaction(self) -> Iterator[sqlite3.Connection]:
+        """
+        Transaction sur la connexion du thread courant.
+
+        Les transactions imbriquées rejoignent la transaction englobante :
+        seul le bloc le plus externe valide ou annule.
+        """
+        conn = self.connection()
+        depth = getattr(self._local, "depth", 0)
+        self._local.depth = depth + 1
+        try:
+            yield conn
+        except BaseException:
+            if depth == 0:
+                conn.rollback()
+            raise
+        else:
+            if depth == 0:
+                conn.commit()
+        finally:
+            self._local.depth = depth
+
+    def close(self) -> None:
+        """Ferme la connexion du thread courant (rouverte au besoin)."""
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            with self._lock:
+                self._connections.pop(threading.current_thread(), None)
+            conn.close()
+            self._local.conn = None
+
+
+_pools: Dict[Tuple[str, Optional[str]], ConnectionPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(db_path, schema: Optional[str] = None) -> ConnectionPool:
+    """
+    Pool partagé d'une base (un seul par chemin et par schéma dans le processus).
+
+    Args:
+        db_path: Chemin de la base SQLite
+        schema: Schéma à migrer à l'ouverture (voir db_migrations.MIGRATIONS)
+
+    Returns:
+        ConnectionPool
+    """
+    key = (str(Path(db_path).resolve()), schema)
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            pool = ConnectionPool(db_path, schema)
+            _pools[key] = pool
+    return pool
@@ -0,0 +1,273 @@
+"""
+🔎 INDEX DES NOMS DE PRODUITS - Correspondance plats (recettes) ↔ produits Kezia
+✅ produits_kezia : catalogue des produits vendus, tenu à jour de façon
+   incrémentale (repère = plus grand rowid de ventes traité)
+✅ produits_trigrammes : index trigrammes des noms normalisés, pour ne
+   comparer un plat qu'aux produits qui lui ressemblent
+✅ correspondances_produits : correspondance retenue et score de confiance
+   par nom de plat ; vidée dès qu'un nouveau produit apparaît
+
+Les tables sont créées par la migration ventes v3 (db_migrations). À
+l'exécution, la recherche se réduit à une lecture de dictionnaire : l'état
+du catalogue n'est relu qu'une fois par ROLLUP_CHECK_INTERVAL, ou après un
+build_name_mapping.
+
+Départage des ex aequo : le premier produit par ordre alphabétique est
+retenu, comme l'ancien parcours de SELECT DISTINCT produit (servi par
+l'index ventes (produit, date)). Seuls les produits partageant un trigramme
+avec le nom recherché sont comparés : un produit sans trigramme commun ne
+peut donc plus être retenu, même si son score atteignait le seuil.
+"""
+import sqlite3
+import threading
+import time
+from difflib import SequenceMatcher
+from functools import lru_cache
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Optional, Sequence, Set, Tuple
+
+from config import SALES_DB_PATH
+from modules.data.db_migrations import ensure_migrated
+from modules.data.db_pool import get_pool
+from modules.data.sales_rollups import ROLLUP_CHECK_INTERVAL
+
+
+# Score minimal pour retenir une correspondance (ratio SequenceMatcher + bonus)
+MATCH_THRESHOLD = 0.6
+KEYWORD_BONUS = 0.2
+
+_WATERMARK = "produits_max_rowid"
+_CATALOG_VERSION = "produits_version"
+
+# État du catalogue par base : chemin résolu -> (vérifié à, version, à jour)
+_catalog_states: Dict[str, Tuple[float, int, bool]] = {}
+_states_lock = threading.Lock()
+
+
+def trigrams(name: str) -> Set[str]:
+    """Trigrammes d'un nom normalisé (bornés par des espaces)."""
+    padded = f"  {name} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def match_score(normalized_search: str, normalized_db: str) -> float:
+    """
+    Score de confiance entre deux noms normalisés.
+
+    Ratio SequenceMatcher, plus un bonus si un mot de plus de 3 lettres
+    du nom recherché apparaît dans le nom du produit.
+    """
+    score = SequenceMatcher(None, normalized_search, normalized_db).ratio()
+    if any(word in normalized_db for word in normalized_search.split() if len(word) > 3):
+        score += KEYWORD_BONUS
+    return score
+
+
+def _read_state(conn: sqlite3.Connection, nom: str) -> int:
+    row = conn.execute("SELECT valeur FROM rollup_state WHERE nom = ?", (nom,)).fetchone()
+    return row[0] if row else 0
+
+
+def refresh_name_index(conn: sqlite3.Connection, normalize: Callable[[str], str]) -> int:
+    """
+    Ajoute au catalogue les produits apparus depuis le dernier passage.
+
+    Seules les lignes de ventes ajoutées depuis le repère sont lues. Si de
+    nouveaux produits apparaissent, les correspondances mémorisées sont
+    effacées (un nouveau produit peut être un meilleur candidat) et la
+    version du catalogue est incrémentée.
+
+    Args:
+        conn: Connexion à la base des ventes, migrée (schéma "ventes")
+        normalize: Fonction de normalisation des noms (normalize_product_name)
+
+    Returns:
+        Nombre de nouveaux produits indexés
+    """
+    max_rowid = conn.execute("SELECT MAX(rowid) FROM ventes").fetchone()[0] or 0
+    watermark = _read_state(conn, _WATERMARK)
+    if max_rowid <= watermark:
+        return 0
+
+    nouveaux = [
+        row[0] for row in conn.execute("""
+            SELECT DISTINCT produit FROM ventes
+            WHERE rowid > ? AND produit IS NOT NULL
+            AND produit NOT IN (SELECT produit FROM produits_kezia)
+        """, (watermark,))
+    ]
+
+    with conn:
+        if nouveaux:
+            normalises = [(produit, normalize(produit)) for produit in nouveaux]
+            conn.executemany(
+                "INSERT OR REPLACE INTO produits_kezia (produit, nom_normalise) VALUES (?, ?)",
+                normalises,
+            )
+            conn.executemany(
+                "INSERT OR IGNORE INTO produits_trigrammes (trigramme, produit) VALUES (?, ?)",
+                [(tri, produit) for produit, nom in normalises for tri in trigrams(nom)],
+            )
+            conn.execute("DELETE FROM correspondances_produits")
+            conn.execute(
+                "INSERT OR REPLACE INTO rollup_state (nom, valeur) VALUES (?, ?)",
+                (_CATALOG_VERSION, _read_state(conn, _CATALOG_VERSION) + 1),
+            )
+        conn.execute(
+            "INSERT OR REPLACE INTO rollup_state (nom, valeur) VALUES (?, ?)",
+            (_WATERMARK, max_rowid),
+        )
+
+    return len(nouveaux)
+
+
+def _candidates(conn: sqlite3.Connection, normalized_search: str) -> Sequence[Tuple[str, str]]:
+    """
+    Produits partageant au moins un trigramme avec le nom recherché.
+
+    Repli sur tout le catalogue si aucun trigramme n'est commun (noms très courts).
+    Triés par produit : l'ordre de départage des ex aequo est déterministe.
+    """
+    tris = sorted(trigrams(normalized_search))
+    placeholders = ",".join("?" * len(tris))
+    rows = conn.execute(f"""
+        SELECT p.produit, p.nom_normalise
+        FROM produits_kezia p
+        WHERE p.produit IN (
+            SELECT produit FROM produits_trigrammes WHERE trigramme IN ({placeholders})
+        )
+        ORDER BY p.produit
+    """, tris).fetchall()
+    if not rows:
+        rows = conn.execute(
+            "SELECT produit, nom_normalise FROM produits_kezia ORDER BY produit"
+        ).fetchall()
+    return rows
+
+
+def _best_match(conn: sqlite3.Connection, normalized_search: str) -> Tuple[Optional[str], float]:
+    """Meilleur produit du catalogue pour un nom normalisé (None sous le seuil)."""
+    best_match, best_score = None, 0.0
+    for produit, nom_normalise in _candidates(conn, normalized_search):
+        score = match_score(normalized_search, nom_normalise)
+        if score > best_score:
+            best_match, best_score = produit, score
+    if best_score < MATCH_THRESHOLD:
+        return None, best_score
+    return best_match, best_score
+
+
+def build_name_mapping(
+    names: Iterable[str],
+    normalize: Callable[[str], str],
+    db_path: Path = SALES_DB_PATH,
+) -> Dict[str, Tuple[Optional[str], float]]:
+    """
+    Calcule et mémorise la correspondance des noms absents de l'index.
+
+    Args:
+        names: Noms des plats des recettes
+        normalize: Fonction de normalisation des noms (normalize_product_name)
+        db_path: Chemin de la base SQLite Kezia
+
+    Returns:
+        {nom normalisé: (produit Kezia ou None, score)} pour tout l'index
+
+    Example:
+        >>> build_name_mapping(recettes["plat"].unique(), normalize_product_name)
+    """
+    if not Path(db_path).exists():
+        return {}
+
+    conn = get_pool(db_path, schema="ventes").connection()
+    ensure_migrated(conn, "ventes")
+    refresh_name_index(conn, normalize)
+    connues = {row[0] for row in conn.execute("SELECT recherche FROM correspondances_produits")}
+    manquants = {normalize(name) for name in names} - connues
+    if manquants:
+        with conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO correspondances_produits (recherche, produit, score) VALUES (?, ?, ?)",
+                [(nom, *_best_match(conn, nom)) for nom in sorted(manquants)],
+            )
+    mapping = _load_mapping(conn)
+
+    # Catalogue à jour juste après refresh_name_index
+    with _states_lock:
+        _catalog_states[str(Path(db_path).resolve())] = (
+            time.monotonic(), _read_state(conn, _CATALOG_VERSION), True,
+        )
+    _cached_mapping.cache_clear()
+    return mapping
+
+
+def _load_mapping(conn: sqlite3.Connection) -> Dict[str, Tuple[Optional[str], float]]:
+    return {
+        recherche: (produit, score)
+        for recherche, produit, score in conn.execute(
+            "SELECT recherche, produit, score FROM correspondances_produits"
+        )
+    }
+
+
+@lru_cache(maxsize=4)
+def _cached_mapping(db_path: str, catalog_version: int) -> Dict[str, Tuple[Optional[str], float]]:
+    """Index en mémoire, invalidé quand le catalogue change (ou par build_name_mapping)."""
+    return _load_mapping(get_pool(db_path, schema="ventes").connection())
+
+
+def _catalog_state(db_path: Path) -> Tuple[int, bool]:
+    """
+    (version du catalogue, catalogue à jour), relus au plus une fois par
+    ROLLUP_CHECK_INTERVAL : entre deux vérifications, aucune requête.
+    """
+    key = str(Path(db_path).resolve())
+    now = time.monotonic()
+    with _states_lock:
+        state = _catalog_states.get(key)
+    if state is not None and now - state[0] < ROLLUP_CHECK_INTERVAL:
+        return state[1], state[2]
+
+    conn = get_pool(db_path, schema="ventes").connection()
+    max_rowid = conn.execute("SELECT MAX(rowid) FROM ventes").fetchone()[0] or 0
+    try:
+        catalog_version = _read_state(conn, _CATALOG_VERSION)
+        a_jour = _read_state(conn, _WATERMARK) == max_rowid
+    except sqlite3.OperationalError:
+        catalog_version, a_jour = 0, False
+    with _states_lock:
+        _catalog_states[key] = (now, catalog_version, a_jour)
+    return catalog_version, a_jour
+
+
+def lookup_product(
+    product_name: str,
+    normalize: Callable[[str], str],
+    db_path: Path = SALES_DB_PATH,
+) -> Tuple[Optional[str], float]:
+    """
+    Correspondance Kezia d'un nom de plat, avec son score de confiance.
+
+    Lecture du dictionnaire en mémoire ; un nom encore inconnu, ou un
+    catalogue en retard sur les ventes, déclenche build_name_mapping
+    (candidats par trigrammes, ajout à l'index persistant).
+
+    Args:
+        product_name: Nom du plat
+        normalize: Fonction de normalisation des noms (normalize_product_name)
+        db_path: Chemin de la base SQLite Kezia
+
+    Returns:
+        (produit Kezia ou None, score)
+    """
+    if not Path(db_path).exists():
+        return None, 0.0
+
+    cle = normalize(product_name)
+    catalog_version, a_jour = _catalog_state(db_path)
+    if a_jour:
+        mapping = _cached_mapping(str(Path(db_path).resolve()), catalog_version)
+        if cle in mapping:
+            return mapping[cle]
+
+    return build_name_mapping([product_name], normalize, db_path).get(cle, (None, 0.0))
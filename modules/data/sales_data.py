@@ -10,6 +10,8 @@ from datetime import datetime, timedelta
 from typing import Optional, Dict, Any, Tuple
 from pathlib import Path
 
+from modules.data.sales_rollups import query_rollup
+
 # Import du gestionnaire DB (optionnel pour déploiement sans DB)
 try:
     import sys
@@ -27,6 +29,13 @@ def get_db_manager():
     from kezia_db_manager import get_db_manager as _get_db
     return _get_db()
 
+
+def _periode(nb_jours: int) -> Tuple[str, str]:
+    """Bornes (incluses) de la période, au format YYYY-MM-DD, comme load_ventes."""
+    date_debut = (datetime.now() - timedelta(days=nb_jours)).strftime('%Y-%m-%d')
+    date_fin = datetime.now().strftime('%Y-%m-%d')
+    return date_debut, date_fin
+
 @st.cache_data(ttl=300)  # Cache 5 minutes
 def load_ventes(nb_jours: int = 30, 
                 date_debut: Optional[str] = None,
@@ -131,6 +140,25 @@ def get_top_produits(nb_jours: int = 30, limit: int = 10, order_by: str = 'quant
         >>> top = get_top_produits(nb_jours=7, limit=5, order_by='ca_ttc')
         >>> st.bar_chart(top.set_index('produit')['ca_ttc'])
     """
+    if order_by not in ('quantite', 'ca_ttc'):
+        order_by = 'quantite'
+    
+    # Lecture directe des agrégats journaliers
+    agg = query_rollup(f"""
+        SELECT produit, SUM(quantite) AS quantite, SUM(ca_ttc) AS ca_ttc
+        FROM ventes_produit_jour
+        WHERE jour BETWEEN ? AND ?
+        GROUP BY produit
+        ORDER BY {order_by} DESC
+        LIMIT ?
+    """, (*_periode(nb_jours), limit))
+    if agg is not None:
+        if agg.empty:
+            return pd.DataFrame()
+        agg['prix_moyen'] = agg['ca_ttc'] / agg['quantite']
+        return agg
+    
+    # Agrégats indisponibles : agrégation des ventes horaires
     df = load_ventes(nb_jours=nb_jours)
     
     if df.empty:
@@ -165,6 +193,19 @@ def get_ventes_par_jour(nb_jours: int = 30) -> pd.DataFrame:
         >>> df_jours = get_ventes_par_jour(nb_jours=30)
         >>> st.line_chart(df_jours.set_index('date')['ca_total'])
     """
+    daily = query_rollup("""
+        SELECT jour AS date, quantite AS quantite_totale, ca_ttc AS ca_total
+        FROM ventes_jour
+        WHERE jour BETWEEN ? AND ?
+        ORDER BY jour
+    """, _periode(nb_jours))
+    if daily is not None:
+        if daily.empty:
+            return pd.DataFrame()
+        daily['date'] = pd.to_datetime(daily['date']).dt.date
+        return daily
+    
+    # Agrégats indisponibles : agrégation des ventes horaires
     df = load_ventes(nb_jours=nb_jours)
     
     if df.empty:
@@ -194,22 +235,45 @@ def get_ventes_produit(produit: str, nb_jours: int = 30) -> Dict[str, Any]:
     
     Returns:
         dict avec: quantite_totale, ca_total, prix_moyen, nb_ventes, df_historique
+        (historique journalier lorsque les agrégats sont disponibles)
     
     Example:
         >>> stats = get_ventes_produit('Pizza Margherita', nb_jours=30)
         >>> st.metric("Quantité vendue", stats['quantite_totale'])
     """
-    df = load_ventes(nb_jours=nb_jours, produit=produit)
+    vide = {
+        'quantite_totale': 0,
+        'ca_total': 0,
+        'prix_moyen': 0,
+        'nb_ventes': 0,
+        'df_historique': pd.DataFrame()
+    }
     
-    if df.empty:
+    historique = query_rollup("""
+        SELECT jour AS date, produit, quantite, ca_ttc, nb_lignes, somme_prix_moyen
+        FROM ventes_produit_jour
+        WHERE produit = ? AND jour BETWEEN ? AND ?
+        ORDER BY jour
+    """, (produit, *_periode(nb_jours)))
+    if historique is not None:
+        if historique.empty:
+            return vide
+        nb_ventes = int(historique['nb_lignes'].sum())
+        historique['prix_moyen'] = historique['somme_prix_moyen'] / historique['nb_lignes']
         return {
-            'quantite_totale': 0,
-            'ca_total': 0,
-            'prix_moyen': 0,
-            'nb_ventes': 0,
-            'df_historique': pd.DataFrame()
+            'quantite_totale': int(historique['quantite'].sum()),
+            'ca_total': float(historique['ca_ttc'].sum()),
+            'prix_moyen': float(historique['somme_prix_moyen'].sum() / nb_ventes),
+            'nb_ventes': nb_ventes,
+            'df_historique': historique[['date', 'produit', 'quantite', 'ca_ttc', 'prix_moyen']]
         }
     
+    # Agrégats indisponibles : ventes horaires
+    df = load_ventes(nb_jours=nb_jours, produit=produit)
+    
+    if df.empty:
+        return vide
+    
     return {
         'quantite_totale': int(df['quantite'].sum()),
         'ca_total': float(df['ca_ttc'].sum()),
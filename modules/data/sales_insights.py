@@ -1,11 +1,16 @@
 """
 Module d'insights intelligents basés sur les données de ventes Kezia
 """
-import sqlite3
 from datetime import datetime, timedelta
+from functools import lru_cache
 from pathlib import Path
 from typing import Dict, Optional, Tuple
-from difflib import SequenceMatcher
+
+import streamlit as st
+
+from modules.data.db_pool import get_pool
+from modules.data.product_name_index import lookup_product
+from modules.data.sales_rollups import open_rollups, rollup_version
 
 
 def normalize_product_name(name: str) -> str:
@@ -33,49 +38,99 @@ def normalize_product_name(name: str) -> str:
 def find_best_match_in_db(product_name: str, db_path: str) -> Optional[str]:
     """
     Trouve la meilleure correspondance dans la base SQLite
+    
+    Lecture de l'index persistant des noms (voir product_name_index) : le
+    calcul de similarité n'a lieu qu'une fois par plat, et de nouveau
+    seulement quand de nouveaux produits apparaissent dans les ventes.
     """
     try:
-        conn = sqlite3.connect(db_path)
-        cursor = conn.cursor()
-        cursor.execute("SELECT DISTINCT produit FROM ventes")
-        all_products = [row[0] for row in cursor.fetchall()]
-        conn.close()
-        
-        # Normaliser le nom recherché
-        normalized_search = normalize_product_name(product_name)
-        
-        best_match = None
-        best_score = 0
-        
-        for db_product in all_products:
-            normalized_db = normalize_product_name(db_product)
-            
-            # Calcul de similarité
-            ratio = SequenceMatcher(None, normalized_search, normalized_db).ratio()
-            
-            # Bonus si contient des mots clés
-            if any(word in normalized_db for word in normalized_search.split() if len(word) > 3):
-                ratio += 0.2
-            
-            if ratio > best_score:
-                best_score = ratio
-                best_match = db_product
-        
-        # Seuil de confiance
-        if best_score >= 0.6:
-            return best_match
-        
-        return None
+        best_match, _score = lookup_product(product_name, normalize_product_name, db_path)
+        return best_match
         
     except Exception as e:
         print(f"Erreur lors du matching: {e}")
         return None
 
 
+JOURS_SEMAINE = ["Dimanche", "Lundi", "Mardi", "Mercredi", "Jeudi", "Vendredi", "Samedi"]
+
+# Bornes des périodes, calculées une fois (comparaisons de chaînes sur jour : index utilisable)
+_BORNES_CTE = """
+    bornes AS (
+        SELECT date('now', '-7 days') AS debut_7j,
+               date('now', '-30 days') AS debut_30j,
+               date('now', 'start of month') AS debut_mois,
+               date('now', 'start of month', '-1 month') AS debut_mois_prec,
+               date('now', 'start of month', '+1 month') AS debut_mois_suiv
+    )
+"""
+
+_INSIGHT_QUERY = f"""
+    WITH {_BORNES_CTE},
+    ventes_produit AS (
+        SELECT v.jour, v.quantite, v.ca_ttc, v.nb_lignes, v.somme_prix_moyen
+        FROM ventes_produit_jour v, bornes b
+        WHERE v.produit = ?
+        AND v.jour >= min(b.debut_7j, b.debut_30j, b.debut_mois_prec)
+    ),
+    meilleur_jour AS (
+        SELECT CAST(strftime('%w', v.jour) AS INTEGER) AS jour_semaine,
+               SUM(v.quantite) AS total
+        FROM ventes_produit v, bornes b
+        WHERE v.jour >= b.debut_30j
+        GROUP BY jour_semaine
+        ORDER BY total DESC
+        LIMIT 1
+    )
+    SELECT
+        SUM(CASE WHEN v.jour >= b.debut_7j THEN v.quantite END),
+        SUM(CASE WHEN v.jour >= b.debut_7j THEN v.ca_ttc END),
+        COUNT(CASE WHEN v.jour >= b.debut_7j THEN 1 END),
+        SUM(CASE WHEN v.jour >= b.debut_7j THEN v.somme_prix_moyen END)
+            / SUM(CASE WHEN v.jour >= b.debut_7j THEN v.nb_lignes END),
+        SUM(CASE WHEN v.jour >= b.debut_mois AND v.jour < b.debut_mois_suiv THEN v.quantite END),
+        SUM(CASE WHEN v.jour >= b.debut_mois AND v.jour < b.debut_mois_suiv THEN v.ca_ttc END),
+        SUM(CASE WHEN v.jour >= b.debut_mois_prec AND v.jour < b.debut_mois THEN v.quantite END),
+        (SELECT jour_semaine FROM meilleur_jour),
+        (SELECT total FROM meilleur_jour)
+    FROM ventes_produit v, bornes b
+"""
+
+_RANKING_QUERY = f"""
+    WITH {_BORNES_CTE}
+    SELECT v.produit,
+           ROW_NUMBER() OVER (ORDER BY SUM(v.quantite) DESC) AS rang
+    FROM ventes_produit_jour v, bornes b
+    WHERE v.jour >= b.debut_mois AND v.jour < b.debut_mois_suiv
+    GROUP BY v.produit
+"""
+
+
+@lru_cache(maxsize=8)
+def _classement_du_mois(db_path: str, mois: str, version: int) -> Tuple[Dict[str, int], int]:
+    """
+    Classement de tous les produits sur le mois en cours (quantités vendues).
+
+    Calculé une fois puis partagé entre les produits : la clé (mois, version
+    des agrégats) change dès qu'une synchronisation ajoute des ventes.
+
+    Returns:
+        ({produit: rang}, nombre de produits classés)
+    """
+    conn = get_pool(db_path, schema="ventes").connection()
+    rangs = dict(conn.execute(_RANKING_QUERY).fetchall())
+    return rangs, len(rangs)
+
+
+@st.cache_data(ttl=300, show_spinner=False)  # Cache 5 minutes, comme load_ventes
 def get_product_sales_insight(product_name: str, db_path: str = "data/kezia_sales.db") -> Optional[Dict]:
     """
     Génère un insight intelligent pour un produit basé sur ses ventes réelles
     
+    Les indicateurs (7 derniers jours, mois en cours, mois précédent, meilleur
+    jour de la semaine) sont lus en une seule requête sur les agrégats
+    journaliers ; le classement du mois est partagé entre les produits.
+    
     Args:
         product_name: Nom du produit à analyser
         db_path: Chemin vers la base SQLite
@@ -93,100 +148,32 @@ def get_product_sales_insight(product_name: str, db_path: str = "data/kezia_sale
         return None
     
     try:
-        conn = sqlite3.connect(db_path)
-        cursor = conn.cursor()
-        
-        # 1. Ventes des 7 derniers jours
-        cursor.execute("""
-            SELECT 
-                SUM(quantite) as total_qty,
-                SUM(ca_ttc) as total_ca,
-                COUNT(DISTINCT date) as nb_jours,
-                AVG(prix_moyen) as prix_moyen
-            FROM ventes
-            WHERE produit = ?
-            AND date >= date('now', '-7 days')
-        """, (matched_product,))
-        
-        result_7d = cursor.fetchone()
-        
-        if not result_7d or result_7d[0] is None:
-            conn.close()
+        conn = open_rollups(db_path)
+        if conn is None:
             return None
+        row = conn.execute(_INSIGHT_QUERY, (matched_product,)).fetchone()
+        version = rollup_version(conn)
+        mois = conn.execute("SELECT date('now', 'start of month')").fetchone()[0]
         
-        total_qty_7d = result_7d[0] or 0
-        total_ca_7d = result_7d[1] or 0
-        nb_jours_7d = result_7d[2] or 1
-        prix_moyen = result_7d[3] or 0
-        
-        # 2. Ventes du mois en cours
-        cursor.execute("""
-            SELECT 
-                SUM(quantite) as total_qty,
-                SUM(ca_ttc) as total_ca
-            FROM ventes
-            WHERE produit = ?
-            AND strftime('%Y-%m', date) = strftime('%Y-%m', 'now')
-        """, (matched_product,))
-        
-        result_month = cursor.fetchone()
-        total_qty_month = result_month[0] or 0
-        total_ca_month = result_month[1] or 0
-        
-        # 3. Comparaison avec le mois dernier
-        cursor.execute("""
-            SELECT 
-                SUM(quantite) as total_qty
-            FROM ventes
-            WHERE produit = ?
-            AND strftime('%Y-%m', date) = strftime('%Y-%m', 'now', '-1 month')
-        """, (matched_product,))
-        
-        result_last_month = cursor.fetchone()
-        total_qty_last_month = result_last_month[0] or 0
-        
-        # 4. Jour de la semaine le plus populaire
-        cursor.execute("""
-            SELECT 
-                CASE CAST(strftime('%w', date) AS INTEGER)
-                    WHEN 0 THEN 'Dimanche'
-                    WHEN 1 THEN 'Lundi'
-                    WHEN 2 THEN 'Mardi'
-                    WHEN 3 THEN 'Mercredi'
-                    WHEN 4 THEN 'Jeudi'
-                    WHEN 5 THEN 'Vendredi'
-                    WHEN 6 THEN 'Samedi'
-                END as jour,
-                SUM(quantite) as total
-            FROM ventes
-            WHERE produit = ?
-            AND date >= date('now', '-30 days')
-            GROUP BY strftime('%w', date)
-            ORDER BY total DESC
-            LIMIT 1
-        """, (matched_product,))
-        
-        best_day = cursor.fetchone()
-        best_day_name = best_day[0] if best_day else None
-        best_day_qty = best_day[1] if best_day else 0
+        if not row or row[0] is None:
+            return None
         
-        # 5. Classement du produit (top produits du mois)
-        cursor.execute("""
-            SELECT produit, SUM(quantite) as total
-            FROM ventes
-            WHERE strftime('%Y-%m', date) = strftime('%Y-%m', 'now')
-            GROUP BY produit
-            ORDER BY total DESC
-        """)
+        (total_qty_7d, total_ca_7d, nb_jours_7d, prix_moyen,
+         total_qty_month, total_ca_month, total_qty_last_month,
+         best_day_index, best_day_qty) = row
         
-        all_products = cursor.fetchall()
-        product_rank = None
-        for idx, (prod, _) in enumerate(all_products, 1):
-            if prod == matched_product:
-                product_rank = idx
-                break
+        total_qty_7d = total_qty_7d or 0
+        total_ca_7d = total_ca_7d or 0
+        nb_jours_7d = nb_jours_7d or 1
+        prix_moyen = prix_moyen or 0
+        total_qty_month = total_qty_month or 0
+        total_ca_month = total_ca_month or 0
+        total_qty_last_month = total_qty_last_month or 0
+        best_day_name = JOURS_SEMAINE[best_day_index] if best_day_index is not None else None
         
-        conn.close()
+        # Classement du produit (top produits du mois), partagé entre les produits
+        rangs, total_products = _classement_du_mois(str(db_path), mois, version)
+        product_rank = rangs.get(matched_product)
         
         # Calculs dérivés
         avg_qty_per_day = total_qty_7d / max(nb_jours_7d, 1)
@@ -205,7 +192,7 @@ def get_product_sales_insight(product_name: str, db_path: str = "data/kezia_sale
             "best_day": best_day_name,
             "best_day_qty": int(best_day_qty) if best_day_qty else 0,
             "product_rank": product_rank,
-            "total_products": len(all_products),
+            "total_products": total_products,
         }
         
     except Exception as e:
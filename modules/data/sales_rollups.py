@@ -0,0 +1,205 @@
+"""
+📦 SALES ROLLUPS - Tables d'agrégats journaliers de la base Kezia
+✅ ventes_jour : une ligne par jour
+✅ ventes_produit_jour : une ligne par jour et par produit
+✅ Mise à jour incrémentale : seuls les jours touchés depuis le dernier
+   rafraîchissement sont recalculés (repère = plus grand rowid traité)
+
+Les agrégats sont construits à partir des lignes horaires (temporality='hour')
+de la table ventes, comme load_ventes. Les tables sont créées par la migration
+ventes v2 (db_migrations) ; les lectures passent par le pool de connexions.
+"""
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Optional, Sequence
+
+import pandas as pd
+
+from config import SALES_DB_PATH
+from modules.data.db_migrations import ensure_migrated
+from modules.data.db_pool import get_pool
+
+
+# Délai entre deux vérifications du repère par le chemin de lecture (secondes),
+# aligné sur le cache de load_ventes ; refresh_rollups() reste à appeler après
+# chaque synchronisation pour une mise à jour immédiate
+ROLLUP_CHECK_INTERVAL = 300
+
+_WATERMARK = "ventes_max_rowid"
+
+# Dernière vérification du repère par base (chemin résolu -> time.monotonic())
+_last_checks: Dict[str, float] = {}
+_checks_lock = threading.Lock()
+
+
+def _ventes_columns(conn: sqlite3.Connection) -> Sequence[str]:
+    """Colonnes de la table ventes (vide si la table n'existe pas)."""
+    return [row[1] for row in conn.execute("PRAGMA table_info(ventes)")]
+
+
+def rollup_version(conn: sqlite3.Connection) -> int:
+    """
+    Version des agrégats (plus grand rowid de ventes intégré).
+
+    Change à chaque rafraîchissement qui intègre de nouvelles ventes : sert de
+    clé de cache pour les calculs dérivés des agrégats.
+    """
+    try:
+        row = conn.execute(
+            "SELECT valeur FROM rollup_state WHERE nom = ?", (_WATERMARK,)
+        ).fetchone()
+    except sqlite3.OperationalError:
+        return 0
+    return row[0] if row else 0
+
+
+def refresh_rollups(conn: sqlite3.Connection, full: bool = False) -> int:
+    """
+    Met à jour les tables d'agrégats à partir des nouvelles lignes de ventes.
+
+    Les jours présents dans les lignes ajoutées depuis le dernier passage
+    (rowid > repère) sont entièrement recalculés : l'opération est idempotente
+    et gère les lignes remplacées (INSERT OR REPLACE) par la synchronisation.
+
+    Args:
+        conn: Connexion à la base des ventes, migrée (schéma "ventes", voir
+              get_pool / connect_db) : les tables d'agrégats doivent exister
+        full: Reconstruire tous les agrégats (ex: après suppression de lignes)
+
+    Returns:
+        Nombre de jours recalculés (0 si les agrégats étaient à jour)
+
+    Example:
+        >>> conn = get_pool("data/kezia_sales.db", schema="ventes").connection()
+        >>> refresh_rollups(conn)  # après chaque synchronisation
+    """
+    columns = _ventes_columns(conn)
+    if not columns:
+        return 0
+
+    max_rowid = conn.execute("SELECT MAX(rowid) FROM ventes").fetchone()[0] or 0
+    watermark = 0 if full else rollup_version(conn)
+    if max_rowid <= watermark and not full:
+        return 0
+
+    filtre_horaire = "AND temporality = 'hour'" if "temporality" in columns else ""
+
+    with conn:
+        conn.execute("DROP TABLE IF EXISTS temp._jours_a_recalculer")
+        conn.execute(f"""
+            CREATE TEMP TABLE _jours_a_recalculer AS
+            SELECT DISTINCT substr(date, 1, 10) AS jour
+            FROM ventes
+            WHERE rowid > ? {filtre_horaire}
+        """, (watermark,))
+        nb_jours, jour_min, jour_max = conn.execute(
+            "SELECT COUNT(*), MIN(jour), MAX(jour) FROM _jours_a_recalculer"
+        ).fetchone()
+
+        if full:
+            conn.execute("DELETE FROM ventes_produit_jour")
+            conn.execute("DELETE FROM ventes_jour")
+        else:
+            conn.execute("""
+                DELETE FROM ventes_produit_jour
+                WHERE jour IN (SELECT jour FROM _jours_a_recalculer)
+            """)
+            conn.execute("""
+                DELETE FROM ventes_jour
+                WHERE jour IN (SELECT jour FROM _jours_a_recalculer)
+            """)
+
+        conn.execute(f"""
+            INSERT INTO ventes_produit_jour
+                (jour, produit, quantite, ca_ttc, nb_lignes, somme_prix_moyen)
+            SELECT substr(date, 1, 10), produit,
+                   TOTAL(quantite), TOTAL(ca_ttc), COUNT(*), TOTAL(prix_moyen)
+            FROM ventes
+            WHERE date >= ? AND date < date(?, '+1 day')
+            AND substr(date, 1, 10) IN (SELECT jour FROM _jours_a_recalculer)
+            {filtre_horaire}
+            GROUP BY 1, 2
+        """, (jour_min, jour_max))
+        conn.execute("""
+            INSERT INTO ventes_jour (jour, quantite, ca_ttc, nb_lignes)
+            SELECT jour, TOTAL(quantite), TOTAL(ca_ttc), SUM(nb_lignes)
+            FROM ventes_produit_jour
+            WHERE jour IN (SELECT jour FROM _jours_a_recalculer)
+            GROUP BY jour
+        """)
+        conn.execute(
+            "INSERT OR REPLACE INTO rollup_state (nom, valeur) VALUES (?, ?)",
+            (_WATERMARK, max_rowid),
+        )
+        conn.execute("DROP TABLE temp._jours_a_recalculer")
+
+    return nb_jours
+
+
+def open_rollups(db_path: Path = SALES_DB_PATH,
+                 max_age: float = ROLLUP_CHECK_INTERVAL) -> Optional[sqlite3.Connection]:
+    """
+    Connexion du pool vers la base des ventes, avec des agrégats à jour.
+
+    Le repère n'est comparé à la table ventes qu'une fois par max_age secondes
+    et par processus : entre deux vérifications, la lecture ne fait aucune
+    écriture. Après une synchronisation, appeler refresh_rollups() pour
+    intégrer les nouvelles ventes sans attendre.
+
+    Args:
+        db_path: Chemin de la base SQLite Kezia
+        max_age: Délai minimal entre deux vérifications du repère (secondes)
+
+    Returns:
+        Connexion du thread courant (gérée par le pool : ne pas la fermer),
+        ou None si la base ou la table ventes est absente
+    """
+    if not Path(db_path).exists():
+        return None
+
+    key = str(Path(db_path).resolve())
+    try:
+        conn = get_pool(db_path, schema="ventes").connection()
+        now = time.monotonic()
+        with _checks_lock:
+            due = now - _last_checks.get(key, float("-inf")) >= max_age
+            if due:
+                _last_checks[key] = now
+        if due:
+            if not _ventes_columns(conn):
+                with _checks_lock:
+                    _last_checks.pop(key, None)
+                return None
+            # Table ventes créée après l'ouverture de la connexion (première synchro)
+            ensure_migrated(conn, "ventes")
+            refresh_rollups(conn)
+    except sqlite3.Error as e:
+        print(f"[ERROR] Erreur mise à jour des agrégats ventes: {e}")
+        with _checks_lock:
+            _last_checks.pop(key, None)
+        return None
+    return conn
+
+
+def query_rollup(sql: str, params: Sequence = (), db_path: Path = SALES_DB_PATH) -> Optional[pd.DataFrame]:
+    """
+    Exécute une requête sur les tables d'agrégats (mises à jour au besoin).
+
+    Args:
+        sql: Requête SELECT sur ventes_jour / ventes_produit_jour
+        params: Paramètres liés de la requête
+        db_path: Chemin de la base SQLite Kezia
+
+    Returns:
+        DataFrame résultat, ou None si les agrégats sont indisponibles
+    """
+    conn = open_rollups(db_path)
+    if conn is None:
+        return None
+    try:
+        return pd.read_sql_query(sql, conn, params=list(params))
+    except (sqlite3.Error, pd.errors.DatabaseError) as e:
+        print(f"[ERROR] Erreur lecture des agrégats ventes: {e}")
+        return None
@@ -0,0 +1,141 @@
+"""
+Profilage des imports au démarrage (résumé façon `python -X importtime`)
+
+Module volontairement limité à la bibliothèque standard : il doit être
+importé avant streamlit, pandas et les modules de l'application.
+
+Usage (tout en haut de app.py):
+    from modules.startup_profiler import start_import_profiling, report_import_profile
+    start_import_profiling()
+    ...  # imports de l'application
+    report_import_profile()
+"""
+
+import sys
+import time
+from importlib.abc import MetaPathFinder
+
+
+# Dépendances lourdes dont le chargement doit être différé au premier usage
+DEFERRED_MODULES = ("pulp", "scipy", "matplotlib", "plotly.express")
+
+
+class _TimedLoader:
+    """Enveloppe un loader pour mesurer la durée d'exécution du module."""
+
+    def __init__(self, loader, profiler):
+        self._loader = loader
+        self._profiler = profiler
+
+    def __getattr__(self, name):
+        return getattr(self._loader, name)
+
+    def create_module(self, spec):
+        return self._loader.create_module(spec)
+
+    def exec_module(self, module):
+        # Le module ne voit que son loader d'origine
+        module.__loader__ = self._loader
+        if module.__spec__ is not None:
+            module.__spec__.loader = self._loader
+
+        profiler = self._profiler
+        depth = profiler.depth
+        profiler.depth += 1
+        start = time.perf_counter()
+        try:
+            self._loader.exec_module(module)
+        finally:
+            profiler.depth -= 1
+            profiler.record(module.__name__, time.perf_counter() - start, depth)
+
+
+class _ImportProfiler(MetaPathFinder):
+    """Finder placé en tête de sys.meta_path qui chronomètre chaque import."""
+
+    def __init__(self):
+        self.depth = 0
+        self.started_at = time.perf_counter()
+        self.timings = []  # (nom, durée cumulée en s, profondeur)
+        self._resolving = set()
+
+    def record(self, name, duration, depth):
+        self.timings.append((name, duration, depth))
+
+    def find_spec(self, fullname, path=None, target=None):
+        if fullname in self._resolving:
+            return None
+        self._resolving.add(fullname)
+        try:
+            for finder in sys.meta_path:
+                if finder is self or not hasattr(finder, "find_spec"):
+                    continue
+                spec = finder.find_spec(fullname, path, target)
+                if spec is not None:
+                    break
+            else:
+                return None
+        finally:
+            self._resolving.discard(fullname)
+
+        if spec.loader is not None and hasattr(spec.loader, "exec_module"):
+            spec.loader = _TimedLoader(spec.loader, self)
+        return spec
+
+
+_profiler = None
+_reported = False
+
+
+def start_import_profiling() -> None:
+    """
+    Commence à chronométrer les imports (une seule fois par processus).
+
+    Les reruns Streamlit réexécutent app.py : les appels suivants sont ignorés.
+    """
+    global _profiler
+    if _profiler is not None or _reported:
+        return
+    _profiler = _ImportProfiler()
+    sys.meta_path.insert(0, _profiler)
+
+
+def report_import_profile(top: int = 8) -> None:
+    """
+    Arrête le profilage et affiche le résumé via le logging [PERF].
+
+    Affiche la durée totale des imports, les imports de premier niveau les
+    plus lents (durée cumulée, comme -X importtime) et l'état des
+    dépendances lourdes différées.
+
+    Args:
+        top: Nombre d'imports les plus lents à afficher
+    """
+    global _profiler, _reported
+    if _profiler is None:
+        return
+
+    profiler, _profiler = _profiler, None
+    try:
+        sys.meta_path.remove(profiler)
+    except ValueError:
+        pass
+    _reported = True
+
+    total = time.perf_counter() - profiler.started_at
+    premier_niveau = sorted(
+        ((name, duration) for name, duration, depth in profiler.timings if depth == 0),
+        key=lambda item: item[1],
+        reverse=True,
+    )
+
+    print(f"[PERF] 📦 Imports au démarrage: {total:.2f}s ({len(profiler.timings)} modules)")
+    for name, duration in premier_niveau[:top]:
+        print(f"[PERF]    {duration * 1000:8.1f} ms  {name}")
+
+    charges = [m for m in DEFERRED_MODULES if m in sys.modules]
+    differes = [m for m in DEFERRED_MODULES if m not in sys.modules]
+    if differes:
+        print(f"[PERF] 💤 Imports différés: {', '.join(differes)}")
+    if charges:
+        print(f"[PERF] ⚠️  Déjà chargés au démarrage: {', '.join(charges)}")
@@ -2,7 +2,11 @@
 Module utils - Utilitaires (data, images, texte)
 """
 
-from .data_manager import load_data, load_drafts, save_drafts, autosave_plat
+from .data_manager import (
+    load_data, load_drafts, save_drafts, autosave_plat,
+    load_menu_costs, load_chatbot_dishes, load_ingredient_index,
+)
+from .ingredient_index import IngredientIndex
 from .image_helpers import (
     get_plat_image_filename,
     get_plat_image_path,
@@ -16,6 +20,11 @@ __all__ = [
     'load_drafts',
     'save_drafts',
     'autosave_plat',
+    'load_menu_costs',
+    'load_chatbot_dishes',
+    'load_ingredient_index',
+    # Index des ingrédients
+    'IngredientIndex',
     # Image helpers
     'get_plat_image_filename',
     'get_plat_image_path',
@@ -7,6 +7,10 @@ import os
 import pandas as pd
 import streamlit as st
 
+from config import RECIPES_PATH, INGREDIENTS_PATH, EXCEL_SNAPSHOT_PATH
+from modules.utils.excel_snapshot import load_excel_sources
+from modules.utils.ingredient_index import IngredientIndex
+
 
 # ============================================================================
 # GESTION DES BROUILLONS (JSON)
@@ -81,6 +85,30 @@ def autosave_plat(plat_data: dict) -> None:
 # CHARGEMENT DES DONNÉES EXCEL
 # ============================================================================
 
+def _normaliser_sources(recettes: pd.DataFrame, ingredients: pd.DataFrame):
+    """
+    Normalise les DataFrames bruts lus depuis Excel.
+    
+    Note:
+        - Unifie les noms des variantes de Panini Pizz
+        - Conserve les noms originaux dans la colonne "original_plat"
+    """
+    # Stockage du nom original
+    recettes["original_plat"] = recettes["plat"]
+    ingredients["original_plat"] = ingredients["plat"]
+
+    # Unification des noms pour Panini Pizz
+    unification_map = {
+        'panini pizz base crème': 'panini pizz',
+        'panini pizz base tomate': 'panini pizz'
+    }
+    
+    recettes['plat'] = recettes['plat'].replace(unification_map)
+    ingredients['plat'] = ingredients['plat'].replace(unification_map)
+    
+    return recettes, ingredients
+
+
 @st.cache_data
 def load_data():
     """
@@ -91,28 +119,80 @@ def load_data():
         
     Note:
         - Utilise le cache Streamlit pour optimiser les performances
-        - Unifie les noms des variantes de Panini Pizz
-        - Conserve les noms originaux dans la colonne "original_plat"
+        - Relit le snapshot binaire (data/cache) tant que les .xlsx n'ont pas
+          changé, sans re-parser Excel
+        - Voir _normaliser_sources pour la normalisation appliquée
     """
     try:
-        recettes = pd.read_excel("data/recettes_complet_MAJ2.xlsx")
-        ingredients = pd.read_excel("data/ingredients_nettoyes_et_standardises.xlsx")
-        
-        # Stockage du nom original
-        recettes["original_plat"] = recettes["plat"]
-        ingredients["original_plat"] = ingredients["plat"]
-
-        # Unification des noms pour Panini Pizz
-        unification_map = {
-            'panini pizz base crème': 'panini pizz',
-            'panini pizz base tomate': 'panini pizz'
-        }
-        
-        recettes['plat'] = recettes['plat'].replace(unification_map)
-        ingredients['plat'] = ingredients['plat'].replace(unification_map)
-        
+        recettes, ingredients = load_excel_sources(
+            {"recettes": RECIPES_PATH, "ingredients": INGREDIENTS_PATH},
+            _normaliser_sources,
+            EXCEL_SNAPSHOT_PATH,
+        )
         return recettes, ingredients
         
     except Exception as e:
         st.error(f"❌ Erreur lors du chargement des données : {e}")
         return None, None
+
+
+@st.cache_data(show_spinner=False)
+def load_menu_costs(recettes: pd.DataFrame, ingredients: pd.DataFrame):
+    """
+    Calcule (une fois par version des données) les coûts et marges de la carte.
+    
+    Args:
+        recettes: DataFrame des recettes retourné par load_data
+        ingredients: DataFrame des ingrédients retourné par load_data
+        
+    Returns:
+        tuple: (menu_df, lignes_df)
+            - menu_df : une ligne par plat (coût matière, prix, marge)
+            - lignes_df : coût HT de chaque ligne d'ingrédient
+    """
+    # Import local : modules.business importe lui-même modules.utils
+    from modules.business.menu_costing import compute_ingredient_costs, compute_menu_costs
+
+    lignes = compute_ingredient_costs(ingredients)
+    menu = compute_menu_costs(recettes, ingredients, lignes=lignes)
+    return menu, lignes
+
+
+@st.cache_data(show_spinner=False)
+def load_chatbot_dishes(recettes: pd.DataFrame, ingredients: pd.DataFrame) -> pd.DataFrame:
+    """
+    Prépare (à la demande, une fois par version des données) la table du chatbot.
+    
+    Args:
+        recettes: DataFrame des recettes retourné par load_data
+        ingredients: DataFrame des ingrédients retourné par load_data
+        
+    Returns:
+        DataFrame des recettes enrichi des colonnes cout_matiere, prix_ttc,
+        prix_ht et marge_pct (mêmes coûts et marges HT que les vues)
+    """
+    menu, _ = load_menu_costs(recettes, ingredients)
+    return recettes.merge(
+        menu[["nom", "cout_matiere", "prix_ttc", "prix_ht", "marge_pct"]],
+        left_on="plat",
+        right_on="nom",
+        how="left",
+    )
+
+
+@st.cache_resource(show_spinner=False)
+def load_ingredient_index(ingredients: pd.DataFrame) -> IngredientIndex:
+    """
+    Construit (une fois par version des données) l'index plat → lignes d'ingrédients.
+    
+    Args:
+        ingredients: DataFrame des ingrédients retourné par load_data
+        
+    Returns:
+        IngredientIndex immuable, partagé entre les sessions
+        
+    Example:
+        >>> index = load_ingredient_index(ingredients)
+        >>> ingr_plat = index.select(ingredients, "Savoyarde S").copy()
+    """
+    return IngredientIndex(ingredients)
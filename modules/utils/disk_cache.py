@@ -0,0 +1,312 @@
+"""
+Cache à deux niveaux : mémoire (LRU) devant un stockage disque adressé par contenu
+
+- Niveau 1 : MemoCache en mémoire (voir memo_cache), partagé par le processus
+- Niveau 2 : un fichier par entrée, nommé par l'empreinte de la clé et des
+  dépendances, sérialisé en pickle (protocole 5) avec les buffers NumPy /
+  pandas écrits hors bande, sans copie ni compression gzip
+- Expiration (TTL), invalidation par dépendances (mtime d'un fichier Excel,
+  version des agrégats de ventes...) et plafond de taille du répertoire
+
+Compression lz4 optionnelle (pip install lz4) : utilisée pour l'écriture si
+le module est installé.
+"""
+
+import hashlib
+import json
+import os
+import pickle
+import struct
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Optional
+
+from modules.utils.memo_cache import MemoCache
+
+try:
+    import lz4.frame as _lz4
+except ImportError:  # dépendance optionnelle
+    _lz4 = None
+
+
+_MAGIC = b"TTC1"
+_MISSING = object()
+
+
+def dependency_signature(deps: Iterable[Any] = ()) -> str:
+    """
+    Signature des dépendances d'une entrée.
+
+    Un chemin (Path) est représenté par son mtime et sa taille ; toute autre
+    valeur (version de base, identifiant de synchronisation...) par son repr.
+    """
+    parts = []
+    for dep in deps:
+        if isinstance(dep, Path):
+            try:
+                stat = dep.stat()
+                parts.append(f"{dep}:{stat.st_mtime_ns}:{stat.st_size}")
+            except OSError:
+                parts.append(f"{dep}:absent")
+        else:
+            parts.append(repr(dep))
+    return "|".join(parts)
+
+
+def _encode(value: Any) -> bytes:
+    """Sérialise en pickle 5 ; les buffers hors bande suivent le flux principal."""
+    buffers = []
+    data = pickle.dumps(value, protocol=5, buffer_callback=buffers.append)
+    raws = [buffer.raw() for buffer in buffers]
+
+    codec = "lz4" if _lz4 is not None else "raw"
+    header = json.dumps({
+        "codec": codec,
+        "sizes": [len(data)] + [raw.nbytes for raw in raws],
+    }).encode()
+    chunks = [data, *raws]
+    if codec == "lz4":
+        chunks = [_lz4.compress(chunk) for chunk in chunks]
+        header = json.dumps({
+            "codec": codec,
+            "sizes": [len(chunk) for chunk in chunks],
+        }).encode()
+    return b"".join([_MAGIC, struct.pack("<I", len(header)), header, *chunks])
+
+
+def _decode(blob: bytearray) -> Any:
+    """Inverse de _encode (les buffers hors bande sont lus sans copie en mode raw)."""
+    if blob[:4] != _MAGIC:
+        raise ValueError("Format de cache inconnu")
+    (header_len,) = struct.unpack("<I", blob[4:8])
+    header = json.loads(blob[8:8 + header_len])
+    view = memoryview(blob)
+    offset = 8 + header_len
+    chunks = []
+    for size in header["sizes"]:
+        chunks.append(view[offset:offset + size])
+        offset += size
+    if header["codec"] == "lz4":
+        if _lz4 is None:
+            raise ValueError("Entrée compressée en lz4, module lz4 absent")
+        chunks = [_lz4.decompress(chunk) for chunk in chunks]
+    return pickle.loads(chunks[0], buffers=chunks[1:])
+
+
+class TwoTierCache:
+    """
+    Cache clé/valeur mémoire + disque avec TTL, dépendances et plafond de taille.
+
+    Example:
+        >>> cache = TwoTierCache(Path("data/streamlit_cache"), ttl=3600)
+        >>> menu = cache.get_or_compute(
+        ...     "menu_costs", lambda: compute_menu_costs(recettes, ingredients),
+        ...     deps=[RECIPES_PATH, INGREDIENTS_PATH],
+        ... )
+    """
+
+    def __init__(self, directory: Path, ttl: Optional[float] = 3600,
+                 max_disk_bytes: int = 256 * 1024 * 1024,
+                 max_memory_entries: int = 64,
+                 max_memory_bytes: int = 64 * 1024 * 1024):
+        self.directory = Path(directory)
+        self.ttl = ttl
+        self.max_disk_bytes = max_disk_bytes
+        self.memory = MemoCache(max_entries=max_memory_entries, ttl=ttl, max_bytes=max_memory_bytes)
+        self._lock = threading.Lock()
+        self._disk_bytes = None  # calculé au premier besoin
+        self.disk_hits = 0
+        self.disk_misses = 0
+        self.disk_evictions = 0
+
+    # ------------------------------------------------------------------
+    # Adressage
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def entry_id(key: str, deps: Iterable[Any] = ()) -> str:
+        """Empreinte d'une entrée : clé + signature des dépendances."""
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(key.encode())
+        digest.update(b"\0")
+        digest.update(dependency_signature(deps).encode())
+        return digest.hexdigest()
+
+    def _path(self, entry_id: str) -> Path:
+        return self.directory / entry_id[:2] / f"{entry_id}.bin"
+
+    # ------------------------------------------------------------------
+    # Lecture / écriture
+    # ------------------------------------------------------------------
+
+    def get(self, key: str, deps: Iterable[Any] = (), default: Any = None) -> Any:
+        """
+        Retourne la valeur mémorisée pour (clé, dépendances), ou default.
+
+        Une dépendance modifiée change l'empreinte : l'ancienne entrée n'est
+        plus jamais lue et finit évincée par le plafond de taille.
+        """
+        entry_id = self.entry_id(key, deps)
+        value = self.memory.get(entry_id, _MISSING)
+        if value is not _MISSING:
+            return value
+
+        path = self._path(entry_id)
+        try:
+            stat = path.stat()
+            if self.ttl is not None and time.time() - stat.st_mtime >= self.ttl:
+                self._unlink(path)
+                self.disk_misses += 1
+                return default
+            value = _decode(self._read(path, stat.st_size))
+        except (OSError, ValueError, pickle.UnpicklingError, EOFError, AttributeError, ImportError):
+            self.disk_misses += 1
+            return default
+
+        # Accès récent : conserve l'entrée lors des évictions (atime n'est pas fiable)
+        try:
+            os.utime(path, (time.time(), stat.st_mtime))
+        except OSError:
+            pass
+        self.disk_hits += 1
+        self.memory.put(entry_id, value)
+        return value
+
+    @staticmethod
+    def _read(path: Path, size: int) -> bytearray:
+        """Lit un fichier dans un tampon modifiable (tableaux NumPy restaurés inscriptibles)."""
+        blob = bytearray(size)
+        with open(path, "rb") as f:
+            if f.readinto(blob) != size:
+                raise EOFError(f"Entrée de cache tronquée: {path}")
+        return blob
+
+    def set(self, key: str, value: Any, deps: Iterable[Any] = ()) -> bool:
+        """
+        Mémorise une valeur (mémoire + disque, écriture atomique).
+
+        Returns:
+            True si l'écriture sur disque a réussi
+        """
+        deps = list(deps)
+        entry_id = self.entry_id(key, deps)
+        self.memory.put(entry_id, value)
+
+        path = self._path(entry_id)
+        try:
+            blob = _encode(value)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+            previous = path.stat().st_size if path.exists() else 0
+            tmp_path.write_bytes(blob)
+            os.replace(tmp_path, path)
+        except (OSError, pickle.PicklingError, TypeError, AttributeError):
+            return False
+
+        with self._lock:
+            self._disk_bytes = self._scan_size() if self._disk_bytes is None else (
+                self._disk_bytes + len(blob) - previous
+            )
+            if self._disk_bytes > self.max_disk_bytes:
+                self._evict()
+        return True
+
+    def get_or_compute(self, key: str, compute: Callable[[], Any], deps: Iterable[Any] = ()) -> Any:
+        """Valeur mémorisée, ou calculée puis mémorisée."""
+        deps = list(deps)
+        value = self.get(key, deps, default=_MISSING)
+        if value is _MISSING:
+            value = compute()
+            self.set(key, value, deps)
+        return value
+
+    def delete(self, key: str, deps: Iterable[Any] = ()) -> None:
+        """Supprime une entrée (mémoire et disque)."""
+        entry_id = self.entry_id(key, deps)
+        self.memory.discard(entry_id)
+        self._unlink(self._path(entry_id))
+
+    def clear(self) -> None:
+        """Vide les deux niveaux."""
+        self.memory.clear()
+        for path in self._entries():
+            self._unlink(path)
+        with self._lock:
+            self._disk_bytes = 0
+
+    # ------------------------------------------------------------------
+    # Plafond de taille (façon du)
+    # ------------------------------------------------------------------
+
+    def _entries(self):
+        if not self.directory.exists():
+            return []
+        return list(self.directory.glob("*/*.bin"))
+
+    def _scan_size(self) -> int:
+        total = 0
+        for path in self._entries():
+            try:
+                total += path.stat().st_size
+            except OSError:
+                pass
+        return total
+
+    def _unlink(self, path: Path) -> None:
+        try:
+            size = path.stat().st_size
+            path.unlink()
+        except OSError:
+            return
+        with self._lock:
+            if self._disk_bytes is not None:
+                self._disk_bytes -= size
+
+    def _evict(self) -> None:
+        """
+        Supprime les entrées expirées puis les moins récemment utilisées
+        jusqu'à repasser sous 90 % du plafond (appelé sous verrou).
+        """
+        now = time.time()
+        entries = []
+        for path in self._entries():
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_atime, stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, _, size, _ in entries)
+        target = int(self.max_disk_bytes * 0.9)
+        # Expirées d'abord, puis par dernier accès croissant
+        entries.sort(key=lambda e: (
+            not (self.ttl is not None and now - e[1] >= self.ttl), e[0]
+        ))
+        for _, mtime, size, path in entries:
+            expired = self.ttl is not None and now - mtime >= self.ttl
+            if total <= target and not expired:
+                break
+            try:
+                path.unlink()
+            except OSError:
+                continue
+            total -= size
+            self.disk_evictions += 1
+        self._disk_bytes = total
+
+    def stats(self) -> Dict:
+        """Compteurs des deux niveaux."""
+        with self._lock:
+            if self._disk_bytes is None:
+                self._disk_bytes = self._scan_size()
+            disk_bytes = self._disk_bytes
+        return {
+            "memory": self.memory.stats(),
+            "disk_hits": self.disk_hits,
+            "disk_misses": self.disk_misses,
+            "disk_evictions": self.disk_evictions,
+            "disk_bytes": disk_bytes,
+            "max_disk_bytes": self.max_disk_bytes,
+            "codec": "lz4" if _lz4 is not None else "raw",
+        }
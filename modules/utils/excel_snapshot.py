@@ -0,0 +1,150 @@
+"""
+Snapshot binaire des sources Excel (recettes et ingrédients)
+
+Le parsing openpyxl des fichiers .xlsx est l'étape la plus lente du démarrage.
+Les DataFrames normalisés sont donc sérialisés en pickle (protocole 5) et
+rechargés tant que les fichiers sources n'ont pas changé (mtime, taille, hash).
+"""
+
+import hashlib
+import os
+import pickle
+from pathlib import Path
+from typing import Callable, Dict, Optional, Tuple
+
+import pandas as pd
+
+
+# À incrémenter dès que la normalisation des sources change
+SNAPSHOT_FORMAT_VERSION = 1
+
+
+def _file_hash(path: Path) -> str:
+    """Calcule le hash SHA-256 du contenu d'un fichier."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _file_signature(path: Path, with_hash: bool = True) -> Dict:
+    """Retourne la signature (mtime, taille, hash) d'un fichier source."""
+    stat = os.stat(path)
+    signature = {"mtime_ns": stat.st_mtime_ns, "size": stat.st_size}
+    if with_hash:
+        signature["sha256"] = _file_hash(path)
+    return signature
+
+
+def _read_snapshot(snapshot_path: Path) -> Optional[Dict]:
+    """Lit le snapshot s'il existe et est au format courant."""
+    try:
+        with open(snapshot_path, "rb") as f:
+            payload = pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ImportError):
+        return None
+
+    if not isinstance(payload, dict) or payload.get("version") != SNAPSHOT_FORMAT_VERSION:
+        return None
+    return payload
+
+
+def _write_snapshot(snapshot_path: Path, payload: Dict) -> None:
+    """Écrit le snapshot de manière atomique (fichier temporaire + rename)."""
+    snapshot_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = snapshot_path.with_suffix(snapshot_path.suffix + ".tmp")
+    with open(tmp_path, "wb") as f:
+        pickle.dump(payload, f, protocol=5)
+    os.replace(tmp_path, snapshot_path)
+
+
+def _sources_unchanged(stored: Dict, sources: Dict[str, Path]) -> Tuple[bool, bool]:
+    """
+    Compare les signatures stockées aux fichiers sources.
+
+    Returns:
+        (valide, signatures_a_rafraichir) : le snapshot est réutilisable, et
+        les mtimes ont bougé sans que le contenu ne change (touch, copie...).
+    """
+    if set(stored) != set(sources):
+        return False, False
+
+    refresh = False
+    for name, path in sources.items():
+        previous = stored[name]
+        current = _file_signature(path, with_hash=False)
+        if current["size"] != previous.get("size"):
+            return False, False
+        if current["mtime_ns"] != previous.get("mtime_ns"):
+            # mtime modifié : seul le hash fait foi
+            if _file_hash(path) != previous.get("sha256"):
+                return False, False
+            refresh = True
+    return True, refresh
+
+
+def load_excel_sources(
+    sources: Dict[str, Path],
+    normalize: Callable[..., Tuple[pd.DataFrame, ...]],
+    snapshot_path: Path,
+) -> Tuple[pd.DataFrame, ...]:
+    """
+    Charge les sources Excel normalisées, depuis le snapshot si possible.
+
+    Args:
+        sources: {nom: chemin .xlsx}, dans l'ordre attendu par normalize
+        normalize: Fonction recevant les DataFrames bruts (dans l'ordre de sources)
+                   et retournant le tuple de DataFrames normalisés
+        snapshot_path: Chemin du fichier snapshot
+
+    Returns:
+        Tuple de DataFrames normalisés
+
+    Example:
+        >>> recettes, ingredients = load_excel_sources(
+        ...     {"recettes": RECIPES_PATH, "ingredients": INGREDIENTS_PATH},
+        ...     _normaliser_sources,
+        ...     EXCEL_SNAPSHOT_PATH,
+        ... )
+    """
+    sources = {name: Path(path) for name, path in sources.items()}
+    snapshot_path = Path(snapshot_path)
+
+    payload = _read_snapshot(snapshot_path)
+    if payload is not None:
+        valid, refresh = _sources_unchanged(payload.get("sources", {}), sources)
+        if valid:
+            if refresh:
+                payload["sources"] = {
+                    name: _file_signature(path) for name, path in sources.items()
+                }
+                try:
+                    _write_snapshot(snapshot_path, payload)
+                except OSError:
+                    pass
+            print(f"[PERF] 📦 Sources Excel chargées depuis le snapshot {snapshot_path.name}")
+            return payload["frames"]
+
+    # Snapshot absent ou périmé : parsing Excel puis écriture du snapshot
+    signatures = {name: _file_signature(path) for name, path in sources.items()}
+    frames = normalize(*(pd.read_excel(path) for path in sources.values()))
+
+    try:
+        _write_snapshot(snapshot_path, {
+            "version": SNAPSHOT_FORMAT_VERSION,
+            "sources": signatures,
+            "frames": frames,
+        })
+    except OSError as e:
+        print(f"[WARN] Impossible d'écrire le snapshot {snapshot_path}: {e}")
+
+    return frames
+
+
+def clear_excel_snapshot(snapshot_path: Path) -> None:
+    """Supprime le snapshot pour forcer un nouveau parsing des fichiers Excel."""
+    try:
+        Path(snapshot_path).unlink()
+    except FileNotFoundError:
+        pass
@@ -4,9 +4,9 @@ Utilitaires de gestion des images
 
 import base64
 import os
-from functools import lru_cache
 
 from modules.data import IMAGES_PLATS, IMAGE_FALLBACK
+from modules.utils.memo_cache import MemoCache
 from modules.utils.text_helpers import normalize_label
 
 
@@ -16,6 +16,9 @@ IMAGES_PLATS_LOOKUP = {
     for name, filename in IMAGES_PLATS.items()
 }
 
+# Data URIs des images pleine résolution, bornées en octets
+_DATA_URI_CACHE = MemoCache(max_entries=256, ttl=None, max_bytes=32 * 1024 * 1024)
+
 
 def get_plat_image_filename(plat_nom: str) -> str:
     """
@@ -74,7 +77,6 @@ def get_plat_image_path(plat_nom: str) -> str:
     return fallback_path if os.path.exists(fallback_path) else ""
 
 
-@lru_cache(maxsize=256)
 def get_image_data_uri(image_path: str) -> str:
     """
     Encode une image en data URI pour affichage HTML inline.
@@ -87,7 +89,8 @@ def get_image_data_uri(image_path: str) -> str:
         Chaîne vide si l'image n'existe pas
         
     Note:
-        Utilise un cache LRU pour optimiser les performances
+        Utilise un cache LRU borné en octets ; pour les cartes et fiches,
+        préférer les miniatures (image_thumbnails.get_thumbnail_url)
         
     Example:
         >>> get_image_data_uri("images/savoyarde.webp")
@@ -96,6 +99,10 @@ def get_image_data_uri(image_path: str) -> str:
     if not image_path or not os.path.exists(image_path):
         return ""
     
+    cached = _DATA_URI_CACHE.get(image_path)
+    if cached is not None:
+        return cached
+    
     # Détection du type MIME
     mime_by_ext = {
         ".png": "image/png",
@@ -112,6 +119,8 @@ def get_image_data_uri(image_path: str) -> str:
     try:
         with open(image_path, "rb") as f:
             data = base64.b64encode(f.read()).decode("utf-8")
-        return f"data:{mime_type};base64,{data}"
+        data_uri = f"data:{mime_type};base64,{data}"
+        _DATA_URI_CACHE.put(image_path, data_uri)
+        return data_uri
     except Exception:
         return ""
@@ -0,0 +1,286 @@
+"""
+Miniatures WebP des images de plats, par contexte d'affichage
+
+Les images sources (images/) sont réduites à la taille réellement affichée
+(carte de la grille, image de la fiche) et encodées en WebP. Les miniatures
+sont mises en cache sur disque, nommées par le hash du contenu source : une
+image remplacée produit une nouvelle miniature, sans invalidation manuelle.
+
+Pillow est optionnel (pip install Pillow) : sans lui, l'image source est
+utilisée telle quelle.
+
+Si le service de fichiers statiques de Streamlit est activé
+(server.enableStaticServing), les miniatures sont publiées dans static/plats
+sous un nom dérivé de leur contenu et référencées par URL : le navigateur
+les garde en cache au lieu de recevoir leurs octets à chaque rerun. Sinon,
+elles sont intégrées en data URI.
+
+Génération de toutes les miniatures (étape de build) :
+    python -m modules.utils.image_thumbnails
+"""
+
+import base64
+import hashlib
+import os
+import shutil
+import sys
+import threading
+from pathlib import Path
+from typing import Dict, Optional, Set, Tuple
+
+import streamlit as st
+
+from config import STATIC_IMAGES_DIR, STATIC_URL_PREFIX, THUMBNAIL_DIR
+from modules.utils.memo_cache import MemoCache
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # dépendance optionnelle
+    Image = None
+
+
+# Contexte -> (largeur max, hauteur max, qualité WebP), à la taille affichée (grille sur 4 colonnes)
+THUMBNAIL_CONTEXTS: Dict[str, Tuple[int, int, int]] = {
+    "card": (320, 320, 55),
+    "hero": (960, 960, 78),
+}
+
+# À incrémenter si le rendu des miniatures change
+THUMBNAIL_FORMAT_VERSION = 1
+
+# Formats réduits (les SVG et GIF animés sont servis tels quels)
+_RESIZABLE_EXTENSIONS = {".png", ".jpg", ".jpeg", ".webp"}
+
+_MIME_BY_EXT = {
+    ".png": "image/png",
+    ".jpg": "image/jpeg",
+    ".jpeg": "image/jpeg",
+    ".webp": "image/webp",
+    ".gif": "image/gif",
+    ".svg": "image/svg+xml",
+}
+
+# Data URIs en mémoire, bornées en octets (et non en nombre d'entrées)
+_DATA_URI_CACHE = MemoCache(max_entries=1024, ttl=None, max_bytes=16 * 1024 * 1024)
+
+# Hash des sources par signature (chemin, mtime, taille)
+_source_hashes: Dict[Tuple[str, int, int], str] = {}
+_lock = threading.Lock()
+
+
+def source_hash(image_path: str) -> Optional[str]:
+    """Hash SHA-256 (tronqué) du contenu d'une image, recalculé seulement si le fichier change."""
+    try:
+        stat = os.stat(image_path)
+    except OSError:
+        return None
+    signature = (str(image_path), stat.st_mtime_ns, stat.st_size)
+    digest = _source_hashes.get(signature)
+    if digest is None:
+        with open(image_path, "rb") as f:
+            digest = hashlib.sha256(f.read()).hexdigest()[:20]
+        with _lock:
+            _source_hashes[signature] = digest
+    return digest
+
+
+def thumbnail_path(image_path: str, context: str = "card") -> str:
+    """
+    Chemin de la miniature WebP d'une image (générée au besoin).
+
+    Args:
+        image_path: Chemin de l'image source
+        context: Contexte d'affichage (clé de THUMBNAIL_CONTEXTS)
+
+    Returns:
+        Chemin de la miniature, ou de l'image source si Pillow est absent,
+        si le format n'est pas réductible ou si la génération échoue.
+        Chaîne vide si l'image source n'existe pas.
+
+    Raises:
+        KeyError: Si le contexte est inconnu
+    """
+    max_w, max_h, quality = THUMBNAIL_CONTEXTS[context]
+    if not image_path or not os.path.exists(image_path):
+        return ""
+    if Image is None or os.path.splitext(image_path)[1].lower() not in _RESIZABLE_EXTENSIONS:
+        return image_path
+
+    digest = source_hash(image_path)
+    target = THUMBNAIL_DIR / f"{digest}_{context}_v{THUMBNAIL_FORMAT_VERSION}.webp"
+    if not target.exists():
+        try:
+            with Image.open(image_path) as img:
+                img = ImageOps.exif_transpose(img)
+                if img.mode not in ("RGB", "RGBA"):
+                    img = img.convert("RGBA" if "transparency" in img.info else "RGB")
+                img.thumbnail((max_w, max_h), Image.Resampling.LANCZOS)
+                target.parent.mkdir(parents=True, exist_ok=True)
+                tmp = target.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+                img.save(tmp, format="WEBP", quality=quality, method=6)
+            os.replace(tmp, target)
+        except (OSError, ValueError) as e:
+            print(f"[WARN] Miniature impossible pour {image_path}: {e}")
+            return image_path
+
+    # Miniature plus lourde que la source (petite image déjà optimisée) : garder
+    # la source, à la génération comme aux appels suivants (chemin stable)
+    if target.stat().st_size >= os.path.getsize(image_path):
+        return image_path
+    return str(target)
+
+
+def get_thumbnail_data_uri(image_path: str, context: str = "card") -> str:
+    """
+    Data URI de la miniature d'une image, pour affichage HTML inline.
+
+    Args:
+        image_path: Chemin de l'image source
+        context: Contexte d'affichage (clé de THUMBNAIL_CONTEXTS)
+
+    Returns:
+        Data URI (base64), chaîne vide si l'image n'existe pas
+
+    Example:
+        >>> get_thumbnail_data_uri("images/savoyarde.webp", "card")
+        'data:image/webp;base64,UklGR...'
+    """
+    path = thumbnail_path(image_path, context)
+    if not path:
+        return ""
+
+    key = f"{context}:{source_hash(image_path)}:{path}"
+    data_uri = _DATA_URI_CACHE.get(key)
+    if data_uri is None:
+        mime_type = _MIME_BY_EXT.get(os.path.splitext(path)[1].lower(), "image/png")
+        try:
+            with open(path, "rb") as f:
+                data = base64.b64encode(f.read()).decode("utf-8")
+        except OSError:
+            return ""
+        data_uri = f"data:{mime_type};base64,{data}"
+        _DATA_URI_CACHE.put(key, data_uri)
+    return data_uri
+
+
+def static_serving_enabled() -> bool:
+    """Indique si Streamlit sert le dossier static/ (server.enableStaticServing)."""
+    return bool(st.get_option("server.enableStaticServing"))
+
+
+def publish_static_image(image_path: str, context: str = "card") -> str:
+    """
+    Publie la miniature d'une image dans static/plats et retourne son URL.
+
+    Le fichier publié est nommé par le hash de son contenu : son URL ne
+    change que si l'image change, le navigateur peut donc la garder en cache.
+
+    Args:
+        image_path: Chemin de l'image source
+        context: Contexte d'affichage (clé de THUMBNAIL_CONTEXTS)
+
+    Returns:
+        URL relative (ex: 'app/static/plats/3f2a....webp?v=3f2a...'),
+        chaîne vide si l'image n'existe pas ou ne peut être publiée
+    """
+    path = thumbnail_path(image_path, context)
+    if not path:
+        return ""
+
+    digest = source_hash(path)
+    name = f"{digest}{os.path.splitext(path)[1].lower()}"
+    target = STATIC_IMAGES_DIR / name
+    if not target.exists():
+        try:
+            target.parent.mkdir(parents=True, exist_ok=True)
+            tmp = target.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+            shutil.copyfile(path, tmp)
+            os.replace(tmp, target)
+        except OSError as e:
+            print(f"[WARN] Publication statique impossible pour {image_path}: {e}")
+            return ""
+    # ?v= : le serveur Tornado de Streamlit envoie alors un Cache-Control longue durée
+    return f"{STATIC_URL_PREFIX}/{STATIC_IMAGES_DIR.name}/{name}?v={digest}"
+
+
+def get_thumbnail_url(image_path: str, context: str = "card") -> str:
+    """
+    Source à placer dans une balise <img> pour la miniature d'une image.
+
+    Args:
+        image_path: Chemin de l'image source
+        context: Contexte d'affichage (clé de THUMBNAIL_CONTEXTS)
+
+    Returns:
+        URL statique si static/ est servi, data URI sinon (ou en cas d'échec
+        de publication), chaîne vide si l'image n'existe pas
+    """
+    if static_serving_enabled():
+        url = publish_static_image(image_path, context)
+        if url:
+            return url
+    return get_thumbnail_data_uri(image_path, context)
+
+
+def thumbnail_cache_stats() -> Dict:
+    """Statistiques du cache mémoire des data URIs."""
+    return _DATA_URI_CACHE.stats()
+
+
+def build_thumbnails(images_dir: str = "images") -> Dict[str, int]:
+    """
+    Génère les miniatures de toutes les images, pour tous les contextes.
+
+    Args:
+        images_dir: Répertoire des images sources
+
+    Returns:
+        {contexte: taille totale des miniatures en octets}
+    """
+    totals = {context: 0 for context in THUMBNAIL_CONTEXTS}
+    for entry in sorted(Path(images_dir).iterdir()):
+        if entry.suffix.lower() not in _MIME_BY_EXT:
+            continue
+        for context in THUMBNAIL_CONTEXTS:
+            totals[context] += os.path.getsize(thumbnail_path(str(entry), context))
+    return totals
+
+
+def publish_static_images(images_dir: str = "images") -> Tuple[int, int]:
+    """
+    Publie toutes les miniatures dans static/plats et supprime les fichiers
+    qui ne correspondent plus à aucune image (images remplacées ou retirées).
+
+    Returns:
+        (nombre de fichiers publiés, nombre de fichiers supprimés)
+    """
+    published: Set[str] = set()
+    for entry in sorted(Path(images_dir).iterdir()):
+        if entry.suffix.lower() not in _MIME_BY_EXT:
+            continue
+        for context in THUMBNAIL_CONTEXTS:
+            url = publish_static_image(str(entry), context)
+            if url:
+                published.add(url.split("?")[0].rsplit("/", 1)[-1])
+
+    removed = 0
+    for path in STATIC_IMAGES_DIR.glob("*"):
+        if path.name not in published:
+            path.unlink()
+            removed += 1
+    return len(published), removed
+
+
+if __name__ == "__main__":
+    images_dir = sys.argv[1] if len(sys.argv) > 1 else "images"
+    if Image is None:
+        print("Pillow n'est pas installé : pip install Pillow")
+        sys.exit(1)
+    sources = sum(
+        os.path.getsize(p) for p in Path(images_dir).iterdir() if p.suffix.lower() in _MIME_BY_EXT
+    )
+    print(f"Sources: {sources / 1024:.0f} Ko")
+    for context, total in build_thumbnails(images_dir).items():
+        print(f"{context}: {total / 1024:.0f} Ko")
+    published, removed = publish_static_images(images_dir)
+    print(f"{STATIC_IMAGES_DIR}: {published} fichier(s) publié(s), {removed} supprimé(s)")
@@ -0,0 +1,89 @@
+"""
+Index des lignes d'ingrédients par plat (clé normalisée)
+"""
+
+from types import MappingProxyType
+
+import numpy as np
+import pandas as pd
+
+from modules.utils.text_helpers import normalize_label
+
+
+_EMPTY_POSITIONS = np.empty(0, dtype=np.intp)
+_EMPTY_POSITIONS.flags.writeable = False
+
+
+class IngredientIndex:
+    """
+    Index immuable : nom de plat normalisé → positions de ses lignes d'ingrédients.
+
+    Construit une seule fois à partir de la table des ingrédients, il remplace
+    les filtres `ingredients[ingredients["plat"].str.lower() == plat.lower()]`
+    (parcours complet de la table) par une recherche en O(1).
+
+    Les positions sont relatives à l'ordre des lignes de la table indexée ; elles
+    restent valables pour toute table dérivée ligne à ligne (copie, calculer_cout...).
+
+    Example:
+        >>> index = IngredientIndex(ingredients)
+        >>> ingr_plat = index.select(ingredients, "Chèvre-Miel S")
+    """
+
+    __slots__ = ("_positions", "_n_rows")
+
+    def __init__(self, ingredients_df: pd.DataFrame, column: str = "plat"):
+        keys = ingredients_df[column].map(normalize_label).to_numpy()
+        positions = {}
+        for key, pos in ingredients_df.groupby(keys, sort=False).indices.items():
+            pos = np.asarray(pos, dtype=np.intp)
+            pos.flags.writeable = False
+            positions[key] = pos
+
+        object.__setattr__(self, "_positions", MappingProxyType(positions))
+        object.__setattr__(self, "_n_rows", len(ingredients_df))
+
+    def __setattr__(self, name, value):
+        raise AttributeError("IngredientIndex est immuable")
+
+    def __contains__(self, plat: str) -> bool:
+        return normalize_label(plat) in self._positions
+
+    def __len__(self) -> int:
+        return len(self._positions)
+
+    def keys(self):
+        """Clés normalisées des plats indexés."""
+        return self._positions.keys()
+
+    def positions(self, plat: str) -> np.ndarray:
+        """
+        Retourne les positions (iloc) des lignes d'ingrédients d'un plat.
+
+        Args:
+            plat: Nom du plat (normalisé via normalize_label)
+
+        Returns:
+            Tableau NumPy en lecture seule (vide si le plat est inconnu)
+        """
+        return self._positions.get(normalize_label(plat), _EMPTY_POSITIONS)
+
+    def select(self, frame: pd.DataFrame, plat: str) -> pd.DataFrame:
+        """
+        Extrait les lignes d'un plat depuis la table indexée (ou une table alignée).
+
+        Args:
+            frame: Table des ingrédients, dans le même ordre que la table indexée
+            plat: Nom du plat
+
+        Returns:
+            Nouveau DataFrame avec les lignes du plat
+
+        Raises:
+            ValueError: Si la table n'a pas le nombre de lignes de la table indexée
+        """
+        if len(frame) != self._n_rows:
+            raise ValueError(
+                f"Table non alignée avec l'index ({len(frame)} lignes, {self._n_rows} attendues)"
+            )
+        return frame.iloc[self.positions(plat)]
@@ -0,0 +1,245 @@
+"""
+Mémorisation bornée des résultats de fonctions coûteuses
+
+Cache LRU avec expiration (TTL) et budget mémoire en octets, indexé par une
+empreinte structurelle des arguments (DataFrame, Series et tableaux NumPy
+hachés par leurs données, pas par leur repr tronqué).
+"""
+
+import hashlib
+import sys
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from typing import Any, Callable, Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+
+# Statistiques de toutes les fonctions mémorisées (nom qualifié -> cache)
+_REGISTRY: Dict[str, "MemoCache"] = {}
+_REGISTRY_LOCK = threading.Lock()
+
+
+def _update_digest(digest, value: Any) -> None:
+    """Ajoute une valeur à l'empreinte (récursif pour les conteneurs)."""
+    if isinstance(value, pd.DataFrame):
+        digest.update(b"DataFrame")
+        _update_digest(digest, value.index)
+        for name, column in value.items():
+            digest.update(repr(name).encode())
+            _update_digest(digest, column.to_numpy())
+    elif isinstance(value, (pd.Series, pd.Index)):
+        digest.update(type(value).__name__.encode())
+        digest.update(repr(value.name).encode())
+        if isinstance(value, pd.Series):
+            _update_digest(digest, value.index)
+        _update_digest(digest, value.to_numpy())
+    elif isinstance(value, np.ndarray):
+        digest.update(repr((str(value.dtype), value.shape)).encode())
+        if value.dtype.kind in "biufcmM":
+            digest.update(np.ascontiguousarray(value).tobytes())
+        else:
+            digest.update(repr(value.tolist()).encode())
+    elif isinstance(value, (list, tuple)):
+        digest.update(f"{type(value).__name__}[{len(value)}]".encode())
+        for item in value:
+            _update_digest(digest, item)
+    elif isinstance(value, dict):
+        digest.update(f"dict[{len(value)}]".encode())
+        for key in sorted(value, key=repr):
+            digest.update(repr(key).encode())
+            _update_digest(digest, value[key])
+    else:
+        digest.update(f"{type(value).__qualname__}:{value!r}".encode())
+
+
+def structural_key(*args, **kwargs) -> str:
+    """
+    Empreinte stable des arguments d'un appel (BLAKE2b, 128 bits).
+
+    Example:
+        >>> structural_key(df, marge=70) == structural_key(df.copy(), marge=70)
+        True
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    _update_digest(digest, args)
+    _update_digest(digest, kwargs)
+    return digest.hexdigest()
+
+
+def estimate_size(value: Any) -> int:
+    """Taille mémoire approximative d'un résultat, en octets."""
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(deep=True, index=True).sum())
+    if isinstance(value, (pd.Series, pd.Index)):
+        return int(value.memory_usage(deep=True))
+    if isinstance(value, np.ndarray):
+        return int(value.nbytes)
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return sys.getsizeof(value) + sum(estimate_size(item) for item in value)
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(
+            estimate_size(k) + estimate_size(v) for k, v in value.items()
+        )
+    return sys.getsizeof(value)
+
+
+class MemoCache:
+    """
+    Cache LRU borné en nombre d'entrées, en octets et en durée de vie.
+
+    Thread-safe : Streamlit exécute chaque session dans son propre thread.
+    Les résultats sont partagés entre les appels : ne pas les modifier.
+    """
+
+    def __init__(self, max_entries: int = 128, ttl: Optional[float] = 300,
+                 max_bytes: Optional[int] = 64 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # clé -> (stocké à, taille, résultat)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def _remove(self, key: str) -> None:
+        _, size, _ = self._entries.pop(key)
+        self._bytes -= size
+
+    def _purge_expired(self, now: float) -> None:
+        if self.ttl is None:
+            return
+        # Les entrées les moins récemment utilisées sont en tête ; une entrée
+        # relue est replacée en fin, donc l'ordre n'est pas celui d'insertion
+        expired = [key for key, (stored_at, _, _) in self._entries.items()
+                   if now - stored_at >= self.ttl]
+        for key in expired:
+            self._remove(key)
+        self.expirations += len(expired)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """Retourne le résultat mémorisé, ou default (absent ou expiré)."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                stored_at, _, result = entry
+                if self.ttl is None or time.monotonic() - stored_at < self.ttl:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return result
+                self._remove(key)
+                self.expirations += 1
+            self.misses += 1
+            return default
+
+    def put(self, key: str, result: Any) -> bool:
+        """
+        Mémorise un résultat, en évinçant les entrées expirées puis les plus anciennes.
+
+        Returns:
+            False si le résultat dépasse à lui seul le budget mémoire (non mémorisé)
+        """
+        size = estimate_size(result)
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            if self.max_bytes is not None and size > self.max_bytes:
+                return False
+
+            self._purge_expired(time.monotonic())
+            self._entries[key] = (time.monotonic(), size, result)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or (
+                self.max_bytes is not None and self._bytes > self.max_bytes
+            ):
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+            return True
+
+    def discard(self, key: str) -> None:
+        """Retire une entrée si elle est présente."""
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+    def clear(self) -> None:
+        """Vide le cache et remet les compteurs à zéro."""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            self.hits = self.misses = self.evictions = self.expirations = 0
+
+    def stats(self) -> Dict:
+        """Compteurs du cache (hits, misses, évictions, expirations, taille, octets)."""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "size": len(self._entries),
+                "bytes": self._bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "hit_rate": self.hits / total if total else 0.0,
+            }
+
+
+_MISSING = object()
+
+
+def memoize(func: Callable = None, *, ttl: Optional[float] = 300, max_entries: int = 128,
+            max_bytes: Optional[int] = 64 * 1024 * 1024) -> Callable:
+    """
+    Décorateur de mémorisation bornée (LRU + TTL + budget en octets).
+
+    Utilisable avec ou sans paramètres. La fonction décorée expose
+    `cache_stats()` et `cache_clear()` ; memoize_stats() regroupe les
+    statistiques de toutes les fonctions mémorisées.
+
+    Usage:
+        @memoize
+        def expensive_calculation(df):
+            ...
+
+        @memoize(ttl=600, max_bytes=16 * 1024 * 1024)
+        def other_calculation(param):
+            ...
+    """
+    def decorator(f: Callable) -> Callable:
+        cache = MemoCache(max_entries=max_entries, ttl=ttl, max_bytes=max_bytes)
+        name = f"{f.__module__}.{f.__qualname__}"
+        with _REGISTRY_LOCK:
+            _REGISTRY[name] = cache
+
+        @wraps(f)
+        def wrapper(*args, **kwargs):
+            key = structural_key(*args, **kwargs)
+            result = cache.get(key, _MISSING)
+            if result is _MISSING:
+                result = f(*args, **kwargs)
+                cache.put(key, result)
+            return result
+
+        wrapper.cache = cache
+        wrapper.cache_stats = cache.stats
+        wrapper.cache_clear = cache.clear
+        return wrapper
+
+    if func is not None:
+        return decorator(func)
+    return decorator
+
+
+def memoize_stats() -> Dict[str, Dict]:
+    """Statistiques de toutes les fonctions mémorisées, par nom qualifié."""
+    with _REGISTRY_LOCK:
+        caches = dict(_REGISTRY)
+    return {name: cache.stats() for name, cache in caches.items()}
@@ -13,20 +13,46 @@ Techniques d'optimisation :
 import streamlit as st
 import pandas as pd
 import json
+from collections import OrderedDict
 from pathlib import Path
 from datetime import datetime, timedelta
-from typing import Any, Callable, Optional, Dict, List
-import sqlite3
-import hashlib
-import pickle
-import gzip
+from typing import Any, Callable, Optional, Dict, Iterable, List
+
+from config import DISK_CACHE_MAX_BYTES, DISK_CACHE_TTL_SECONDS, SALES_DB_PATH, STREAMLIT_CACHE_DIR
+from modules.data.db_pool import get_pool
+from modules.utils.disk_cache import TwoTierCache
+from modules.utils.memo_cache import estimate_size, memoize
+
+
+_cache_backend = None
+
+
+def _bound_payloads(payloads: "OrderedDict", max_cached: int, max_bytes: int) -> None:
+    """Libère les contenus d'onglets les moins récemment vus au-delà des budgets."""
+    while len(payloads) > 1 and (
+        len(payloads) > max_cached
+        or sum(size for size, _ in payloads.values()) > max_bytes
+    ):
+        payloads.popitem(last=False)
+
+
+def get_cache_backend() -> TwoTierCache:
+    """Cache mémoire + disque partagé par le processus (créé au premier usage)."""
+    global _cache_backend
+    if _cache_backend is None:
+        _cache_backend = TwoTierCache(
+            STREAMLIT_CACHE_DIR,
+            ttl=DISK_CACHE_TTL_SECONDS,
+            max_disk_bytes=DISK_CACHE_MAX_BYTES,
+        )
+    return _cache_backend
 
 
 class StreamlitOptimizer:
     """Gestionnaire d'optimisation pour Streamlit"""
     
     def __init__(self):
-        self.cache_dir = Path("data/streamlit_cache")
+        self.cache_dir = STREAMLIT_CACHE_DIR
         self.cache_dir.mkdir(parents=True, exist_ok=True)
     
     @staticmethod
@@ -153,14 +179,33 @@ class StreamlitOptimizer:
     @staticmethod
     def lazy_tabs(
         tabs_config: Dict[str, Callable],
-        key: str = "lazy_tabs"
-    ):
+        key: str = "lazy_tabs",
+        max_cached: int = 3,
+        max_bytes: int = 32 * 1024 * 1024,
+        use_fragment: bool = True,
+    ) -> str:
         """
         Tabs qui chargent le contenu uniquement quand sélectionné
         
+        Contrairement à st.tabs (dont tous les blocs s'exécutent à chaque run),
+        un sélecteur segmenté n'exécute que le loader de l'onglet affiché.
+        Dans un st.fragment, changer d'onglet ne relance que ce bloc.
+        
+        Le loader peut afficher directement son contenu (retour None, rejoué
+        à chaque run de l'onglet) ou retourner un contenu : une fonction
+        d'affichage (appelée à chaque run) ou une valeur (st.write). Les
+        contenus retournés sont gardés en session, au plus `max_cached`
+        onglets et `max_bytes` octets (les moins récemment vus sont libérés).
+        
         Args:
             tabs_config: {label: content_loader_function}
             key: Clé unique
+            max_cached: Nombre maximal de contenus d'onglets gardés en session
+            max_bytes: Budget mémoire des contenus gardés en session
+            use_fragment: Isoler les onglets dans un st.fragment
+        
+        Returns:
+            Label de l'onglet affiché
         
         Usage:
             StreamlitOptimizer.lazy_tabs({
@@ -168,65 +213,117 @@ class StreamlitOptimizer:
                 "Comparaison": lambda: show_comparison(),
                 "Historique": lambda: show_history()
             })
+            # Après une modification des données d'un onglet :
+            StreamlitOptimizer.invalidate_lazy_tabs("lazy_tabs", "Historique")
         """
         tab_labels = list(tabs_config.keys())
-        tabs = st.tabs(tab_labels)
+        active_key = f"{key}_active_tab"
+        selector_key = f"{key}_selector"
+        
+        def keep_selection():
+            # Un clic sur l'onglet actif le désélectionne : on garde le précédent
+            if st.session_state[selector_key] not in tabs_config:
+                st.session_state[selector_key] = st.session_state.get(active_key, tab_labels[0])
+        
+        def render():
+            # Sélection portée par la clé du widget (paramètres constants d'un
+            # run à l'autre : le widget n'est pas recréé) ; onglet initial ou
+            # onglet disparu : premier onglet
+            if st.session_state.get(selector_key) not in tabs_config:
+                st.session_state[selector_key] = tab_labels[0]
+            selected = st.segmented_control(
+                key,
+                tab_labels,
+                key=selector_key,
+                on_change=keep_selection,
+                label_visibility="collapsed",
+            )
+            st.session_state[active_key] = selected
+            
+            payloads = st.session_state.setdefault(f"{key}_payloads", OrderedDict())
+            if selected in payloads:
+                payloads.move_to_end(selected)
+                content = payloads[selected][1]
+            else:
+                with st.spinner(f"Chargement {selected}..."):
+                    content = tabs_config[selected]()
+                if content is not None:
+                    payloads[selected] = (estimate_size(content), content)
+                    _bound_payloads(payloads, max_cached, max_bytes)
+            
+            # Affiche le contenu
+            if callable(content):
+                content()
+            elif content is not None:
+                st.write(content)
+            return selected
+        
+        if use_fragment:
+            st.fragment(render)()
+            return st.session_state[active_key]
+        return render()
+    
+    @staticmethod
+    def invalidate_lazy_tabs(key: str = "lazy_tabs", label: Optional[str] = None) -> None:
+        """
+        Libère le contenu gardé en session d'un onglet (ou de tous)
         
-        # Initialisation
-        if f"{key}_active_tab" not in st.session_state:
-            st.session_state[f"{key}_active_tab"] = 0
-        
-        for idx, (tab, label) in enumerate(zip(tabs, tab_labels)):
-            with tab:
-                cache_key = f"{key}_tab_{idx}_loaded"
-                
-                # Charge uniquement si tab active et pas déjà chargé
-                if cache_key not in st.session_state:
-                    with st.spinner(f"Chargement {label}..."):
-                        st.session_state[cache_key] = tabs_config[label]()
-                
-                # Affiche le contenu
-                content = st.session_state[cache_key]
-                if callable(content):
-                    content()
+        Args:
+            key: Clé passée à lazy_tabs
+            label: Onglet à recharger au prochain affichage (None = tous)
+        """
+        payloads = st.session_state.get(f"{key}_payloads")
+        if not payloads:
+            return
+        if label is None:
+            payloads.clear()
+        else:
+            payloads.pop(label, None)
     
     @staticmethod
-    def compress_cache(data: Any, cache_file: Path) -> bool:
+    def compress_cache(data: Any, cache_file: Path, deps: Iterable[Any] = ()) -> bool:
         """
-        Sauvegarde données avec compression gzip
+        Sauvegarde données dans le cache mémoire + disque
+        
+        Pickle 5 avec buffers hors bande (lz4 si installé) au lieu de gzip ;
+        entrée expirée après DISK_CACHE_TTL_SECONDS, répertoire plafonné à
+        DISK_CACHE_MAX_BYTES.
         
         Args:
             data: Données à sauvegarder
-            cache_file: Chemin du fichier cache
+            cache_file: Clé de l'entrée (nom de fichier ou chemin)
+            deps: Dépendances invalidant l'entrée quand elles changent
+                  (Path → mtime/taille, autre valeur → comparée telle quelle)
         
         Returns:
             True si succès
+        
+        Usage:
+            StreamlitOptimizer.compress_cache(df, "menu.pkl", deps=[RECIPES_PATH])
         """
-        try:
-            with gzip.open(cache_file, 'wb') as f:
-                pickle.dump(data, f, protocol=pickle.HIGHEST_PROTOCOL)
+        if get_cache_backend().set(str(cache_file), data, deps):
             return True
-        except Exception as e:
-            st.error(f"Erreur compression cache: {e}")
-            return False
+        st.error(f"Erreur écriture cache: {cache_file}")
+        return False
     
     @staticmethod
-    def load_compressed_cache(cache_file: Path) -> Optional[Any]:
+    def load_compressed_cache(cache_file: Path, deps: Iterable[Any] = ()) -> Optional[Any]:
         """
-        Charge données depuis cache compressé
+        Charge données depuis le cache mémoire + disque
         
         Args:
-            cache_file: Chemin du fichier cache
+            cache_file: Clé de l'entrée (comme pour compress_cache)
+            deps: Dépendances (comme pour compress_cache)
         
         Returns:
-            Données ou None si erreur
+            Données ou None si absentes, expirées ou invalidées
+        
+        Note:
+            L'objet retourné est celui du niveau mémoire, partagé entre les
+            appels et les sessions : ne pas le modifier (faire une copie,
+            ex: df.copy(), avant toute modification)
         """
-        try:
-            with gzip.open(cache_file, 'rb') as f:
-                return pickle.load(f)
-        except Exception as e:
-            st.error(f"Erreur lecture cache: {e}")
-            return None
+        return get_cache_backend().get(str(cache_file), deps)
     
     @staticmethod
     def incremental_loading(
@@ -275,46 +372,34 @@ class StreamlitOptimizer:
                     st.rerun()
     
     @staticmethod
-    def memoize_expensive(func: Callable, ttl: int = 300):
+    def memoize_expensive(func: Callable = None, ttl: int = 300, max_entries: int = 128,
+                          max_bytes: int = 64 * 1024 * 1024):
         """
         Mémorise les résultats de fonctions coûteuses
         
+        Cache borné (voir modules.utils.memo_cache) : LRU + expiration TTL,
+        budget mémoire en octets, clés calculées à partir des données des
+        DataFrame / tableaux NumPy passés en argument.
+        
         Args:
             func: Fonction à mémoriser
             ttl: Durée de vie en secondes
+            max_entries: Nombre maximal de résultats gardés
+            max_bytes: Budget mémoire des résultats (octets)
         
         Returns:
-            Fonction wrapped avec mémorisation
+            Fonction wrapped avec mémorisation (cache_stats(), cache_clear())
         
         Usage:
             @StreamlitOptimizer.memoize_expensive
             def expensive_calculation(param):
                 return heavy_compute(param)
-        """
-        cache = {}
-        timestamps = {}
-        
-        def wrapper(*args, **kwargs):
-            # Génère clé de cache
-            key = hashlib.md5(
-                str((args, sorted(kwargs.items()))).encode()
-            ).hexdigest()
-            
-            now = datetime.now().timestamp()
-            
-            # Vérifie si en cache et pas expiré
-            if key in cache and key in timestamps:
-                if now - timestamps[key] < ttl:
-                    return cache[key]
             
-            # Calcule et met en cache
-            result = func(*args, **kwargs)
-            cache[key] = result
-            timestamps[key] = now
-            
-            return result
-        
-        return wrapper
+            @StreamlitOptimizer.memoize_expensive(ttl=600)
+            def other_calculation(df):
+                return heavy_compute(df)
+        """
+        return memoize(func, ttl=ttl, max_entries=max_entries, max_bytes=max_bytes)
     
     @staticmethod
     def virtual_scroll(
@@ -398,36 +483,143 @@ def load_today_cache() -> dict:
         return json.load(f)
 
 
+# Fenêtres de comparaison par défaut : libellé -> décalage en jours
+COMPARISON_WINDOWS = {
+    "aujourdhui": 0,
+    "hier": 1,
+    "semaine_derniere": 7,
+}
+
+SALES_COMPARISON_COLUMNS = ["fenetre", "debut", "fin", "produit", "quantite", "ca"]
+
+
+def comparison_windows(
+    reference: Optional[datetime] = None,
+    until_hour: Optional[int] = None,
+    decalages: Optional[Dict[str, int]] = None,
+) -> List[tuple]:
+    """
+    Fenêtres "à la même heure" : [jour J-n 00:00:00, jour J-n + heure de coupure)
+    
+    Args:
+        reference: Instant de référence (défaut: maintenant, à la minute)
+        until_hour: Dernière heure incluse (défaut: heure courante de la référence)
+        decalages: {libellé: décalage en jours} (défaut: COMPARISON_WINDOWS)
+    
+    Returns:
+        Liste de (libellé, début inclus, fin exclue), horodatages 'YYYY-MM-DD HH:MM:SS'
+    """
+    if reference is None:
+        reference = datetime.now().replace(second=0, microsecond=0)
+    if decalages is None:
+        decalages = COMPARISON_WINDOWS
+    
+    windows = []
+    for label, jours in decalages.items():
+        jour = (reference - timedelta(days=jours)).strftime("%Y-%m-%d")
+        if until_hour is None:
+            fin = f"{jour} {reference:%H:%M:%S}"
+        else:
+            # "24:00:00" reste une borne valide en comparaison de chaînes
+            fin = f"{jour} {until_hour + 1:02d}:00:00"
+        windows.append((label, f"{jour} 00:00:00", fin))
+    return windows
+
+
 @StreamlitOptimizer.cached_data(ttl=300)
-def load_yesterday_data(until_hour: int = 23) -> pd.DataFrame:
-    """Charge les données d'hier depuis SQLite (optimisé)"""
-    db_path = Path("data/kezia_sales.db")
+def load_sales_windows(windows: tuple) -> pd.DataFrame:
+    """
+    Ventes par produit sur plusieurs fenêtres temporelles, en une seule requête
+    
+    Les fenêtres sont des intervalles semi-ouverts [début, fin) sur la colonne
+    date elle-même, passés en paramètres liés : chaque fenêtre est une plage
+    de l'index idx_ventes_date.
+    
+    Les horodatages stockés peuvent être 'YYYY-MM-DD HH:MM:SS' ou ISO 8601
+    'YYYY-MM-DDTHH:MM:SS' (comme le gérait DATE(date)) : les bornes sont
+    comparées dans le format de chaque ligne. Une date sans heure n'est pas
+    prise en compte.
     
-    if not db_path.exists():
-        return pd.DataFrame()
+    Args:
+        windows: Tuple de (libellé, début inclus, fin exclue), voir comparison_windows
     
-    yesterday = (datetime.now() - timedelta(days=1)).strftime("%Y-%m-%d")
+    Returns:
+        DataFrame avec les colonnes de SALES_COMPARISON_COLUMNS
     
-    conn = sqlite3.connect(db_path)
+    Example:
+        >>> load_sales_windows(tuple(comparison_windows()))
+    """
+    if not windows or not SALES_DB_PATH.exists():
+        return pd.DataFrame(columns=SALES_COMPARISON_COLUMNS)
     
+    # ' ' < 'T' : la plage [début, fin ISO) de l'index couvre les deux formats,
+    # chaque ligne est ensuite comparée aux bornes de son propre format
+    valeurs = ", ".join(["(?, ?, ?, ?, ?)"] * len(windows))
     query = f"""
-        SELECT produit, SUM(quantite) as quantite, SUM(ca_ttc) as ca
-        FROM ventes
-        WHERE DATE(date) = '{yesterday}'
-        AND CAST(strftime('%H', date) AS INTEGER) <= {until_hour}
-        GROUP BY produit
+        WITH fenetres (fenetre, debut, fin, debut_iso, fin_iso) AS (VALUES {valeurs})
+        SELECT f.fenetre, f.debut, f.fin, v.produit,
+               SUM(v.quantite) AS quantite, SUM(v.ca_ttc) AS ca
+        FROM fenetres f
+        JOIN ventes v ON v.date >= f.debut AND v.date < f.fin_iso
+        WHERE CASE WHEN substr(v.date, 11, 1) = 'T'
+                   THEN v.date >= f.debut_iso
+                   ELSE v.date < f.fin
+              END
+        GROUP BY f.fenetre, v.produit
     """
+    params = [
+        value
+        for label, debut, fin in windows
+        for value in (label, debut, fin, debut.replace(" ", "T", 1), fin.replace(" ", "T", 1))
+    ]
     
-    df = pd.read_sql_query(query, conn)
-    conn.close()
+    return pd.read_sql_query(query, get_db_connection(), params=params)
+
+
+def load_sales_comparison(
+    until_hour: Optional[int] = None,
+    decalages: Optional[Dict[str, int]] = None,
+    reference: Optional[datetime] = None,
+) -> pd.DataFrame:
+    """
+    Compare les ventes par produit "à la même heure" sur plusieurs jours
     
-    return df
+    Args:
+        until_hour: Dernière heure incluse (défaut: heure courante)
+        decalages: {libellé: décalage en jours} (défaut: aujourd'hui, hier, semaine dernière)
+        reference: Instant de référence (défaut: maintenant)
+    
+    Returns:
+        DataFrame pivoté : une ligne par produit, colonnes (quantite|ca, fenêtre)
+    
+    Example:
+        >>> comp = load_sales_comparison()
+        >>> comp["ca"]["aujourdhui"] - comp["ca"]["semaine_derniere"]
+    """
+    windows = comparison_windows(reference, until_hour, decalages)
+    df = load_sales_windows(tuple(windows))
+    labels = [label for label, _, _ in windows]
+    if df.empty:
+        return pd.DataFrame(
+            columns=pd.MultiIndex.from_product([["quantite", "ca"], labels])
+        )
+    return (
+        df.pivot_table(index="produit", columns="fenetre", values=["quantite", "ca"],
+                       aggfunc="sum", fill_value=0)
+        .reindex(columns=labels, level=1)
+    )
+
+
+def load_yesterday_data(until_hour: int = 23) -> pd.DataFrame:
+    """Charge les données d'hier depuis SQLite (optimisé)"""
+    windows = comparison_windows(until_hour=until_hour, decalages={"hier": 1})
+    df = load_sales_windows(tuple(windows))
+    return df[["produit", "quantite", "ca"]].reset_index(drop=True)
 
 
-@StreamlitOptimizer.cached_resource(ttl=3600)
 def get_db_connection():
-    """Connexion SQLite persistante (optimisée)"""
-    return sqlite3.connect("data/kezia_sales.db", check_same_thread=False)
+    """Connexion SQLite à la base des ventes, réutilisée par thread (voir db_pool)"""
+    return get_pool(SALES_DB_PATH, schema="ventes").connection()
 
 
 def init_session_state():
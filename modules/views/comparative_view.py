@@ -5,8 +5,10 @@ import streamlit as st
 import pandas as pd
 
 from modules.data.constants import TVA_VENTE, prix_vente_dict
-from modules.business.cost_calculator import calculer_cout, get_dough_cost
+from modules.business.cost_calculator import get_dough_cost
 from modules.components import render_view_header
+from modules.utils.data_manager import load_menu_costs
+from modules.utils.text_helpers import normalize_label
 
 
 def render_comparative_view(recettes, ingredients, objectif_marge):
@@ -70,16 +72,23 @@ def render_comparative_view(recettes, ingredients, objectif_marge):
     
     plats_analyzes = selected_plats if selected_plats else plats_cat
     
+    # Coûts de toute la carte, calculés en une passe
+    menu_costs, lignes = load_menu_costs(recettes, ingredients)
+    couts_par_plat = menu_costs.set_index("nom")
+
     # Fonction d'analyse d'un plat
     def analyse_plat(plat, seuil_marge):
         """Analyse un plat - tous les calculs sont en HT"""
-        ingr = ingredients[ingredients['plat'].str.lower() == plat.lower()].copy()
-        ingr = calculer_cout(ingr)
-        base_cost = ingr["Coût (€)"].sum()
-        dough = get_dough_cost(plat)
+        if plat in couts_par_plat.index:
+            base_cost = couts_par_plat.at[plat, "cout_ingredients"]
+            dough = couts_par_plat.at[plat, "cout_pate"]
+        else:
+            base_cost = 0.0
+            dough = get_dough_cost(plat)
 
         if plat.lower() == "panini pizz":
             # Coût moyen des bases (crème et sauce tomate)
+            ingr = lignes[lignes["plat_key"] == "panini pizz"]
             bases = ingr[ingr["ingredient"].str.lower().isin(["crème", "sauce tomate"])]
             mean_base = bases["Coût (€)"].mean() if not bases.empty else 0.0
             avg_add = 0.246  # Moyenne figée des suppléments
@@ -151,7 +160,7 @@ def render_comparative_view(recettes, ingredients, objectif_marge):
         _render_top_flop(df, seuil_marge, classement_key)
     
     # Analyse des ingrédients critiques
-    _render_ingredients_critiques(plats_analyzes, ingredients)
+    _render_ingredients_critiques(plats_analyzes, lignes, couts_par_plat)
 
 
 def _render_navigation_menu():
@@ -675,7 +684,7 @@ def _render_top_flop(df, seuil_marge, classement_key):
     _render_back_to_menu_button()
 
 
-def _render_ingredients_critiques(plats_analyzes, ingredients):
+def _render_ingredients_critiques(plats_analyzes, lignes, couts_par_plat):
     """Analyse et affiche les ingrédients critiques"""
     st.markdown('<div id="section-ingredients"></div>', unsafe_allow_html=True)
     st.markdown("""
@@ -695,46 +704,46 @@ def _render_ingredients_critiques(plats_analyzes, ingredients):
     
     def analyser_ingredients_critiques(plats_analyses):
         """Analyse les ingrédients qui pèsent le plus sur les coûts globaux"""
-        tous_ingredients = []
-        
-        for plat_nom in plats_analyses:
-            ingr_plat = ingredients[ingredients['plat'].str.lower() == plat_nom.lower()].copy()
-            
-            if not ingr_plat.empty:
-                ingr_plat = calculer_cout(ingr_plat)
-                
-                cout_pate = get_dough_cost(plat_nom)
-                if cout_pate > 0:
-                    ingr_plat = pd.concat([
-                        ingr_plat,
-                        pd.DataFrame([{
-                            "ingredient": "Pâte à pizza",
-                            "plat": plat_nom,
-                            "quantite_g": 250,
-                            "prix_kg": cout_pate * 4,
-                            "Coût (€)": cout_pate
-                        }])
-                    ], ignore_index=True)
-                
-                if plat_nom.lower() == "panini pizz":
-                    bases = ingr_plat[ingr_plat["ingredient"].str.lower().isin(["crème", "sauce tomate"])]
-                    mean_base = bases["Coût (€)"].mean() if not bases.empty else 0.0
-                    avg_add = 0.246
-                    
-                    ingr_plat = pd.DataFrame([
-                        {"ingredient": "Base (moyenne)", "plat": plat_nom, "quantite_g": 50, "prix_kg": mean_base * 20, "Coût (€)": mean_base},
-                        {"ingredient": "Suppléments (moyenne)", "plat": plat_nom, "quantite_g": 100, "prix_kg": avg_add * 10, "Coût (€)": avg_add * 2},
-                        {"ingredient": "Mozzarella", "plat": plat_nom, "quantite_g": 40, "prix_kg": 5.85, "Coût (€)": 0.234},
-                        {"ingredient": "Pâte à panini", "plat": plat_nom, "quantite_g": 120, "prix_kg": 1.0, "Coût (€)": 0.12}
-                    ])
-                
-                ingr_plat["plat_origine"] = plat_nom
-                tous_ingredients.append(ingr_plat)
+        selection = pd.DataFrame({"plat_origine": list(plats_analyses)})
+        selection["plat_key"] = selection["plat_origine"].map(normalize_label)
         
-        if not tous_ingredients:
+        # Lignes d'ingrédients (coûts déjà calculés) des plats analysés
+        df_ingredients = selection.merge(lignes, on="plat_key", how="inner")
+        if df_ingredients.empty:
             return pd.DataFrame()
         
-        df_ingredients = pd.concat(tous_ingredients, ignore_index=True)
+        # Une ligne de pâte par plat qui en comporte une
+        plats_presents = df_ingredients.drop_duplicates("plat_origine")["plat_origine"]
+        cout_pate = plats_presents.map(couts_par_plat["cout_pate"]).fillna(0.0)
+        avec_pate = cout_pate > 0
+        pates = pd.DataFrame({
+            "ingredient": "Pâte à pizza",
+            "plat": plats_presents[avec_pate],
+            "quantite_g": 250,
+            "prix_kg": cout_pate[avec_pate] * 4,
+            "Coût (€)": cout_pate[avec_pate],
+            "plat_origine": plats_presents[avec_pate],
+        })
+        df_ingredients = pd.concat([df_ingredients, pates], ignore_index=True)
+        
+        # Panini Pizz : composition moyenne (une base + deux suppléments)
+        mask_panini = df_ingredients["plat_origine"].str.lower() == "panini pizz"
+        if mask_panini.any():
+            panini = df_ingredients[mask_panini]
+            plat_nom = panini["plat_origine"].iloc[0]
+            bases = panini[panini["ingredient"].str.lower().isin(["crème", "sauce tomate"])]
+            mean_base = bases["Coût (€)"].mean() if not bases.empty else 0.0
+            avg_add = 0.246
+            
+            df_ingredients = pd.concat([
+                df_ingredients[~mask_panini],
+                pd.DataFrame([
+                    {"ingredient": "Base (moyenne)", "plat": plat_nom, "quantite_g": 50, "prix_kg": mean_base * 20, "Coût (€)": mean_base},
+                    {"ingredient": "Suppléments (moyenne)", "plat": plat_nom, "quantite_g": 100, "prix_kg": avg_add * 10, "Coût (€)": avg_add * 2},
+                    {"ingredient": "Mozzarella", "plat": plat_nom, "quantite_g": 40, "prix_kg": 5.85, "Coût (€)": 0.234},
+                    {"ingredient": "Pâte à panini", "plat": plat_nom, "quantite_g": 120, "prix_kg": 1.0, "Coût (€)": 0.12},
+                ]).assign(plat_origine=plat_nom),
+            ], ignore_index=True)
         
         analyse_ingredients = df_ingredients.groupby("ingredient").agg({
             "Coût (€)": ["sum", "count", "mean"],
@@ -3,11 +3,12 @@ Analyse d'un plat - Vue détaillée avec composition et métriques
 """
 import streamlit as st
 import pandas as pd
-import plotly.express as px
 
-from modules.data.constants import TVA_VENTE, prix_vente_dict, images_plats
+from modules.data.constants import TVA_VENTE, prix_vente_dict, images_plats, SALADES_AVEC_PAIN, COUT_PAIN_SALADE
 from modules.business.cost_calculator import calculer_cout, get_dough_cost
 from modules.components import render_view_header, afficher_image_plat
+from modules.utils.data_manager import load_ingredient_index
+from modules.business.optimization import sweep_margin_targets
 from modules.data.sales_data import get_ventes_produit, get_stats_globales
 from modules.data.sales_insights import get_product_sales_insight, format_insight_message
 
@@ -258,7 +259,7 @@ def render_dish_analysis_view(recettes, ingredients, objectif_marge):
         pass
 
     # 1. Filtrer les ingrédients du plat sélectionné
-    ingr_plat = ingredients[ingredients['plat'].str.lower() == plat.lower()].copy()
+    ingr_plat = load_ingredient_index(ingredients).select(ingredients, plat).copy()
 
 
     # 2. 🔢 Quantités spécifiques pour chaque plat (Grosse Faim)
@@ -317,21 +318,14 @@ def render_dish_analysis_view(recettes, ingredients, objectif_marge):
 
 
 
-    salades_avec_pain = [
-    "salade burrata di parma",
-    "salade burrata di salmone",
-    "salade césar",
-    "salade chèvre",
-    "salade végétarienne"
-]
-    if plat.lower() in salades_avec_pain:
+    if plat.lower() in SALADES_AVEC_PAIN:
         ingr_plat = pd.concat([
         ingr_plat,
         pd.DataFrame([{
             "ingredient": "Pain aux herbes",
             "quantite_g": 0,
             "prix_kg": 0,
-            "Coût (€)": 0.21,
+            "Coût (€)": COUT_PAIN_SALADE,
             "ingredient_lower": "pain aux herbes"
         }])
     ], ignore_index=True)
@@ -1112,7 +1106,8 @@ def render_dish_analysis_view(recettes, ingredients, objectif_marge):
 </div>
 """, unsafe_allow_html=True)
     
-    # Graphique avec style amélioré
+    # Graphique avec style amélioré (plotly importé au premier rendu)
+    import plotly.express as px
     fig_bar = px.bar(
         grouped_finale, 
         x="ingredient", 
@@ -1133,3 +1128,81 @@ def render_dish_analysis_view(recettes, ingredients, objectif_marge):
     """, unsafe_allow_html=True)
     st.plotly_chart(fig_bar, use_container_width=True)
     st.markdown("</div>", unsafe_allow_html=True)
+
+    _render_margin_frontier(grouped_finale, prix_affiche, objectif_marge)
+
+
+def _render_margin_frontier(composition, prix_ht, objectif_marge):
+    """
+    Affiche la frontière « variation des grammages / marge atteinte » du plat.
+    
+    Args:
+        composition: Composition finale du plat (avec colonne "Coût (€)")
+        prix_ht: Prix de vente HT du plat
+        objectif_marge: Objectif de marge en pourcentage (mis en évidence)
+    """
+    if composition.empty or not prix_ht:
+        return
+
+    frontiere = sweep_margin_targets(composition, prix_ht)
+    frontiere = frontiere[frontiere["faisable"]]
+    if frontiere.empty:
+        return
+
+    import plotly.express as px
+
+    st.markdown("""
+<div style="display: flex; align-items: center; gap: 0.5rem; padding: 0.6rem 0.8rem; background: linear-gradient(to right, #fafafa 0%, #ffffff 100%); border-left: 2.5px solid #D92332; border-radius: 6px; margin: 1.2rem 0 0.8rem;">
+    <div style="display: flex; align-items: center; justify-content: center; width: 28px; height: 28px; background: rgba(217, 35, 50, 0.08); border-radius: 5px;">
+        <svg width="14" height="14" viewBox="0 0 24 24" fill="none" xmlns="http://www.w3.org/2000/svg">
+            <path d="M3 3v18h18M7 15l4-4 3 3 6-6" stroke="#D92332" stroke-width="2" stroke-linecap="round" stroke-linejoin="round"/>
+        </svg>
+    </div>
+    <div>
+        <div style="font-size: 0.85rem; font-weight: 600; color: #0f172a; letter-spacing: -0.01em;">Marge vs grammages</div>
+        <div style="font-size: 0.7rem; color: #64748b; margin-top: 0.05rem;">Réduction équilibrée des grammages pour chaque objectif de 55 à 80 %</div>
+    </div>
+</div>
+""", unsafe_allow_html=True)
+
+    fig_frontiere = px.line(
+        frontiere,
+        x="ecart_pct",
+        y="marge_atteinte",
+        markers=True,
+        height=280,
+        hover_data={
+            "marge_cible": ":.0f",
+            "ecart_grammes": ":.0f",
+            "cout_matiere": ":.2f",
+            "ecart_pct": ":.1f",
+            "marge_atteinte": ":.1f",
+        },
+        labels={
+            "ecart_pct": "Variation des grammages (%)",
+            "marge_atteinte": "Marge atteinte (%)",
+            "marge_cible": "Objectif (%)",
+            "ecart_grammes": "Variation (g)",
+            "cout_matiere": "Coût matière HT (€)",
+        },
+        color_discrete_sequence=['#D92332']
+    )
+    fig_frontiere.add_hline(
+        y=objectif_marge,
+        line_dash="dot",
+        line_color="#64748b",
+        annotation_text=f"Objectif {objectif_marge:.0f} %",
+    )
+    fig_frontiere.update_layout(
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='rgba(0,0,0,0)',
+        xaxis=dict(showgrid=False),
+        yaxis=dict(showgrid=True, gridcolor='#f1f5f9'),
+        margin=dict(l=20, r=20, t=20, b=20)
+    )
+
+    st.markdown("""
+    <div style="border: 1px solid #e2e8f0; border-radius: 10px; padding: 0.5rem; background: white; box-shadow: 0 1px 3px rgba(15, 23, 42, 0.05);">
+    """, unsafe_allow_html=True)
+    st.plotly_chart(fig_frontiere, use_container_width=True)
+    st.markdown("</div>", unsafe_allow_html=True)
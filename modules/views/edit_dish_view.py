@@ -10,7 +10,7 @@ from urllib.parse import quote
 from modules.data.constants import TVA_VENTE, prix_vente_dict
 from modules.business.cost_calculator import calculer_cout, get_dough_cost
 from modules.business.optimization import optimize_grammages_balanced
-from modules.utils.data_manager import load_drafts, save_drafts
+from modules.utils.data_manager import load_drafts, save_drafts, load_ingredient_index
 
 
 def render_edit_dish_view(recettes, ingredients, objectif_marge):
@@ -1002,7 +1002,7 @@ def _render_creation_view(recettes, ingredients, taux_tva, seuil_marge_perso):
         nom_plat = st.text_input("📝 Nom du plat", value=f"{plat_selectionne} personnalisé", key="nom_plat")
     
     # Traitement des ingrédients
-    filtered_ingredients = ingredients[ingredients['plat'].str.lower() == plat_selectionne.lower()].copy()
+    filtered_ingredients = load_ingredient_index(ingredients).select(ingredients, plat_selectionne).copy()
     
     if filtered_ingredients.empty:
         st.error(f"❌ Aucun ingrédient trouvé pour {plat_selectionne}")
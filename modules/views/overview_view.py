@@ -2,13 +2,12 @@
 Vue d'ensemble - Grille et liste de tous les plats avec métriques clés
 """
 import streamlit as st
-import pandas as pd
 import html
 from urllib.parse import quote
 
-from modules.data.constants import TVA_VENTE, prix_vente_dict
-from modules.business.cost_calculator import calculer_cout, get_dough_cost
-from modules.utils.image_helpers import get_plat_image_path, get_image_data_uri
+from modules.utils.data_manager import load_menu_costs
+from modules.utils.image_helpers import get_plat_image_path
+from modules.utils.image_thumbnails import get_thumbnail_url
 # from modules.components.chatbot import render_floating_chatbot  # TODO: Ajouter dossier chatbot/ au repo
 
 
@@ -363,45 +362,12 @@ def render_overview_view(recettes, ingredients, objectif_marge):
 
     plats_a_afficher = filtered_recettes["plat"].unique()
 
-    # Calculer les métriques pour chaque plat
-    plats_data = []
-    for plat_nom in plats_a_afficher:
-        plat_info = recettes[recettes['plat'] == plat_nom].iloc[0]
-        categorie = plat_info['categorie']
-
-        ingr_plat = ingredients[ingredients['plat'].str.lower() == plat_nom.lower()].copy()
-        ingr_plat = calculer_cout(ingr_plat)
-
-        cout_matiere = ingr_plat["Coût (€)"].sum() + get_dough_cost(plat_nom)
-
-        salades_avec_pain = [
-            "salade burrata di parma",
-            "salade burrata di salmone",
-            "salade césar",
-            "salade chèvre",
-            "salade végétarienne"
-        ]
-        if plat_nom.lower() in salades_avec_pain:
-            cout_matiere += 0.21
-
-        prix_ttc = prix_vente_dict.get(plat_nom, 0)
-        prix_ht = prix_ttc / (1 + TVA_VENTE)
-
-        if prix_ht > 0:
-            marge_pct = ((prix_ht - cout_matiere) / prix_ht) * 100
-        else:
-            marge_pct = 0
-
-        plats_data.append({
-            "nom": plat_nom,
-            "categorie": categorie,
-            "cout_matiere": cout_matiere,
-            "prix_ht": prix_ht,
-            "prix_ttc": prix_ttc,
-            "marge_pct": marge_pct
-        })
-
-    df_plats = pd.DataFrame(plats_data)
+    # Métriques de tous les plats, calculées en une passe pour toute la carte
+    menu_costs, _ = load_menu_costs(recettes, ingredients)
+    df_plats = menu_costs.loc[
+        menu_costs["nom"].isin(plats_a_afficher),
+        ["nom", "categorie", "cout_matiere", "prix_ht", "prix_ttc", "marge_pct"],
+    ].reset_index(drop=True)
     
     if not df_plats.empty:
         df_plats = df_plats[df_plats["marge_pct"] >= marge_min]
@@ -528,11 +494,11 @@ def render_overview_view(recettes, ingredients, objectif_marge):
                         progress_width = max(0, min(100, int(round(plat_d["marge_pct"]))))
 
                         image_path = get_plat_image_path(plat_d["nom"])
-                        image_data_uri = get_image_data_uri(image_path)
+                        image_src = get_thumbnail_url(image_path, "card")
                         image_html = ""
-                        if image_data_uri:
+                        if image_src:
                             image_html = (
-                                f'<img src="{image_data_uri}" alt="{plat_nom_affichage}" '
+                                f'<img src="{image_src}" alt="{plat_nom_affichage}" '
                                 'style="position: absolute; inset: 0; width: 100%; height: 100%; object-fit: cover;" />'
                             )
                         target_url = f"?mode=analyse&plat={quote(plat_nom_affichage)}"